@@ -6,7 +6,8 @@ from datetime import timedelta
 from app.database import get_db
 from app.schemas.auth import Token, UserLogin
 from app.crud.user import authenticate_user, User
-from app.utils.security import create_access_token
+from app.utils.security import create_user_token, admin_required, TokenPrincipal
+from app.utils.passwords import password_hasher
 from app.config import settings
 
 router = APIRouter(tags=["auth"])
@@ -18,20 +19,22 @@ def login_for_access_token(
 ):
     user = authenticate_user(db, form_data.username, form_data.password)
     if not user:
-        raise HTTPException(...)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuario o contraseña incorrectos",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={
-            "sub": user.username,
-            "role_id": user.role_id,
-            "permissions": user.role.permissions
-        },
-        expires_delta=access_token_expires
-    )
+    access_token = create_user_token(user, expires_delta=access_token_expires)
     
     return {"access_token": access_token, "token_type": "bearer"}
 
+@router.get("/auth/password-hasher/stats", response_model=dict)
+def get_password_hasher_stats(current_user: TokenPrincipal = Depends(admin_required)):
+    """Profundidad de cola y rechazos del pool de bcrypt"""
+    return password_hasher.stats()
+
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from app.utils.security import get_current_active_user
@@ -1,5 +1,5 @@
 # routers/client.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import List, Optional
@@ -8,21 +8,30 @@ from app.crud.client import search_clients as search, get_clients as gets, get_c
 from app.dependencies import get_db
 from app.models.user import User
 from app.dependencies import get_current_active_user
+from app.utils.pagination import set_page_headers
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
 @router.get("/", response_model=List[ClientOut])
 def read_clients(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
     """Obtiene lista de clientes con opción de búsqueda"""
     if search:
         return search_clients(db, search_term=search, limit=limit)
-    return gets(db, skip=skip, limit=limit)
+    try:
+        page = gets(db, skip=skip, limit=limit, cursor=cursor, with_total=include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
 
 @router.get("/search", response_model=List[ClientOut])
 def search_clients(
@@ -1,31 +1,106 @@
-from fastapi import Query, APIRouter, Depends, HTTPException, status
+import json
+from fastapi import Query, APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.database import get_db
+from app.config import settings
+from app.database import get_db, get_async_db, SessionLocal, AsyncSessionLocal
 from app.models.inventory import Inventory
-from app.schemas.inventory import InventoryOut, InventoryUpdate
-from app.utils.security import get_current_active_user
-from app.models.user import User
+from app.models.low_stock import LowStockItem
+from app.schemas.inventory import InventoryOut, InventoryUpdate, LowStockItemOut
+from app.utils.security import TokenPrincipal, require_permission
 from app.models.branch import Branch
+from app.utils.inventory import record_movements, ADJUSTMENT
+from decimal import Decimal
+from datetime import datetime, timezone
+from app.crud.inventory import get_inventory_page, iter_inventory_rows
+from app.crud.inventory_ledger import get_stock_as_of
+from app.utils.low_stock import low_stock_query, low_stock_item, low_stock_events
+from app.utils.pagination import paginate, set_page_headers
 
 router = APIRouter(prefix="/inventory", tags=["inventory"])
 
 @router.get("/branches", response_model=List[dict])
-def get_branches(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+async def get_branches(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("inventory"))
 ):
-    branches = db.query(Branch.branch_id, Branch.name).distinct().all()
+    branches = (await db.execute(select(Branch.branch_id, Branch.name).distinct())).all()
     return [{"branch_id": branch.branch_id, "name": branch.name} for branch in branches]
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def _inventory_item(row) -> dict:
+    return {
+        "inventory_id": row.inventory_id,
+        "product_id": row.product_id,
+        "branch_id": row.branch_id,
+        "quantity": float(row.quantity),
+        "last_updated": row.last_updated.isoformat() if row.last_updated else None
+    }
+
+def _stream_inventory(ndjson: bool, **filters):
+    """
+    Serializa el inventario por bloques mientras se envía (NDJSON o un arreglo JSON),
+    con su propia sesión: el stream sigue después de cerrar la del request.
+    """
+    db = SessionLocal()
+    try:
+        first = True
+        if not ndjson:
+            yield b"["
+        for rows in iter_inventory_rows(db, **filters):
+            lines = [json.dumps(_inventory_item(row)) for row in rows]
+            if ndjson:
+                yield ("\n".join(lines) + "\n").encode("utf-8")
+            else:
+                yield (("" if first else ",") + ",".join(lines)).encode("utf-8")
+            first = False
+        if not ndjson:
+            yield b"]"
+    finally:
+        db.close()
+
+async def _inventory_response(request: Request, response: Response, db: AsyncSession, format: Optional[str],
+                              limit: Optional[int], cursor: Optional[str], include_total: bool, **filters):
+    """
+    - format=ndjson (o Accept: application/x-ndjson): todas las filas, una por línea.
+    - limit o cursor: una página por (branch_id, product_id), con X-Next-Cursor.
+    - sin parámetros: todas las filas como arreglo JSON, generado por bloques.
+    """
+    if format not in (None, "json", "ndjson"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Formato no soportado. Use 'json' o 'ndjson'")
+    ndjson = format == "ndjson" or (format is None and NDJSON_MEDIA_TYPE in request.headers.get("accept", ""))
+    if ndjson:
+        return StreamingResponse(_stream_inventory(True, **filters), media_type=NDJSON_MEDIA_TYPE)
+    if limit is None and cursor is None:
+        return StreamingResponse(_stream_inventory(False, **filters), media_type="application/json")
+
+    try:
+        page = await db.run_sync(lambda session: get_inventory_page(
+            session, limit=limit or 100, cursor=cursor, with_total=include_total, **filters
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
+
 @router.get("/branch/{branch_id}", response_model=List[InventoryOut])
-def read_inventory_by_branch(
+async def read_inventory_by_branch(
+    request: Request,
+    response: Response,
     branch_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("inventory"))
 ):
-    return db.query(Inventory).filter(Inventory.branch_id == branch_id).all()
+    return await _inventory_response(request, response, db, format, limit, cursor, include_total, branch_id=branch_id)
 
 @router.put("/{product_id}/{branch_id}", response_model=InventoryOut)
 def update_inventory(
@@ -33,12 +108,14 @@ def update_inventory(
     branch_id: int,
     inventory: InventoryUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: TokenPrincipal = Depends(require_permission("inventory"))
 ):
+    # La fila queda bloqueada (como en lock_inventory_rows) para que una venta
+    # concurrente no deje desactualizada la cantidad previa del ajuste
     db_inventory = db.query(Inventory).filter(
         Inventory.product_id == product_id,
         Inventory.branch_id == branch_id
-    ).first()
+    ).with_for_update().first()
     
     if not db_inventory:
         raise HTTPException(
@@ -46,31 +123,35 @@ def update_inventory(
             detail="Registro de inventario no encontrado"
         )
     
+    previous_quantity = db_inventory.quantity
     for field, value in inventory.dict(exclude_unset=True).items():
         setattr(db_inventory, field, value)
-    
+    db.flush()
+
+    record_movements(db, [{
+        "product_id": product_id, "branch_id": branch_id,
+        "quantity_delta": Decimal(str(db_inventory.quantity)) - previous_quantity,
+        "movement_type": ADJUSTMENT, "user_id": current_user.user_id
+    }])
     db.commit()
     db.refresh(db_inventory)
     return db_inventory
 
-from typing import Optional
-from fastapi import Query
-
 @router.get("/", response_model=List[InventoryOut])
-def get_inventory(
+async def get_inventory(
+    request: Request,
+    response: Response,
     branch_id: Optional[int] = Query(None),
     product_id: Optional[int] = Query(None),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    format: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("inventory"))
 ):
-    query = db.query(Inventory)
-
-    if branch_id is not None:
-        query = query.filter(Inventory.branch_id == branch_id)
-    if product_id is not None:
-        query = query.filter(Inventory.product_id == product_id)
-
-    return query.all()
+    return await _inventory_response(request, response, db, format, limit, cursor, include_total,
+                                     branch_id=branch_id, product_id=product_id)
 
 # routers/inventory.py
 @router.get("/verify-updates")
@@ -94,4 +175,58 @@ def verify_inventory_updates(
             ]
         }
     except Exception as e:
-        raise HTTPException(500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(500, detail=str(e))
+
+@router.get("/as-of", response_model=List[dict])
+async def read_stock_as_of(
+    branch_id: int,
+    at: datetime,
+    product_ids: Optional[str] = None,  # "1,2,3"
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("inventory"))
+):
+    """Stock de la sucursal en un instante (UTC), desde la foto más cercana y el libro de movimientos"""
+    try:
+        ids = [int(id) for id in product_ids.split(",")] if product_ids else None
+        if at.tzinfo is not None:
+            at = at.astimezone(timezone.utc).replace(tzinfo=None)
+        stock = await db.run_sync(get_stock_as_of, branch_id, at, ids)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return [
+        {"product_id": product_id, "quantity": float(quantity)}
+        for product_id, quantity in sorted(stock.items())
+    ]
+
+@router.get("/low-stock", response_model=List[LowStockItemOut])
+async def read_low_stock(
+    response: Response,
+    branch_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("inventory"))
+):
+    """Productos por debajo del stock mínimo, por sucursal (lista mantenida con cada movimiento)"""
+    try:
+        page = await db.run_sync(lambda session: paginate(
+            low_stock_query(session, branch_id), [LowStockItem.branch_id, LowStockItem.product_id],
+            limit, cursor=cursor, with_total=include_total
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    set_page_headers(response, page)
+    return [low_stock_item(row) for row in page.items]
+
+@router.get("/low-stock/stream")
+async def stream_low_stock(
+    request: Request,
+    branch_id: Optional[int] = None,
+    current_user: TokenPrincipal = Depends(require_permission("inventory"))
+):
+    """Server-Sent Events con las altas (`low_stock`) y bajas (`restocked`) de la lista de stock bajo"""
+    events = low_stock_events(AsyncSessionLocal, branch_id, settings.LOW_STOCK_STREAM_INTERVAL_SECONDS,
+                              request.is_disconnected)
+    return StreamingResponse(events, media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,59 @@
+# routers/jobs.py
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.utils.jobs import job_manager, DONE
+from app.utils.security import TokenPrincipal, get_current_principal
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+def job_response(state: dict) -> dict:
+    """Datos públicos de un trabajo"""
+    return {
+        "job_id": state["job_id"],
+        "job_type": state["job_type"],
+        "status": state["status"],
+        "error": state["error"],
+        "created_at": state["created_at"],
+        "started_at": state["started_at"],
+        "finished_at": state["finished_at"],
+        "status_url": f"{settings.API_V1_STR}/jobs/{state['job_id']}",
+        "download_url": f"{settings.API_V1_STR}/jobs/{state['job_id']}/download"
+    }
+
+def _get_own_job(job_id: str, current_user: TokenPrincipal) -> dict:
+    state = job_manager.get(job_id)
+    if not state or (state["user_id"] != current_user.user_id and not current_user.is_superuser):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo no encontrado"
+        )
+    return state
+
+@router.get("/{job_id}", response_model=dict)
+def read_job(
+    job_id: str,
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Obtiene el estado de un trabajo en segundo plano"""
+    return job_response(_get_own_job(job_id, current_user))
+
+@router.get("/{job_id}/download")
+def download_job_result(
+    job_id: str,
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Descarga el resultado de un trabajo terminado"""
+    state = _get_own_job(job_id, current_user)
+    if state["status"] != DONE:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El trabajo no está listo (estado: {state['status']})"
+        )
+    # result_path limita la ruta al directorio de trabajos
+    return FileResponse(
+        job_manager.result_path(job_id),
+        media_type=state["media_type"],
+        filename=state["filename"]
+    )
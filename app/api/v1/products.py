@@ -1,18 +1,29 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi.responses import JSONResponse
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import or_, func
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import func, select
+from app.database import get_db, get_async_db
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductOut, ProductUpdate
-from app.utils.security import get_current_active_user
+from app.schemas.product import (
+    ProductCreate, ProductOut, ProductUpdate, ProductCatalogPage, BarcodeBatchRequest, BarcodeBatchOut,
+    BulkInventoryRequest
+)
+from app.utils.security import TokenPrincipal, get_current_principal
 from app.crud.product import create_product, get_product, update_product, delete_product
-from app.models.user import User
+from app.utils.product_search import search_products
+from app.utils.barcode_index import barcode_index
+from app.utils.product_import import import_products, detect_format, FORMATS
+import io
+from app.utils.pagination import paginate, decode_offset_cursor
 from app.models.inventory import Inventory  # Import Inventory model
 from app.models.branch import Branch  # Import Branch model
 from pydantic import ConfigDict
 from app.crud.product import (
-    create_product, get_product, update_product, delete_product, update_product_inventory
+    create_product, get_product, update_product, delete_product, update_product_inventory,
+    update_products_inventory,
+    get_product_catalog
 )
 
 router = APIRouter(prefix="/products", tags=["products"])
@@ -21,103 +32,78 @@ router = APIRouter(prefix="/products", tags=["products"])
 class ProductOut(ProductOut):
     model_config = ConfigDict(from_attributes=True)  # Esto reemplaza a from_orm
 
-@router.get("/", response_model=Dict[str, Any])
-def read_products(
+def _catalog_page(db: Session, skip: int, limit: int, search: Optional[str], category_id: Optional[int],
+                  unit_type: Optional[int], branch_id: Optional[int], cursor: Optional[str],
+                  include_total: bool) -> dict:
+    filters = [Product.is_active == True]
+    if category_id is not None:
+        filters.append(Product.category_id == category_id)
+    if unit_type is not None:
+        filters.append(Product.unit_type == unit_type)
+
+    # Se pagina solo sobre productos; el stock se agrega después para la página
+    query = db.query(Product.product_id, Product.name).filter(*filters)
+
+    if search and search.strip():
+        # Índice de búsqueda, ordenado por relevancia: el cursor lleva la posición
+        offset = decode_offset_cursor(cursor) if cursor else skip
+        page = search_products(db, query, search, offset, limit, with_total=include_total)
+    else:
+        page = paginate(query, [Product.name, Product.product_id], limit, cursor=cursor,
+                        skip=skip, with_total=include_total)
+    products, next_cursor = page.items, page.next_cursor
+    total, total_estimated = page.total, page.total_estimated
+
+    # Una consulta con GROUP BY; las filas ya tienen la forma de ProductCatalogItem
+    # y se serializan directo, sin objetos ORM ni modelos intermedios
+    rows = get_product_catalog(db, [product.product_id for product in products], branch_id)
+
+    return {
+        "items": [row._asdict() for row in rows],
+        "total": total,
+        "total_estimated": total_estimated,
+        "skip": skip,
+        "limit": limit,
+        "next_cursor": next_cursor
+    }
+
+@router.get("/", response_model=ProductCatalogPage)
+async def read_products(
     skip: int = 0,
     limit: int = 200,
     search: Optional[str] = None,
     category_id: Optional[int] = None,
     unit_type: Optional[int] = None,
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
+    """
+    Catálogo paginado por (name, product_id): para la página siguiente enviar
+    `cursor` = `next_cursor` de la respuesta. Con búsqueda se ordena por relevancia.
+    El stock total y por sucursal de la página se agrega en una sola consulta SQL.
+    `include_total=true` agrega el total (estimado en tablas grandes, ver estimate_total).
+    La paginación y la búsqueda corren con run_sync sobre la conexión asyncpg.
+    """
     try:
-        # Consulta base de productos
-        query = db.query(Product).filter(Product.is_active == True)
-        
-        if search:
-            query = query.filter(
-                or_(
-                    Product.name.ilike(f"%{search}%"),
-                    Product.description.ilike(f"%{search}%")
-                )
-            )
-        
-        if category_id is not None:
-            query = query.filter(Product.category_id == category_id)
-        if unit_type is not None:
-            query = query.filter(Product.unit_type == unit_type)
-        
-        total = query.count()
-        products = query.offset(skip).limit(limit).all()
-        
-        # Obtener el inventario para estos productos
-        product_ids = [p.product_id for p in products]
-        
-        # Consulta de inventario
-        inventory_query = db.query(
-            Inventory.product_id,
-            Inventory.branch_id,
-            Inventory.quantity,
-            Branch.name.label("branch_name")
-        ).join(
-            Branch, Inventory.branch_id == Branch.branch_id
-        ).filter(
-            Inventory.product_id.in_(product_ids)
-        )
-        
-        if branch_id is not None:
-            inventory_query = inventory_query.filter(Inventory.branch_id == branch_id)
-        
-        inventory_data = inventory_query.all()
-        
-        # Organizar el inventario por producto
-        inventory_by_product = {}
-        for item in inventory_data:
-            if item.product_id not in inventory_by_product:
-                inventory_by_product[item.product_id] = []
-            inventory_by_product[item.product_id].append({
-                "branch_id": item.branch_id,
-                "branch_name": item.branch_name,
-                "quantity": float(item.quantity) if item.quantity else 0
-            })
-        
-        # Construir la respuesta
-        products_data = []
-        for product in products:
-            product_dict = ProductOut.model_validate(product).model_dump()
-            
-            # Calcular el stock según el filtro
-            inventory_items = inventory_by_product.get(product.product_id, [])
-            
-            if branch_id:
-                # Stock solo para la sucursal filtrada
-                branch_item = next((item for item in inventory_items if item["branch_id"] == branch_id), None)
-                product_dict["stock"] = branch_item["quantity"] if branch_item else 0
-            else:
-                # Stock total de todas las sucursales
-                product_dict["stock"] = sum(item["quantity"] for item in inventory_items)
-            
-            product_dict["inventory_items"] = inventory_items
-            products_data.append(product_dict)
-        
-        return {
-            "items": products_data,
-            "total": total,
-            "skip": skip,
-            "limit": limit
-        }
+        return JSONResponse(await db.run_sync(
+            _catalog_page, skip, limit, search, category_id, unit_type, branch_id, cursor, include_total
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except Exception as e:
         print(f"Error en read_products: {str(e)}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error al obtener productos: {str(e)}"
         )
+
 @router.post("/", response_model=ProductOut, status_code=status.HTTP_201_CREATED)
 def create_new_product(
     product: ProductCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     if not current_user.is_superuser:
         raise HTTPException(
@@ -137,16 +123,99 @@ def create_new_product(
     
     return create_product(db, product=product)
 
+@router.post("/import", response_model=Dict[str, Any])
+def import_products_file(
+    file: UploadFile = File(...),
+    format: Optional[str] = None,
+    db: Session = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """
+    Importación masiva de productos desde CSV o NDJSON (formato por extensión o `format`).
+    CSV: columnas de ProductCreate más `inventory` = "branch_id:cantidad;...";
+    NDJSON: un ProductCreate por línea. Devuelve el reporte con los errores por fila.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para realizar esta acción"
+        )
+    try:
+        fmt = format or detect_format(file.filename)
+        if fmt not in FORMATS:
+            raise ValueError(f"Formato no soportado: {fmt}")
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        return import_products(db, stream, fmt, user_id=current_user.user_id)
+    except UnicodeDecodeError:
+        # Subclase de ValueError: tiene que ir antes
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="El archivo debe estar en UTF-8")
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+@router.put("/inventory:bulk", response_model=Dict[str, int])
+def update_inventory_bulk(
+    request: BulkInventoryRequest,
+    db: Session = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """
+    Asigna el inventario de varios productos en una llamada: cada producto queda con
+    exactamente las sucursales indicadas. Devuelve cuántas filas se insertaron,
+    actualizaron, eliminaron o no cambiaron.
+    """
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permisos para realizar esta acción"
+        )
+    assignments = {}
+    for item in request.products:
+        assignments.setdefault(item.product_id, []).extend(item.inventory_assignments)
+    try:
+        return update_products_inventory(db, assignments, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+
+@router.get("/barcode/{code}", response_model=ProductOut)
+def read_product_by_barcode(
+    code: str,
+    db: Session = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Búsqueda exacta por código de barras (escáner del POS), desde el índice en memoria"""
+    product = barcode_index.get(db, code)
+    if product is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto no encontrado"
+        )
+    return JSONResponse(product)
+
+@router.post("/barcode:batch", response_model=BarcodeBatchOut)
+def read_products_by_barcodes(
+    request: BarcodeBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
+):
+    """Varios códigos de barras en una petición; los que no existen van en `missing`"""
+    barcodes = list(dict.fromkeys(request.barcodes))
+    found = barcode_index.get_many(db, barcodes)
+    return JSONResponse({
+        "items": [found[barcode] for barcode in barcodes if barcode in found],
+        "missing": [barcode for barcode in barcodes if barcode not in found]
+    })
+
 @router.get("/{product_id}", response_model=ProductOut)
-def read_product(
+async def read_product(
     product_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     # Obtener el producto con sus relaciones de inventario
-    product = db.query(Product).options(
-        joinedload(Product.inventory_items)
-    ).filter(Product.product_id == product_id).first()
+    product = (await db.execute(
+        select(Product).options(selectinload(Product.inventory_items))
+        .where(Product.product_id == product_id)
+    )).scalars().first()
     
     if not product:
         raise HTTPException(
@@ -174,7 +243,7 @@ def update_existing_product(
     product_id: int,
     product: ProductUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     if not current_user.is_superuser:
         raise HTTPException(
@@ -190,7 +259,7 @@ def update_existing_product(
     
      # Actualizar inventario si se proporciona
     if hasattr(product, 'inventory_assignments') and product.inventory_assignments:
-        update_product_inventory(db, product_id, product.inventory_assignments)
+        update_product_inventory(db, product_id, product.inventory_assignments, current_user.user_id)
     
     # Refrescar datos del producto
     db.refresh(db_product)
@@ -201,7 +270,7 @@ def update_existing_product(
 def delete_existing_product(
     product_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     if not current_user.is_superuser:
         raise HTTPException(
@@ -215,12 +284,14 @@ def delete_existing_product(
         )
 
 @router.get("/search/", response_model=ProductOut)
-def read_product_by_name(
+async def read_product_by_name(
     name: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
-    product = db.query(Product).filter(Product.name == name, Product.is_active == True).first()
+    product = (await db.execute(
+        select(Product).where(Product.name == name, Product.is_active == True)
+    )).scalars().first()
     if not product:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -229,44 +300,48 @@ def read_product_by_name(
     return product
 
 @router.get("/{product_id}/min_stock", response_model=int)
-def get_min_stock(
+async def get_min_stock(
     product_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
-    product = get_product(db, product_id=product_id)
-    if not product:
+    min_stock = (await db.execute(
+        select(Product.min_stock).where(Product.product_id == product_id)
+    )).first()
+    if not min_stock:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Producto no encontrado"
         )
-    return product.min_stock
+    return min_stock[0]
 
 @router.get("/{product_id}/stock", response_model=int)
-def get_product_stock(
+async def get_product_stock(
     product_id: int,
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(get_current_principal)
 ):
     # Buscar el producto
-    product = db.query(Product).filter(Product.product_id == product_id).first()
-    if not product:
+    exists = (await db.execute(
+        select(Product.product_id).where(Product.product_id == product_id)
+    )).first()
+    if not exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Producto no encontrado"
         )
     
     # Consulta base
-    query = db.query(func.sum(Inventory.quantity)).filter(
+    query = select(func.sum(Inventory.quantity)).where(
         Inventory.product_id == product_id
     )
     
     # Filtrar por sucursal si se especifica
     if branch_id is not None:
-        query = query.filter(Inventory.branch_id == branch_id)
+        query = query.where(Inventory.branch_id == branch_id)
     
     # Obtener el stock
-    stock = query.scalar() or 0
+    stock = (await db.execute(query)).scalar() or 0
     
     return stock
@@ -1,12 +1,13 @@
 # api/routes/purchase_order.py
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
-from app.schemas.purchase_order import OrderStatusUpdate, PurchaseOrderOut, PurchaseOrderCreate
-from app.crud.purchase_order import update_order_status, create_purchase_order
+from app.schemas.purchase_order import OrderStatusUpdate, PurchaseOrderOut, PurchaseOrderCreate, GoodsReceipt, GoodsReceiptOut
+from app.crud.purchase_order import update_order_status, create_purchase_order, receive_goods
 from app.dependencies import get_db
 from app.utils.security import get_current_active_user
+from app.utils.idempotency import IdempotentRoute
 
-router = APIRouter(prefix="/orders", tags=["orders"])
+router = APIRouter(prefix="/orders", tags=["orders"], route_class=IdempotentRoute)
 
 @router.patch("/{order_id}/status", response_model=PurchaseOrderOut)
 def change_order_status(
@@ -16,7 +17,7 @@ def change_order_status(
     current_user: dict = Depends(get_current_active_user)
 ):
     try:
-        updated_order = update_order_status(db, order_id, status_update)
+        updated_order = update_order_status(db, order_id, status_update, current_user.user_id)
         if not updated_order:
             raise HTTPException(status_code=404, detail="Order not found")
         
@@ -24,6 +25,25 @@ def change_order_status(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+@router.post("/{order_id}/receipts", response_model=GoodsReceiptOut)
+def post_goods_receipt(
+    order_id: int,
+    receipt: GoodsReceipt,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_active_user)
+):
+    """
+    Recepción de mercadería: cada línea trae el total recibido hasta ahora, así que
+    reenviar la misma recepción no vuelve a sumar stock.
+    """
+    try:
+        result = receive_goods(db, order_id, receipt.items, current_user.user_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if result is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return result
+
 @router.post("/", response_model=PurchaseOrderOut, status_code=status.HTTP_201_CREATED)
 def create_order(
     order_data: PurchaseOrderCreate,
@@ -31,7 +51,7 @@ def create_order(
     current_user: dict = Depends(get_current_active_user),
 ):
     try:
-        new_order = create_purchase_order(db, order_data) # Usamos la nueva función create_purchase_order
+        new_order = create_purchase_order(db, order_data, current_user.user_id) # Usamos la nueva función create_purchase_order
         return new_order
     except Exception as e:
         raise HTTPException(
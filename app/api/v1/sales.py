@@ -1,31 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, BackgroundTasks
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from fastapi.responses import StreamingResponse
+from fastapi.responses import StreamingResponse, JSONResponse
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy.exc import IntegrityError
 from io import BytesIO
 from sqlalchemy.orm import joinedload
-from datetime import datetime
+from datetime import datetime, date
+import json
 
-from app.database import get_db
+from app.database import get_db, get_async_db, SessionLocal
 from app.models.sale import Sale, SaleDetail
 from app.models.product import Product
 from app.models.branch import Branch
-from app.schemas.sale import SaleCreate, SaleOut
-from app.crud.sale import create_sale, get_sales, get_sale
-from app.utils.security import get_current_active_user
-from app.models.user import User
-from app.utils.pdf_generator import generate_invoice_pdf, generate_sales_csv
+from app.models.sales_rollup import SalesDailyBranch, SalesDailyCategory, SalesDailyProduct
+from app.schemas.sale import SaleCreate, SaleOut, SaleSyncItem, SaleSyncOut
+from app.crud.sale import create_sale, sync_sales, SYNC_CREATED, SYNC_DUPLICATE, SYNC_REJECTED, get_sales, get_sale, get_sale_for_invoice, iter_sales_for_export
+from app.crud.sales_rollup import check_rollup_consistency
+from app.utils.security import TokenPrincipal, require_permission, admin_required
+from app.utils.pdf_generator import iter_sales_csv
+from app.utils.invoice_cache import invoice_cache, etag_matches
+from app.utils.jobs import job_manager
+from app.utils.pagination import set_page_headers
+from app.config import settings
+from app.utils.idempotency import IdempotentRoute
+from app.api.v1.jobs import job_response
 
-router = APIRouter(prefix="/sales", tags=["sales"])
+router = APIRouter(prefix="/sales", tags=["sales"], route_class=IdempotentRoute)
 
 @router.post("/", response_model=SaleOut, status_code=status.HTTP_201_CREATED)
 def create_new_sale(
     sale: SaleCreate,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: TokenPrincipal = Depends(require_permission("sales"))
 ):
     try:
-        return create_sale(db=db, sale=sale, user_id=current_user.user_id)
+        db_sale = create_sale(db=db, sale=sale, user_id=current_user.user_id)
+        background_tasks.add_task(warm_invoice_cache, db_sale.sale_id)
+        return db_sale
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -37,29 +53,108 @@ def create_new_sale(
             detail=f"Error al crear la venta: {str(e)}"
         )
 
+def _parse_sync_batch(body: bytes) -> list:
+    """Lote como arreglo JSON o NDJSON (una venta por línea): lista de dicts o mensajes de error"""
+    text = body.decode("utf-8-sig").strip()
+    if text.startswith("["):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"JSON inválido: {e.msg}")
+    raw = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            raw.append(json.loads(line))
+        except json.JSONDecodeError as e:
+            raw.append(f"JSON inválido: {e.msg}")
+    return raw
+
+@router.post("/batch", response_model=SaleSyncOut)
+async def sync_sales_batch(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: TokenPrincipal = Depends(require_permission("sales"))
+):
+    """
+    Sincroniza las ventas que las cajas guardaron sin conexión (arreglo JSON o
+    NDJSON, en el orden en que se vendieron), cada una con su client_uuid. Devuelve
+    un resultado por venta: CREATED, DUPLICATE (el UUID ya estaba registrado:
+    reenviar el lote es seguro) o REJECTED con el motivo.
+    """
+    raw = _parse_sync_batch(await request.body())
+    if not isinstance(raw, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Se esperaba una lista de ventas")
+    if len(raw) > settings.SALES_SYNC_MAX_BATCH:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Máximo {settings.SALES_SYNC_MAX_BATCH} ventas por lote"
+        )
+
+    results = []
+    valid, positions = [], []
+    for index, entry in enumerate(raw):
+        client_uuid = entry.get("client_uuid") if isinstance(entry, dict) else None
+        result = {"index": index, "client_uuid": None if client_uuid is None else str(client_uuid)}
+        try:
+            if isinstance(entry, str):
+                raise ValueError(entry)
+            valid.append(SaleSyncItem.model_validate(entry))
+            positions.append(index)
+        except ValidationError as e:
+            error = e.errors()[0]
+            location = ".".join(str(part) for part in error["loc"])
+            result.update(status=SYNC_REJECTED, error=f"{location}: {error['msg']}")
+        except ValueError as e:
+            result.update(status=SYNC_REJECTED, error=str(e))
+        results.append(result)
+
+    try:
+        synced = await run_in_threadpool(sync_sales, db, valid, current_user.user_id) if valid else []
+    except IntegrityError:
+        # Otra sincronización registró los mismos UUIDs al mismo tiempo: el reintento los marca DUPLICATE
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="El lote se sincronizó en paralelo, reintente")
+    for index, outcome in zip(positions, synced):
+        results[index].update(outcome)
+
+    counts = {value: 0 for value in (SYNC_CREATED, SYNC_DUPLICATE, SYNC_REJECTED)}
+    for result in results:
+        counts[result["status"]] += 1
+    return {
+        "created": counts[SYNC_CREATED],
+        "duplicates": counts[SYNC_DUPLICATE],
+        "rejected": counts[SYNC_REJECTED],
+        "results": results
+    }
+
 @router.get("/", response_model=List[SaleOut])
 def read_sales(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
     branch_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: TokenPrincipal = Depends(require_permission("sales"))
 ):
-    query = db.query(Sale)
-    
-    if status:
-        query = query.filter(Sale.status == status)
-    if branch_id:
-        query = query.filter(Sale.branch_id == branch_id)
-        
-    return query.offset(skip).limit(limit).all()
+    """Ventas de la más reciente a la más antigua (siguiente página en X-Next-Cursor)"""
+    try:
+        page = get_sales(db, skip=skip, limit=limit, status=status, branch_id=branch_id,
+                         cursor=cursor, with_total=include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
 
-@router.get("/{sale_id}", response_model=SaleOut)
+@router.get("/{sale_id:int}", response_model=SaleOut)
 def read_sale(
     sale_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: TokenPrincipal = Depends(require_permission("sales"))
 ):
     sale = get_sale(db, sale_id=sale_id)
     if not sale:
@@ -72,13 +167,13 @@ def read_sale(
 # Añade estas rutas al router de sales (/sales)
 
 @router.get("/report/by-date", response_model=List[dict])
-def get_sales_by_date(
+async def get_sales_by_date(
     date_range: str = "week",  # week, month, year
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("reports"))
 ):
     """Obtiene ventas agrupadas por fecha"""
-    from sqlalchemy import func, Date, cast
+    from sqlalchemy import func
     from datetime import datetime, timedelta
     
     # Calcular fecha de inicio según el rango
@@ -92,34 +187,46 @@ def get_sales_by_date(
     else:
         start_date = today - timedelta(days=7)
     
-    # Consulta para agrupar ventas por fecha
-    sales_by_date = db.query(
-        cast(Sale.sale_date, Date).label("date"),
-        func.sum(Sale.total).label("total")
-    ).filter(
-        Sale.sale_date >= start_date
+    # Consulta sobre el resumen diario por sucursal
+    sales_by_date = (await db.execute(select(
+        SalesDailyBranch.day.label("date"),
+        func.sum(SalesDailyBranch.total).label("total")
+    ).where(
+        SalesDailyBranch.day >= start_date
     ).group_by(
-        cast(Sale.sale_date, Date)
+        SalesDailyBranch.day
     ).order_by(
-        cast(Sale.sale_date, Date)
-    ).all()
+        SalesDailyBranch.day
+    ))).all()
     
     return [{"date": str(date), "total": float(total)} for date, total in sales_by_date]
 
 @router.get("/{sale_id}/invoice")
 def generate_invoice(
     sale_id: int,
+    request: Request,
+    background: bool = False,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: TokenPrincipal = Depends(require_permission("sales"))
 ):
+    if background:
+        # Generar la factura en el pool de trabajos y devolver el ID del trabajo
+        if not db.query(Sale.sale_id).filter(Sale.sale_id == sale_id).first():
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Venta no encontrada"
+            )
+        job = job_manager.submit(
+            "invoice",
+            {"sale_id": sale_id},
+            filename=f"factura_{sale_id}.pdf",
+            media_type="application/pdf",
+            user_id=current_user.user_id
+        )
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=job_response(job))
+
     # Obtener la venta con todas las relaciones necesarias
-    sale = db.query(Sale).options(
-        joinedload(Sale.client),
-        joinedload(Sale.branch),
-        joinedload(Sale.user),
-        joinedload(Sale.payment_method),
-        joinedload(Sale.details).joinedload(SaleDetail.product)
-    ).filter(Sale.sale_id == sale_id).first()
+    sale = get_sale_for_invoice(db, sale_id)
     
     if not sale:
         raise HTTPException(
@@ -127,21 +234,59 @@ def generate_invoice(
             detail="Venta no encontrada"
         )
     
-    # Generar el PDF
-    pdf_content = generate_invoice_pdf(sale)
+    # La ETag identifica el contenido de la factura: si el cliente ya la tiene, 304
+    key = invoice_cache.key_for(sale)
+    etag = f'"{key}"'
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    # Obtener el PDF del cache o generarlo
+    pdf_content = invoice_cache.get_or_render(sale, key)
     
     # Configurar la respuesta
     headers = {
-        'Content-Disposition': f'attachment; filename="factura_{sale.invoice_number}.pdf"'
+        'Content-Disposition': f'attachment; filename="factura_{sale.invoice_number}.pdf"',
+        'ETag': etag,
+        'Cache-Control': 'private, no-cache'
     }
-    return StreamingResponse(
-        BytesIO(pdf_content),
+    return Response(
+        content=pdf_content,
         media_type='application/pdf',
         headers=headers
     )
 
-from app.utils.pdf_generator import generate_sales_report_pdf
-from fastapi import Response
+@router.get("/invoice-cache/stats", response_model=dict)
+def get_invoice_cache_stats(current_user: TokenPrincipal = Depends(admin_required)):
+    """Métricas del cache de facturas: aciertos y tiempo de render ahorrado"""
+    return invoice_cache.stats()
+
+def warm_invoice_cache(sale_id: int):
+    """Genera la factura en segundo plano para que la primera impresión salga del cache"""
+    db = SessionLocal()
+    try:
+        sale = get_sale_for_invoice(db, sale_id)
+        if sale:
+            invoice_cache.get_or_render(sale)
+    finally:
+        db.close()
+
+from app.utils.pdf_generator import iter_sales_report_pdf
+
+def _stream_sales_csv(**filters):
+    """Genera el CSV con su propia sesión: el stream sigue después de cerrar la del request"""
+    db = SessionLocal()
+    try:
+        for chunk in iter_sales_csv(iter_sales_for_export(db, **filters)):
+            yield chunk.encode('utf-8')
+    finally:
+        db.close()
+
+def _stream_sales_pdf(**filters):
+    db = SessionLocal()
+    try:
+        yield from iter_sales_report_pdf(iter_sales_for_export(db, include_details=False, **filters))
+    finally:
+        db.close()
 
 @router.get("/export/{format}")
 def export_sales(
@@ -151,54 +296,70 @@ def export_sales(
     branch_id: Optional[int] = None,
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
-    current_user: User = Depends(get_current_active_user)
+    background: Optional[bool] = None,
+    current_user: TokenPrincipal = Depends(require_permission("reports"))
 ):
-    try:
-        # Obtener las ventas filtradas con todos los detalles necesarios
-        query = db.query(Sale).options(
-            joinedload(Sale.client),
-            joinedload(Sale.branch),
-            joinedload(Sale.payment_method),
-            joinedload(Sale.details).joinedload(SaleDetail.product)
+    if format not in ('pdf', 'csv'):
+        raise HTTPException(
+            status_code=400,
+            detail="Formato no soportado. Use 'pdf' o 'csv'"
         )
-        
-        if status:
-            query = query.filter(Sale.status == status)
-        if branch_id:
-            query = query.filter(Sale.branch_id == branch_id)
-        if start_date:
-            query = query.filter(Sale.sale_date >= start_date)
-        if end_date:
-            query = query.filter(Sale.sale_date <= end_date)
-        
-        sales = query.order_by(Sale.sale_date.desc()).all()
-        
-        if format == 'pdf':
-            pdf_content = generate_sales_report_pdf(sales)
-            headers = {
-                'Content-Disposition': f'attachment; filename="reporte_ventas_{datetime.now().strftime("%Y%m%d")}.pdf"'
-            }
-            return StreamingResponse(
-                BytesIO(pdf_content),
-                media_type='application/pdf',
-                headers=headers
-            )
-        elif format == 'csv':
-            # Implementar generación de CSV
-            csv_content = generate_sales_csv(sales)
+
+    # El PDF se genera por defecto en el pool de trabajos (background=false lo entrega en la respuesta);
+    # el CSV se transmite por bloques mientras se genera
+    if background is None:
+        background = format == 'pdf'
+
+    if background:
+        # Generar el reporte en el pool de trabajos y devolver el ID del trabajo
+        job = job_manager.submit(
+            "sales_export",
+            {
+                "format": format,
+                "filters": {
+                    "status": status,
+                    "branch_id": branch_id,
+                    "start_date": start_date,
+                    "end_date": end_date
+                }
+            },
+            filename=f"reporte_ventas_{datetime.now().strftime('%Y%m%d')}.{format}",
+            media_type='application/pdf' if format == 'pdf' else 'text/csv',
+            user_id=current_user.user_id
+        )
+        return JSONResponse(status_code=202, content=job_response(job))
+
+    try:
+        if format == 'csv':
+            # El CSV se genera por bloques mientras se envía, con memoria constante
             headers = {
                 'Content-Disposition': f'attachment; filename="reporte_ventas_{datetime.now().strftime("%Y%m%d")}.csv"'
             }
             return StreamingResponse(
-                BytesIO(csv_content.encode('utf-8')),
+                _stream_sales_csv(
+                    status=status,
+                    branch_id=branch_id,
+                    start_date=start_date,
+                    end_date=end_date
+                ),
                 media_type='text/csv',
                 headers=headers
             )
-        else:
-            raise HTTPException(
-                status_code=400,
-                detail="Formato no soportado. Use 'pdf' o 'csv'"
-            )
+
+        # El PDF se pagina a medida que se leen las ventas y se entrega desde un archivo temporal
+        headers = {
+            'Content-Disposition': f'attachment; filename="reporte_ventas_{datetime.now().strftime("%Y%m%d")}.pdf"'
+        }
+        return StreamingResponse(
+            _stream_sales_pdf(
+                status=status,
+                branch_id=branch_id,
+                start_date=start_date,
+                end_date=end_date
+            ),
+            media_type='application/pdf',
+            headers=headers
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -208,57 +369,53 @@ def export_sales(
 # Añade estas rutas a tu sales.py
 
 @router.get("/report", response_model=dict)
-def get_sales_report(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+async def get_sales_report(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("reports"))
 ):
     """Obtiene un reporte completo de ventas para el dashboard"""
     try:
         from sqlalchemy import func, desc
         
-        # Total de ventas
-        total_sales = db.query(func.sum(Sale.total)).scalar() or 0
-        
-        # Cantidad de ventas
-        sales_count = db.query(Sale).count()
+        # Total y cantidad de ventas
+        total_sales, sales_count = (await db.execute(select(
+            func.coalesce(func.sum(SalesDailyBranch.total), 0),
+            func.coalesce(func.sum(SalesDailyBranch.sales_count), 0)
+        ))).one()
         
         # Promedio de ventas
         average_sale = total_sales / sales_count if sales_count > 0 else 0
         
         # Ventas por fecha (últimos 7 días)
-        sales_by_date = db.query(
-            func.date(Sale.sale_date).label("date"),
-            func.sum(Sale.total).label("total")
+        sales_by_date = (await db.execute(select(
+            SalesDailyBranch.day.label("date"),
+            func.sum(SalesDailyBranch.total).label("total")
         ).group_by(
-            func.date(Sale.sale_date)
+            SalesDailyBranch.day
         ).order_by(
-            func.date(Sale.sale_date).desc()
-        ).limit(7).all()
+            SalesDailyBranch.day.desc()
+        ).limit(7))).all()
         
         # Ventas por categoría
-        sales_by_category = db.query(
-            Product.category_id,
-            func.sum(SaleDetail.quantity).label("quantity"),
-            func.sum(SaleDetail.total_line).label("total")
-        ).join(
-            SaleDetail, SaleDetail.product_id == Product.product_id
-        ).join(
-            Sale, Sale.sale_id == SaleDetail.sale_id
+        sales_by_category = (await db.execute(select(
+            SalesDailyCategory.category_id,
+            func.sum(SalesDailyCategory.quantity).label("quantity"),
+            func.sum(SalesDailyCategory.total).label("total")
         ).group_by(
-            Product.category_id
-        ).all()
+            SalesDailyCategory.category_id
+        ))).all()
         
         # Ventas por sucursal
-        sales_by_branch = db.query(
+        sales_by_branch = (await db.execute(select(
             Branch.branch_id,
             Branch.name.label("branch_name"),
-            func.sum(Sale.total).label("total")
+            func.sum(SalesDailyBranch.total).label("total")
         ).join(
-            Sale, Sale.branch_id == Branch.branch_id
+            SalesDailyBranch, SalesDailyBranch.branch_id == Branch.branch_id
         ).group_by(
             Branch.branch_id,
             Branch.name
-        ).all()
+        ))).all()
         
         return {
             "totalSales": float(total_sales),
@@ -269,8 +426,8 @@ def get_sales_report(
                 "total": float(total) if total else 0
             } for date, total in sales_by_date],
             "salesByCategory": [{
-                "category_id": c.category_id,
-                "category": "Categoría " + str(c.category_id),
+                "category_id": c.category_id or None,
+                "category": "Categoría " + str(c.category_id or None),
                 "total": float(c.total) if c.total else 0
             } for c in sales_by_category],
             "salesByBranch": [{
@@ -283,16 +440,18 @@ def get_sales_report(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/summary", response_model=dict)
-def get_sales_summary(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+async def get_sales_summary(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("reports"))
 ):
     """Obtiene un resumen de ventas"""
     try:
         from sqlalchemy import func
         
-        total_sales = db.query(func.sum(Sale.total)).scalar() or 0
-        sales_count = db.query(Sale).count()
+        total_sales, sales_count = (await db.execute(select(
+            func.coalesce(func.sum(SalesDailyBranch.total), 0),
+            func.coalesce(func.sum(SalesDailyBranch.sales_count), 0)
+        ))).one()
         average_sale = total_sales / sales_count if sales_count > 0 else 0
         
         return {
@@ -304,11 +463,11 @@ def get_sales_summary(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/top-products", response_model=List[dict])
-def get_top_products(
+async def get_top_products(
     limit: int = 5,
     order: str = 'desc',
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("reports"))
 ):
     """Obtiene los productos más o menos vendidos"""
     try:
@@ -316,21 +475,19 @@ def get_top_products(
         
         order_func = desc if order == 'desc' else asc
         
-        products = db.query(
+        products = (await db.execute(select(
             Product.product_id,
             Product.name,
-            func.sum(SaleDetail.quantity).label("total_sold"),
-            func.sum(SaleDetail.total_line).label("total_revenue")
+            func.sum(SalesDailyProduct.quantity).label("total_sold"),
+            func.sum(SalesDailyProduct.total).label("total_revenue")
         ).join(
-            SaleDetail, SaleDetail.product_id == Product.product_id
-        ).join(
-            Sale, Sale.sale_id == SaleDetail.sale_id
+            SalesDailyProduct, SalesDailyProduct.product_id == Product.product_id
         ).group_by(
             Product.product_id,
             Product.name
         ).order_by(
             order_func("total_sold")
-        ).limit(limit).all()
+        ).limit(limit))).all()
         
         return [{
             "product_id": p.product_id,
@@ -342,30 +499,30 @@ def get_top_products(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/by-branch", response_model=List[dict])
-def get_sales_by_branch(
+async def get_sales_by_branch(
     branch_id: Optional[int] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: TokenPrincipal = Depends(require_permission("reports"))
 ):
     """Obtiene ventas por sucursal"""
     try:
         from sqlalchemy import func
-        query = db.query(
+        query = select(
             Branch.branch_id,
             Branch.name.label("branch_name"),
-            func.sum(Sale.total).label("total_sales"),
-            func.count(Sale.sale_id).label("sales_count")
+            func.sum(SalesDailyBranch.total).label("total_sales"),
+            func.sum(SalesDailyBranch.sales_count).label("sales_count")
         ).join(
-            Sale, Sale.branch_id == Branch.branch_id
+            SalesDailyBranch, SalesDailyBranch.branch_id == Branch.branch_id
         ).group_by(
             Branch.branch_id,
             Branch.name
         )
         
         if branch_id:
-            query = query.filter(Branch.branch_id == branch_id)
+            query = query.where(Branch.branch_id == branch_id)
             
-        results = query.all()
+        results = (await db.execute(query)).all()
         
         return [{
             "branch_id": r.branch_id,
@@ -374,4 +531,18 @@ def get_sales_by_branch(
             "sales_count": r.sales_count
         } for r in results]
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/report/consistency", response_model=dict)
+def get_sales_report_consistency(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: TokenPrincipal = Depends(admin_required)
+):
+    """Verifica que los resúmenes de ventas cuadren con las ventas registradas"""
+    mismatches = check_rollup_consistency(db, start_date=start_date, end_date=end_date)
+    return {
+        "consistent": not mismatches,
+        "mismatches": mismatches
+    }
@@ -1,15 +1,20 @@
 # api/routes/supplier.py
-from fastapi import APIRouter, Depends, HTTPException
-from typing import List
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import JSONResponse
+from typing import List, Optional
 from sqlalchemy.orm import Session
 from app.schemas.supplier import SupplierCreate, SupplierOut, SupplierProductOut
-from app.schemas.purchase_order import PurchaseOrderCreate, PurchaseOrderOut
+from app.schemas.purchase_order import PurchaseOrderCreate, PurchaseOrderOut, ReorderDraft
 from app.crud.supplier import create_supplier, get_suppliers, get_supplier, update_supplier as update_supplier_db, delete_supplier as delete_supplier_db, approve_purchase_order
 from app.crud.purchase_order import create_purchase_order
 from app.dependencies import get_db
 from app.utils.security import get_current_active_user
+from app.utils.pagination import set_page_headers
+from app.utils.idempotency import IdempotentRoute
+from app.utils.reorder import get_reorder_suggestions
 
-router = APIRouter(prefix="/suppliers", tags=["suppliers"])
+router = APIRouter(prefix="/suppliers", tags=["suppliers"], route_class=IdempotentRoute)
 
 @router.post("/", response_model=SupplierOut)
 def create_supplier_route(supplier: SupplierCreate, db: Session = Depends(get_db)):
@@ -17,8 +22,25 @@ def create_supplier_route(supplier: SupplierCreate, db: Session = Depends(get_db
     return create_supplier(db=db, supplier_data=supplier)
 
 @router.get("/", response_model=list[SupplierOut])
-def read_suppliers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return get_suppliers(db, skip=skip, limit=limit)
+def read_suppliers(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None,
+                   include_total: bool = False, db: Session = Depends(get_db)):
+    try:
+        page = get_suppliers(db, skip=skip, limit=limit, cursor=cursor, with_total=include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
+
+@router.get("/reorder-suggestions", response_model=List[ReorderDraft])
+def read_reorder_suggestions(
+    branch_id: Optional[int] = None,
+    supplier_id: Optional[int] = None,
+    as_of: Optional[date] = None,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_active_user)
+):
+    """Borradores de órdenes de compra por proveedor y sucursal según la velocidad de venta"""
+    return JSONResponse(get_reorder_suggestions(db, branch_id=branch_id, supplier_id=supplier_id, as_of=as_of))
 
 @router.get("/{supplier_id}", response_model=SupplierOut)
 def read_supplier(supplier_id: int, db: Session = Depends(get_db)):
@@ -60,4 +82,4 @@ def approve_order(order_id: int, db: Session = Depends(get_db)):
     db_order = approve_purchase_order(db, order_id)
     if not db_order:
         raise HTTPException(status_code=404, detail="Order not found")
-    return {"message": "Order approved and inventory updated"}
\ No newline at end of file
+    return {"message": "Order approved"}
\ No newline at end of file
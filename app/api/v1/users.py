@@ -1,7 +1,7 @@
 # routers/user.py
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app.database import get_db
 from app.models.user import User
@@ -12,21 +12,30 @@ from app.crud.user import (
     get_user_by_username,
     get_users,
     update_user as update_user_ac,
-    delete_user
+    delete_user as delete_user_ac
 )
 from app.utils.security import get_current_active_user, admin_required
+from app.utils.pagination import set_page_headers
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.get("/", response_model=List[UserOut])
 def read_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    include_total: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(admin_required)
 ):
-    """Obtiene lista de usuarios"""
-    return get_users(db, skip=skip, limit=limit)
+    """Obtiene lista de usuarios (siguiente página en la cabecera X-Next-Cursor)"""
+    try:
+        page = get_users(db, skip=skip, limit=limit, cursor=cursor, with_total=include_total)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_page_headers(response, page)
+    return page.items
 
 @router.post("/", response_model=UserOut, status_code=status.HTTP_201_CREATED)
 def create_new_user(
@@ -71,8 +80,7 @@ def delete_user(
     db_user = get_user(db, user_id=user_id)
     if db_user is None:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
-    db.delete(db_user)
-    db.commit()
+    delete_user_ac(db, user_id=user_id)
     return {"ok": True}
 
 @router.get("/me", response_model=UserOut)
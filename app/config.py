@@ -1,12 +1,50 @@
+from typing import Dict
 from pydantic_settings import BaseSettings
 from pydantic import PostgresDsn
 
 class Settings(BaseSettings):
     DATABASE_URL: PostgresDsn
+    TEST_DATABASE_URL: str = "sqlite:///./test.db"  # Base de datos de la suite de pruebas
     SECRET_KEY: str
     ALGORITHM: str = "HS256"  # ✅ Agregado
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30  # ✅ Agregado
     API_V1_STR: str = "/api/v1"
+    DEBUG: bool = False
+    ASYNC_DB_POOL_SIZE: int = 20  # Conexiones asyncpg de los endpoints asíncronos
+    ASYNC_DB_MAX_OVERFLOW: int = 10
+    BCRYPT_ROUNDS: int = 12  # Factor de costo de bcrypt
+    BCRYPT_WORKERS: int = 2  # Procesos dedicados al hashing (0 = en el mismo hilo)
+    BCRYPT_MAX_QUEUE: int = 16  # Operaciones en curso antes de responder 503
+    BCRYPT_TIMEOUT_SECONDS: int = 10
+    INVOICE_BLOCK_SIZE: int = 100  # Números de factura reservados por viaje a la base de datos
+    INVOICE_CACHE_BACKEND: str = "disk"  # "disk" o "memory"
+    INVOICE_CACHE_DIR: str = ""  # Vacío = directorio temporal del sistema
+    INVOICE_CACHE_MAX_MB: int = 256
+    JOBS_BACKEND: str = "process"  # "process" o "broker" (requiere scripts/job_worker.py)
+    JOBS_DIR: str = ""  # Vacío = directorio temporal del sistema
+    JOBS_MAX_WORKERS: int = 2
+    JOBS_CONCURRENCY: Dict[str, int] = {"sales_export": 1, "invoice": 2}
+    INVENTORY_SNAPSHOT_LAG_SECONDS: int = 300  # Las fotos de inventario se toman hasta hace este tiempo
+    INVENTORY_PARTITIONS_AHEAD: int = 3  # Meses de particiones de inventory_movements creados por adelantado
+    PRODUCT_IMPORT_BATCH_SIZE: int = 5000  # Filas validadas por COPY / lote
+    PRODUCT_IMPORT_MAX_ERRORS: int = 1000  # Errores por fila incluidos en el reporte
+    LOW_STOCK_STREAM_INTERVAL_SECONDS: float = 5  # Cada cuánto el stream SSE revisa la lista de stock bajo
+    INVENTORY_STREAM_CHUNK_SIZE: int = 1000  # Filas por viaje al cursor en los streams de inventario
+    REORDER_LOOKBACK_DAYS: int = 28  # Días de ventas usados para la velocidad de cada producto
+    REORDER_REVIEW_DAYS: int = 7  # Días de venta que cubre cada pedido además del plazo de entrega
+    REORDER_SERVICE_Z: float = 1.65  # Stock de seguridad en desvíos de la demanda diaria (1.65 ≈ 95%)
+    REORDER_DEFAULT_LEAD_TIME_DAYS: int = 7  # Para ofertas sin lead_time_days
+    SALES_SYNC_MAX_BATCH: int = 1000  # Ventas por llamada a POST /sales/batch
+    IDEMPOTENCY_TTL_SECONDS: int = 86400  # Tiempo que se guarda la respuesta de cada Idempotency-Key
+    IDEMPOTENCY_ERROR_TTL_SECONDS: int = 60  # Respuestas 4xx: dependen del stock / estado del momento
+    IDEMPOTENCY_LEASE_SECONDS: int = 300  # Tras este tiempo una petición en curso se da por abandonada
+    IDEMPOTENCY_POLL_SECONDS: float = 0.2  # Cada cuánto un duplicado concurrente revisa si terminó la primera
+    BARCODE_INDEX_REFRESH_SECONDS: float = 5  # Cada cuánto cada worker lee los productos modificados por otros
+    BARCODE_INDEX_REFRESH_OVERLAP_SECONDS: int = 60  # Margen hacia atrás de esa lectura (transacciones largas)
+    PRINCIPAL_CACHE_ENABLED: bool = True
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_MAX_SIZE: int = 1024
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 30
 
     class Config:
         env_file = ".env"
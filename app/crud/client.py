@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from app.models.client import Client
 from app.schemas.client import ClientCreate
+from app.utils.pagination import Page, paginate
 
 def create_client(db: Session, client: ClientCreate) -> Client:
     db_client = Client(**client.model_dump())
@@ -21,8 +22,8 @@ def search_clients(db: Session, search_term: str, limit: int = 20) -> list[Clien
 def get_client(db: Session, client_id: int) -> Client | None:
     return db.query(Client).filter(Client.client_id == client_id).first()
 
-def get_clients(db: Session, skip: int = 0, limit: int = 100) -> list[Client]:
-    return db.query(Client).offset(skip).limit(limit).all()
+def get_clients(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, with_total: bool = False) -> Page:
+    return paginate(db.query(Client), [Client.client_id], limit, cursor=cursor, skip=skip, with_total=with_total)
 
 def update_client(db: Session, client_id: int, updated_data: ClientCreate) -> Client | None:
     client = db.query(Client).filter(Client.client_id == client_id).first()
@@ -0,0 +1,41 @@
+# crud/inventory.py
+from typing import Iterator, Optional
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.inventory import Inventory
+from app.utils.pagination import Page, paginate
+
+# Orden estable para cursores y streams; lo cubre ix_inventory_branch_product
+INVENTORY_ORDER = [Inventory.branch_id, Inventory.product_id]
+
+def _filters(branch_id: Optional[int], product_id: Optional[int]) -> list:
+    filters = []
+    if branch_id is not None:
+        filters.append(Inventory.branch_id == branch_id)
+    if product_id is not None:
+        filters.append(Inventory.product_id == product_id)
+    return filters
+
+def get_inventory_page(db: Session, branch_id: Optional[int] = None, product_id: Optional[int] = None,
+                       limit: int = 100, cursor: Optional[str] = None, with_total: bool = False) -> Page:
+    """Inventario paginado por (branch_id, product_id)"""
+    query = db.query(Inventory).filter(*_filters(branch_id, product_id))
+    return paginate(query, INVENTORY_ORDER, limit, cursor=cursor, with_total=with_total)
+
+def iter_inventory_rows(db: Session, branch_id: Optional[int] = None, product_id: Optional[int] = None,
+                        chunk_size: Optional[int] = None) -> Iterator[list]:
+    """
+    Bloques de filas de inventario (tuplas, sin objetos ORM) leídos con yield_per:
+    en Postgres es un cursor del servidor, así que la memoria no depende del tamaño
+    de la sucursal. Cada bloque tiene hasta `chunk_size` filas (INVENTORY_STREAM_CHUNK_SIZE).
+    """
+    statement = select(
+        Inventory.inventory_id, Inventory.product_id, Inventory.branch_id,
+        Inventory.quantity, Inventory.last_updated
+    ).where(*_filters(branch_id, product_id)).order_by(*INVENTORY_ORDER)
+    result = db.execute(statement.execution_options(yield_per=chunk_size or settings.INVENTORY_STREAM_CHUNK_SIZE))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
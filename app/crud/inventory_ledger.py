@@ -0,0 +1,192 @@
+# crud/inventory_ledger.py
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import func, select, insert, literal, union_all, text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.models.branch import Branch
+from app.models.inventory import Inventory
+from app.models.inventory_movement import InventoryMovement, InventorySnapshot
+
+# --- Particiones mensuales (solo Postgres) ---
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def _next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def movement_partition_name(month: date) -> str:
+    return f"inventory_movements_y{month:%Y}m{month:%m}"
+
+def ensure_movement_partitions(db: Session, months_ahead: Optional[int] = None) -> List[str]:
+    """
+    Crea las particiones de inventory_movements del mes actual y los siguientes
+    `months_ahead` (INVENTORY_PARTITIONS_AHEAD). Devuelve las que se crearon.
+    Hay que correrla antes de que empiece cada mes: si no, las filas caen en la
+    partición DEFAULT y la partición de ese mes ya no se puede crear.
+    """
+    if db.get_bind().dialect.name != "postgresql":
+        return []
+    if months_ahead is None:
+        months_ahead = settings.INVENTORY_PARTITIONS_AHEAD
+    existing = set(db.execute(text("""
+        SELECT child.relname FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = 'inventory_movements'
+    """)).scalars())
+
+    created = []
+    month = _month_start(datetime.utcnow().date())
+    for _ in range(months_ahead + 1):
+        name = movement_partition_name(month)
+        if name not in existing:
+            db.execute(text(
+                f"CREATE TABLE {name} PARTITION OF inventory_movements "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            ))
+            created.append(name)
+        month = _next_month(month)
+    db.commit()
+    return created
+
+# --- Fotos (snapshots) por sucursal ---
+
+def latest_snapshot_time(db: Session, branch_id: int, at: Optional[datetime] = None) -> Optional[datetime]:
+    query = select(func.max(InventorySnapshot.taken_at)).where(InventorySnapshot.branch_id == branch_id)
+    if at is not None:
+        query = query.where(InventorySnapshot.taken_at <= at)
+    return db.scalar(query)
+
+def _stock_sources(branch_id: int, snapshot_at: datetime, until: datetime,
+                   product_ids: Optional[Iterable[int]] = None):
+    """Foto de `snapshot_at` más los movimientos posteriores hasta `until`, como filas (product_id, quantity)"""
+    snapshot = select(InventorySnapshot.product_id, InventorySnapshot.quantity.label("quantity")).where(
+        InventorySnapshot.branch_id == branch_id,
+        InventorySnapshot.taken_at == snapshot_at
+    )
+    # El rango de created_at permite descartar las particiones de otros meses
+    movements = select(InventoryMovement.product_id, InventoryMovement.quantity_delta.label("quantity")).where(
+        InventoryMovement.branch_id == branch_id,
+        InventoryMovement.created_at > snapshot_at,
+        InventoryMovement.created_at <= until
+    )
+    if product_ids is not None:
+        product_ids = list(product_ids)
+        snapshot = snapshot.where(InventorySnapshot.product_id.in_(product_ids))
+        movements = movements.where(InventoryMovement.product_id.in_(product_ids))
+    return union_all(snapshot, movements).subquery()
+
+def _bootstrap_snapshot(db: Session, branch_id: int, taken_at: datetime) -> int:
+    # Primera foto de la sucursal: el stock actual menos los movimientos posteriores a
+    # taken_at. Las filas quedan bloqueadas hasta el commit, así no hay movimientos
+    # de transacciones en curso que falten en la resta.
+    current = dict(
+        db.query(Inventory.product_id, Inventory.quantity)
+        .filter(Inventory.branch_id == branch_id)
+        .order_by(Inventory.product_id)
+        .with_for_update(read=True).all()
+    )
+    later = dict(
+        db.query(InventoryMovement.product_id, func.sum(InventoryMovement.quantity_delta))
+        .filter(InventoryMovement.branch_id == branch_id, InventoryMovement.created_at > taken_at)
+        .group_by(InventoryMovement.product_id).all()
+    )
+    rows = [
+        {"branch_id": branch_id, "product_id": product_id, "taken_at": taken_at,
+         "quantity": Decimal(current.get(product_id) or 0) - Decimal(later.get(product_id) or 0)}
+        for product_id in sorted(set(current) | set(later))
+    ]
+    if rows:
+        db.execute(insert(InventorySnapshot), rows)
+    else:
+        # Sucursal sin inventario: una fila en cero marca el inicio del historial
+        db.execute(insert(InventorySnapshot), [
+            {"branch_id": branch_id, "product_id": 0, "quantity": 0, "taken_at": taken_at}
+        ])
+    return len(rows)
+
+def compact_inventory_snapshots(db: Session, branch_ids: Optional[Iterable[int]] = None,
+                                taken_at: Optional[datetime] = None) -> Dict[int, int]:
+    """
+    Nueva foto por sucursal = foto anterior + movimientos desde entonces, en un
+    INSERT ... SELECT por sucursal. Por defecto se toma hasta hace
+    INVENTORY_SNAPSHOT_LAG_SECONDS, para no dejar afuera transacciones que todavía
+    no hicieron commit. Devuelve {branch_id: filas de la foto}.
+    """
+    if taken_at is None:
+        taken_at = datetime.utcnow() - timedelta(seconds=settings.INVENTORY_SNAPSHOT_LAG_SECONDS)
+    if branch_ids is None:
+        branch_ids = db.scalars(select(Branch.branch_id).order_by(Branch.branch_id)).all()
+
+    result = {}
+    for branch_id in branch_ids:
+        previous = latest_snapshot_time(db, branch_id)
+        if previous is None:
+            result[branch_id] = _bootstrap_snapshot(db, branch_id, taken_at)
+        elif previous < taken_at:
+            sources = _stock_sources(branch_id, previous, taken_at)
+            quantity = func.sum(sources.c.quantity)
+            rows = db.execute(
+                insert(InventorySnapshot).from_select(
+                    ["branch_id", "product_id", "quantity", "taken_at"],
+                    select(literal(branch_id), sources.c.product_id, quantity, literal(taken_at))
+                    .where(sources.c.product_id != 0)
+                    .group_by(sources.c.product_id)
+                    .having(quantity != 0)
+                )
+            ).rowcount
+            if not rows:
+                db.execute(insert(InventorySnapshot), [
+                    {"branch_id": branch_id, "product_id": 0, "quantity": 0, "taken_at": taken_at}
+                ])
+            result[branch_id] = rows
+        db.commit()
+    return result
+
+# --- Consultas ---
+
+def get_stock_as_of(db: Session, branch_id: int, at: datetime,
+                    product_ids: Optional[Iterable[int]] = None) -> Dict[int, Decimal]:
+    """
+    Stock de la sucursal en el instante `at`: foto más cercana anterior más los
+    movimientos entre la foto y `at` (sin recorrer el historial completo).
+    """
+    snapshot_at = latest_snapshot_time(db, branch_id, at)
+    if snapshot_at is None:
+        raise ValueError("No hay historial de inventario de la sucursal para esa fecha")
+    sources = _stock_sources(branch_id, snapshot_at, at, product_ids)
+    rows = db.execute(
+        select(sources.c.product_id, func.sum(sources.c.quantity))
+        .where(sources.c.product_id != 0)
+        .group_by(sources.c.product_id)
+    ).all()
+    stock = {product_id: Decimal(quantity) for product_id, quantity in rows}
+    for product_id in product_ids or []:
+        stock.setdefault(product_id, Decimal("0"))
+    return stock
+
+def check_inventory_drift(db: Session, branch_ids: Optional[Iterable[int]] = None) -> List[dict]:
+    """Diferencias entre Inventory.quantity y el stock que resulta del libro (fotos + movimientos)"""
+    if branch_ids is None:
+        branch_ids = db.scalars(select(Branch.branch_id).order_by(Branch.branch_id)).all()
+    now = datetime.utcnow()
+    mismatches = []
+    for branch_id in branch_ids:
+        if latest_snapshot_time(db, branch_id) is None:
+            continue
+        ledger = get_stock_as_of(db, branch_id, now)
+        current = dict(
+            db.query(Inventory.product_id, Inventory.quantity).filter(Inventory.branch_id == branch_id).all()
+        )
+        for product_id in sorted(set(ledger) | set(current)):
+            expected = Decimal(current.get(product_id) or 0)
+            actual = ledger.get(product_id, Decimal("0"))
+            if expected != actual:
+                mismatches.append({
+                    "branch_id": branch_id, "product_id": product_id,
+                    "inventory": expected, "ledger": actual
+                })
+    return mismatches
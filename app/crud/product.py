@@ -1,7 +1,15 @@
+from typing import Dict, Optional
+from sqlalchemy import Float, JSON, and_, cast, func, literal_column, select, type_coerce
+from sqlalchemy.dialects.postgresql import aggregate_order_by
 from sqlalchemy.orm import Session
 from ..models.product import Product
 from ..models.inventory import Inventory  # Import Inventory model
+from ..models.branch import Branch
 from ..schemas.product import ProductCreate, ProductUpdate
+from ..utils.product_search import product_search_index
+from ..utils.barcode_index import barcode_index
+from ..utils.inventory import set_inventory_assignments
+from ..utils.low_stock import refresh_low_stock_products
 
 def get_product(db: Session, product_id: int):
     return db.query(Product).filter(Product.product_id == product_id).first()
@@ -9,27 +17,68 @@ def get_product(db: Session, product_id: int):
 def get_products(db: Session, skip: int = 0, limit: int = 200):
     return db.query(Product).filter(Product.is_active == True).offset(skip).limit(limit).all()
 
+def get_product_catalog(db: Session, product_ids: list, branch_id: Optional[int] = None) -> list:
+    """
+    Filas de los productos `product_ids` (en ese orden) con su stock total y el
+    detalle por sucursal agregados en una sola consulta (GROUP BY + json_agg),
+    sin objetos ORM. Con branch_id solo se considera el inventario de esa sucursal.
+    """
+    if not product_ids:
+        return []
+    inventory_join = Inventory.product_id == Product.product_id
+    if branch_id is not None:
+        inventory_join = and_(inventory_join, Inventory.branch_id == branch_id)
+    quantity = cast(Inventory.quantity, Float)
+    # Claves literales en el SQL (como parámetro Postgres no conoce su tipo)
+    fields = []
+    for key, column in (("branch_id", Inventory.branch_id), ("branch_name", Branch.name), ("quantity", quantity)):
+        fields += [literal_column(f"'{key}'"), column]
+
+    if db.get_bind().dialect.name == "postgresql":
+        items = func.json_agg(aggregate_order_by(func.json_build_object(*fields), Inventory.branch_id))
+    else:
+        items = func.json_group_array(func.json_object(*fields))
+    # Sin filas de inventario el LEFT JOIN deja una fila con NULL: no se agrega
+    items = func.coalesce(items.filter(Inventory.inventory_id.isnot(None)), literal_column("'[]'"))
+
+    rows = db.query(
+        Product.product_id,
+        Product.barcode,
+        Product.name,
+        Product.description,
+        Product.category_id,
+        Product.unit_type,
+        cast(Product.price, Float).label("price"),
+        cast(Product.cost, Float).label("cost"),
+        Product.min_stock,
+        Product.is_active,
+        cast(func.coalesce(func.sum(quantity), 0), Float).label("stock"),
+        type_coerce(items, JSON).label("inventory_items")
+    ).outerjoin(Inventory, inventory_join) \
+        .outerjoin(Branch, Branch.branch_id == Inventory.branch_id) \
+        .filter(Product.product_id.in_(product_ids)) \
+        .group_by(Product.product_id) \
+        .all()
+
+    position = {product_id: index for index, product_id in enumerate(product_ids)}
+    rows.sort(key=lambda row: position[row.product_id])
+    return rows
+
 def create_product(db: Session, product: ProductCreate):
     # Convertir el schema Pydantic a un diccionario, excluyendo inventory_assignments
     product_data = product.model_dump(exclude={"inventory_assignments"})
     
-    # Crear el producto
+    # Crear el producto y su inventario en la misma transacción
     db_product = Product(**product_data)
     db.add(db_product)
+    db.flush()
+    if product.inventory_assignments:
+        set_inventory_assignments(db, {db_product.product_id: _assignment_quantities(product.inventory_assignments)})
     db.commit()
     db.refresh(db_product)
-    
-    # Crear registros de inventario si se proporcionaron asignaciones
-    if product.inventory_assignments:
-        for assignment in product.inventory_assignments:
-            inventory = Inventory(
-                product_id=db_product.product_id,
-                branch_id=assignment.branch_id,
-                quantity=assignment.quantity
-            )
-            db.add(inventory)
-        db.commit()
-    
+
+    product_search_index.upsert(db_product)
+    barcode_index.upsert(db_product)
     return db_product
 
 def update_product(db: Session, product_id: int, product: ProductUpdate):
@@ -41,26 +90,40 @@ def update_product(db: Session, product_id: int, product: ProductUpdate):
     update_data = product.model_dump(exclude_unset=True, exclude={"inventory_assignments"})
     for field, value in update_data.items():
         setattr(db_product, field, value)
+    if "min_stock" in update_data or "is_active" in update_data:
+        refresh_low_stock_products(db, [product_id])
 
     db.commit()
     db.refresh(db_product)
+    product_search_index.upsert(db_product)
+    barcode_index.upsert(db_product)
     return db_product
 
-def update_product_inventory(db: Session, product_id: int, inventory_assignments: list):
-    # Eliminar asignaciones existentes
-    db.query(Inventory).filter(Inventory.product_id == product_id).delete()
-    
-    # Agregar nuevas asignaciones
-    if inventory_assignments:
-        for assignment in inventory_assignments:
-            inventory = Inventory(
-                product_id=product_id,
-                branch_id=assignment.branch_id,
-                quantity=assignment.quantity
-            )
-            db.add(inventory)
-    
+def _assignment_quantities(inventory_assignments) -> Dict[int, float]:
+    # Si una sucursal se repite, vale la última asignación
+    return {assignment.branch_id: assignment.quantity for assignment in inventory_assignments or []}
+
+def update_product_inventory(db: Session, product_id: int, inventory_assignments: list,
+                             user_id: Optional[int] = None):
+    """Deja el inventario del producto igual a las asignaciones (solo escribe lo que cambia)"""
+    result = set_inventory_assignments(db, {product_id: _assignment_quantities(inventory_assignments)}, user_id)
+    db.commit()
+    return result
+
+def update_products_inventory(db: Session, assignments_by_product: Dict[int, list],
+                              user_id: Optional[int] = None):
+    """Variante masiva: {product_id: asignaciones} en las mismas tres sentencias"""
+    missing = set(assignments_by_product) - set(
+        db.scalars(select(Product.product_id).where(Product.product_id.in_(list(assignments_by_product))))
+    )
+    if missing:
+        raise ValueError(f"Productos no encontrados: {', '.join(map(str, sorted(missing)))}")
+    result = set_inventory_assignments(db, {
+        product_id: _assignment_quantities(assignments)
+        for product_id, assignments in assignments_by_product.items()
+    }, user_id)
     db.commit()
+    return result
 
 def delete_product(db: Session, product_id: int):
     db_product = get_product(db, product_id)
@@ -68,8 +131,10 @@ def delete_product(db: Session, product_id: int):
         return None
     
     # Eliminar registros de inventario primero
-    db.query(Inventory).filter(Inventory.product_id == product_id).delete()
+    set_inventory_assignments(db, {product_id: {}})
     
     db_product.is_active = False
     db.commit()
+    product_search_index.remove(product_id)
+    barcode_index.remove(product_id)
     return db_product
\ No newline at end of file
@@ -2,6 +2,7 @@
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from sqlalchemy.sql import text  # Import the text function
+from sqlalchemy import case, insert, update
 from fastapi import HTTPException, status  # Import HTTPException
 from app.models.supplier import PurchaseOrder
 from app.models.product import Product  # Import the Product model
@@ -9,10 +10,128 @@ from app.models.supplier import PurchaseOrderItem  # Import the PurchaseOrderIte
 from app.models.inventory import Inventory  # Import the Inventory model
 from datetime import datetime
 from decimal import Decimal  # Import Decimal
+from typing import Dict
 from app.schemas.purchase_order import PurchaseOrderCreate, PurchaseOrderOut  # Import the missing schemas
+from app.utils.inventory import increment_inventory, PURCHASE
 
-def update_order_status(db: Session, order_id: int, status_data):
-    db_order = db.query(PurchaseOrder).filter(PurchaseOrder.order_id == order_id).first()
+RECEIVED_STEP = Decimal("0.01")  # Escala de PurchaseOrderItem.quantity / received_quantity
+
+def _lock_order(db: Session, order_id: int):
+    # Serializa las recepciones de una misma orden (reintentos concurrentes desde las terminales)
+    return db.query(PurchaseOrder).filter(PurchaseOrder.order_id == order_id).with_for_update().first()
+
+def _lock_order_items(db: Session, order_id: int) -> list:
+    return db.query(
+        PurchaseOrderItem.item_id, PurchaseOrderItem.product_id,
+        PurchaseOrderItem.quantity, PurchaseOrderItem.received_quantity
+    ).filter(PurchaseOrderItem.order_id == order_id) \
+     .order_by(PurchaseOrderItem.item_id).with_for_update().all()
+
+def derive_order_status(current_status: str, lines: list) -> str:
+    """DELIVERED si se recibió todo, PARTIALLY_DELIVERED si se recibió algo; si no, el estado actual"""
+    if lines and all(line["received_quantity"] >= line["quantity"] for line in lines):
+        return 'DELIVERED'
+    if any(line["received_quantity"] > 0 for line in lines):
+        return 'PARTIALLY_DELIVERED'
+    return current_status
+
+def _post_receipt(db: Session, db_order: PurchaseOrder, items: list, targets: Dict[int, Decimal],
+                  user_id: int = None) -> list:
+    """
+    Lleva received_quantity de cada item de `targets` ({item_id: total recibido}) al
+    valor indicado y suma al inventario solo la diferencia: un UPDATE para los items
+    y un upsert para el inventario. Un total menor o igual al ya registrado no cambia
+    nada, así que reenviar la misma recepción es inofensivo. No hace commit.
+    """
+    lines = []
+    received = {}
+    increments = {}
+    for item in items:
+        current = Decimal(str(item.received_quantity or 0))
+        target = max(current, targets.get(item.item_id, current))
+        delta = target - current
+        if delta > 0:
+            received[item.item_id] = target
+            increments[item.product_id] = increments.get(item.product_id, 0) + delta
+        lines.append({
+            "item_id": item.item_id, "product_id": item.product_id,
+            "quantity": Decimal(str(item.quantity)), "received_quantity": target, "delta": delta
+        })
+
+    if received:
+        db.execute(
+            update(PurchaseOrderItem)
+            .where(PurchaseOrderItem.item_id.in_(list(received)))
+            .values(received_quantity=case(received, value=PurchaseOrderItem.item_id))
+            .execution_options(synchronize_session=False)
+        )
+        increment_inventory(db, db_order.branch_id, increments, PURCHASE,
+                            reference_id=db_order.order_id, user_id=user_id)
+    db_order.status = derive_order_status(db_order.status, lines)
+    return lines
+
+def receive_purchase_order(db: Session, db_order: PurchaseOrder, user_id: int = None) -> list:
+    """Recibe lo que falte de todos los items de la orden (entrega completa). No hace commit."""
+    items = _lock_order_items(db, db_order.order_id)
+    targets = {item.item_id: Decimal(str(item.quantity)) for item in items}
+    return _post_receipt(db, db_order, items, targets, user_id)
+
+def receive_goods(db: Session, order_id: int, receipt_lines: list, user_id: int = None):
+    """
+    Registra una recepción de mercadería. Cada línea indica item_id (o product_id si el
+    producto aparece una sola vez en la orden) y el total recibido hasta ahora de esa
+    línea. Devuelve None si la orden no existe; ValueError si la recepción no es válida.
+    """
+    db_order = _lock_order(db, order_id)
+    if not db_order:
+        return None
+    if db_order.status == 'CANCELLED':
+        raise ValueError("No se puede recibir mercadería de una orden cancelada")
+    if db_order.status == 'PENDING':
+        raise ValueError("La orden debe estar aprobada antes de recibir mercadería")
+
+    items = _lock_order_items(db, order_id)
+    by_item = {item.item_id: item for item in items}
+    by_product = {}
+    for item in items:
+        by_product.setdefault(item.product_id, []).append(item)
+
+    targets = {}
+    for line in receipt_lines:
+        if line.item_id is not None:
+            item = by_item.get(line.item_id)
+            if item is None:
+                raise ValueError(f"El item {line.item_id} no pertenece a la orden")
+        else:
+            matches = by_product.get(line.product_id, [])
+            if not matches:
+                raise ValueError(f"El producto {line.product_id} no está en la orden")
+            if len(matches) > 1:
+                raise ValueError(f"El producto {line.product_id} aparece en varias líneas: indique item_id")
+            item = matches[0]
+        target = Decimal(str(line.received_quantity)).quantize(RECEIVED_STEP)
+        if target > Decimal(str(item.quantity)):
+            raise ValueError(f"El item {item.item_id} recibe más de lo pedido ({item.quantity})")
+        targets[item.item_id] = max(target, targets.get(item.item_id, target))
+
+    previous_status = db_order.status
+    lines = _post_receipt(db, db_order, items, targets, user_id)
+    if any(line["delta"] for line in lines) or db_order.status != previous_status:
+        db.commit()
+    else:
+        db.rollback()  # Reenvío de una recepción ya registrada: solo libera los bloqueos
+    return {
+        "order_id": db_order.order_id,
+        "status": db_order.status,
+        "lines": [
+            dict(line, quantity=float(line["quantity"]), received_quantity=float(line["received_quantity"]),
+                 delta=float(line["delta"]))
+            for line in lines
+        ]
+    }
+
+def update_order_status(db: Session, order_id: int, status_data, user_id: int = None):
+    db_order = _lock_order(db, order_id)
     if not db_order:
         return None
 
@@ -23,33 +142,14 @@ def update_order_status(db: Session, order_id: int, status_data):
     if db_order.status == 'DELIVERED' and status_data.status != 'DELIVERED':
         raise ValueError("No se puede modificar una orden ya entregada")
 
-    # Lógica especial para aprobación
-    if status_data.status == 'APPROVED' and db_order.status == 'PENDING':
-        try:
-            # Actualizar el inventario al aprobar la orden
-            for item in db_order.items:  # Acceder a los items a través de la relación
-                inventory_item = (
-                    db.query(Inventory)
-                    .filter(
-                        Inventory.product_id == item.product_id,
-                        Inventory.branch_id == db_order.branch_id,
-                    )
-                    .first()
-                )
-                if inventory_item:
-                    inventory_item.quantity += item.quantity  # Aumentar la cantidad
-                else:
-                    # Si no existe un registro de inventario para ese producto y sucursal, créalo
-                    new_inventory_item = Inventory(
-                        product_id=item.product_id,
-                        branch_id=db_order.branch_id,
-                        quantity=item.quantity
-                    )
-                    db.add(new_inventory_item)
-
-            db_order.status = status_data.status
-            db.session.commit()
+    if status_data.status == 'PARTIALLY_DELIVERED':
+        raise ValueError("El estado PARTIALLY_DELIVERED resulta de las recepciones: use /orders/{id}/receipts")
 
+    # Aprobar no mueve inventario; la mercadería entra con las recepciones.
+    # Marcar como entregada recibe lo que falte de cada línea.
+    if status_data.status == 'DELIVERED':
+        try:
+            receive_purchase_order(db, db_order, user_id)
         except SQLAlchemyError as e:
             db.rollback()
             raise ValueError(f"Error al actualizar el inventario: {str(e)}")
@@ -70,7 +170,7 @@ def create_purchase_order(db: Session, order_data, user_id: int):
             Product.product_id.in_(product_ids)
         ).all()
         
-        if len(existing_products) != len(product_ids):
+        if len(existing_products) != len(set(product_ids)):
             missing_ids = set(product_ids) - {p.product_id for p in existing_products}
             raise HTTPException(400, detail=f"Productos no encontrados: {missing_ids}")
 
@@ -92,38 +192,15 @@ def create_purchase_order(db: Session, order_data, user_id: int):
         db.add(db_order)
         db.flush()
 
-        # 3. Procesar items y actualizar inventario
-        for item in order_data.items:
-            # Guardar item de orden
-            db.add(PurchaseOrderItem(
-                order_id=db_order.order_id,
-                product_id=item.product_id,
-                quantity=item.quantity,
-                unit_cost=item.unit_cost
-            ))
-
-            # Opción 1: Usar merge (alternativa si no puedes modificar la BD)
-            inventory = db.query(Inventory).filter(
-                Inventory.product_id == item.product_id,
-                Inventory.branch_id == order_data.branch_id
-            ).first()
-            
-            if inventory:
-                inventory.quantity += Decimal(str(item.quantity))
-            else:
-                db.add(Inventory(
-                    product_id=item.product_id,
-                    branch_id=order_data.branch_id,
-                    quantity=item.quantity
-                ))
-
-            # Opción 2: Si puedes modificar la BD, añade la migración SQL:
-            """
-            ALTER TABLE inventory 
-            ADD CONSTRAINT _inventory_product_branch_uc 
-            UNIQUE (product_id, branch_id);
-            """
-
+        # 3. Guardar todos los items en un solo INSERT. El inventario se actualiza al
+        # recibir la mercadería, salvo que la orden se registre ya entregada.
+        db.execute(insert(PurchaseOrderItem).values([
+            {"order_id": db_order.order_id, "product_id": item.product_id,
+             "quantity": item.quantity, "unit_cost": item.unit_cost, "received_quantity": 0}
+            for item in order_data.items
+        ]))
+        if db_order.status == 'DELIVERED':
+            receive_purchase_order(db, db_order, user_id)
         db.commit()
         return db_order
 
@@ -1,15 +1,27 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy import insert, tuple_
 from ..models.sale import Sale, SaleDetail
 from ..models.inventory import Inventory  # Import Inventory model
 from ..models.client import Client  # Import Client model
 from ..models.product import Product  # Import Product model
 from ..models.payment_method import PaymentMethod  # Import PaymentMethod model
-from ..schemas.sale import SaleCreate
+from ..schemas.sale import SaleCreate, SaleSyncItem
 from ..utils.sales import generate_invoice_number
-from datetime import datetime  # Import datetime
+from ..utils.inventory import lock_inventory_rows, decrement_inventory, decrement_inventory_many
+from ..utils.pagination import Page, paginate
+from .sales_rollup import record_sales
+from datetime import datetime, timezone  # Import datetime
 from decimal import Decimal
+from typing import List
 
 def create_sale(db: Session, sale: SaleCreate, user_id: int):
+    # El número de factura se reserva antes de la primera consulta: si el bloque se
+    # agotó, la reserva usa otra conexión del pool y no debe esperarla mientras esta
+    # sesión retiene una conexión con el inventario bloqueado. El día es el de
+    # sale_date, en UTC. Una venta rechazada deja un hueco en la numeración.
+    sale_date = datetime.utcnow()
+    invoice_number = generate_invoice_number(sale.branch_id, sale_date.date(), bind=db.get_bind())
+
     # Verificar cliente si se proporcionó ID
     if sale.client_id:
         client = db.query(Client).filter(Client.client_id == sale.client_id).first()
@@ -23,64 +35,256 @@ def create_sale(db: Session, sale: SaleCreate, user_id: int):
     if not payment_method:
         raise ValueError("Método de pago no encontrado")
 
-    # Verificar stock antes de crear la venta
+    # Agrupar cantidades por producto (un producto puede venir en varias líneas)
+    quantities = {}
     for item in sale.items:
-        inventory = db.query(Inventory).filter(
-            Inventory.product_id == item.product_id,
-            Inventory.branch_id == sale.branch_id
-        ).first()
-        
-        if not inventory or inventory.quantity < item.quantity:
-            product = db.query(Product).filter(Product.product_id == item.product_id).first()
-            product_name = product.name if product else f"ID {item.product_id}"
-            raise ValueError(f"Stock insuficiente para {product_name} en la sucursal seleccionada")
-    
-    # Calcular totales
-    subtotal = sum(item.unit_price * item.quantity for item in sale.items)
-    total = subtotal - (sale.discount or 0)
-
-    # Crear la venta
-    db_sale = Sale(
-        invoice_number=generate_invoice_number(),
-        client_id=sale.client_id,
-        user_id=user_id,
-        branch_id=sale.branch_id,
-        subtotal=subtotal,
-        discount=sale.discount or 0,
-        total=total,
-        payment_method_id=sale.payment_method_id,
-        status="COMPLETADA",
-        sale_date=datetime.utcnow()
-    )
-    
-    db.add(db_sale)
-    db.commit()
-    db.refresh(db_sale)
-    
-    # Crear detalles de venta y actualizar inventario
-    for item in sale.items:
-        db_detail = SaleDetail(
-            sale_id=db_sale.sale_id,
-            product_id=item.product_id,
-            quantity=item.quantity,
-            unit_price=item.unit_price,
-            discount=item.discount or 0,
-            total_line=item.unit_price * item.quantity - (item.discount or 0)
+        quantities[item.product_id] = quantities.get(item.product_id, Decimal("0")) + Decimal(str(item.quantity))
+
+    try:
+        # Bloquear el inventario de toda la canasta y verificar stock en una sola consulta
+        stock = lock_inventory_rows(db, sale.branch_id, quantities.keys())
+        for product_id, quantity in quantities.items():
+            if product_id not in stock or stock[product_id] < quantity:
+                product = db.query(Product.name).filter(Product.product_id == product_id).first()
+                product_name = product.name if product else f"ID {product_id}"
+                raise ValueError(f"Stock insuficiente para {product_name} en la sucursal seleccionada")
+
+        # Calcular totales
+        subtotal = sum(item.unit_price * item.quantity for item in sale.items)
+        discount = Decimal(str(sale.discount or 0))
+        total = subtotal - discount
+
+        # Crear la venta
+        db_sale = Sale(
+            invoice_number=invoice_number,
+            client_id=sale.client_id,
+            user_id=user_id,
+            branch_id=sale.branch_id,
+            subtotal=subtotal,
+            discount=discount,
+            total=total,
+            payment_method_id=sale.payment_method_id,
+            status="COMPLETADA",
+            sale_date=sale_date
         )
-        db.add(db_detail)
-        
-        # Actualizar inventario
-        db_inventory = db.query(Inventory).filter(
-            Inventory.product_id == item.product_id,
-            Inventory.branch_id == sale.branch_id
-        ).first()
-        db_inventory.quantity -= Decimal(str(item.quantity))
-        db.add(db_inventory)
-    
-    db.commit()
+        db.add(db_sale)
+        db.flush()
+
+        # Insertar todos los detalles en un solo INSERT de varias filas
+        lines = [
+            {
+                "sale_id": db_sale.sale_id,
+                "product_id": item.product_id,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "discount": item.discount or 0,
+                "total_line": item.unit_price * item.quantity - (item.discount or 0)
+            }
+            for item in sale.items
+        ]
+        db.execute(insert(SaleDetail), lines)
+
+        # Descontar el stock de todos los productos en un solo UPDATE
+        decrement_inventory(db, sale.branch_id, quantities, reference_id=db_sale.sale_id, user_id=user_id)
+
+        # Actualizar los resúmenes diarios en la misma transacción
+        record_sales(db, [{
+            "day": db_sale.sale_date.date(),
+            "branch_id": db_sale.branch_id,
+            "subtotal": subtotal,
+            "discount": discount,
+            "total": total,
+            "lines": lines
+        }])
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
     return db_sale
 
-def get_sales(db: Session, skip: int = 0, limit: int = 100, status: str = None, branch_id: int = None):
+# Resultado de cada venta en la sincronización por lotes
+SYNC_CREATED = "CREATED"
+SYNC_DUPLICATE = "DUPLICATE"
+SYNC_REJECTED = "REJECTED"
+
+def _sale_quantities(sale: SaleCreate) -> dict:
+    quantities = {}
+    for item in sale.items:
+        quantities[item.product_id] = quantities.get(item.product_id, Decimal("0")) + Decimal(str(item.quantity))
+    return quantities
+
+def _utc_naive(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+def sync_sales(db: Session, sales: List[SaleSyncItem], user_id: int) -> List[dict]:
+    """
+    Registra en orden las ventas hechas sin conexión en las cajas, con una sola
+    transacción: una consulta por tabla para validar clientes, métodos de pago y
+    UUIDs ya sincronizados, un SELECT ... FOR UPDATE por sucursal para el stock de
+    todo el lote y INSERTs de varias filas para ventas y detalles. Una venta sin
+    stock se rechaza sin afectar a las demás; las ventas siguientes ven el stock
+    que dejaron las anteriores. Devuelve un resultado por venta (status, sale_id,
+    invoice_number, error), alineado con `sales`. Un UUID ya registrado no se
+    vuelve a insertar: se informa como DUPLICATE con la venta original.
+    """
+    uuids = [str(sale.client_uuid) for sale in sales]
+    results = [{"client_uuid": uuid, "status": None, "sale_id": None,
+                "invoice_number": None, "error": None} for uuid in uuids]
+
+    existing = {
+        row.client_uuid: row
+        for row in db.query(Sale.client_uuid, Sale.sale_id, Sale.invoice_number)
+        .filter(Sale.client_uuid.in_(set(uuids)))
+    }
+    client_ids = {sale.client_id for sale in sales if sale.client_id}
+    clients = {row[0] for row in db.query(Client.client_id).filter(Client.client_id.in_(client_ids))}
+    payment_methods = {
+        row[0] for row in db.query(PaymentMethod.payment_method_id)
+        .filter(PaymentMethod.payment_method_id.in_({sale.payment_method_id for sale in sales}))
+    }
+
+    first_position = {}  # UUID -> primera posición en el lote
+    pending = []
+    for position, sale in enumerate(sales):
+        result = results[position]
+        if uuids[position] in existing:
+            row = existing[uuids[position]]
+            result.update(status=SYNC_DUPLICATE, sale_id=row.sale_id, invoice_number=row.invoice_number)
+        elif uuids[position] in first_position:
+            continue  # Se resuelve con el resultado de la primera aparición
+        elif sale.client_id and sale.client_id not in clients:
+            result.update(status=SYNC_REJECTED, error="Cliente no encontrado")
+        elif sale.payment_method_id not in payment_methods:
+            result.update(status=SYNC_REJECTED, error="Método de pago no encontrado")
+        else:
+            pending.append((position, _sale_quantities(sale)))
+        first_position.setdefault(uuids[position], position)
+
+    # Números de factura de las ventas a registrar, reservados antes de bloquear el
+    # inventario y con la conexión de la sesión ya devuelta al pool (hasta aquí solo
+    # hubo lecturas): una reserva nunca espera conexión mientras retiene bloqueos.
+    # Las ventas que después se rechazan por stock dejan huecos en la numeración.
+    synced_at = datetime.utcnow()
+    sale_dates = {}
+    invoice_numbers = {}
+    if pending:
+        db.commit()
+        for position, _ in pending:
+            sale = sales[position]
+            sale_dates[position] = _utc_naive(sale.sale_date) if sale.sale_date else synced_at
+            invoice_numbers[position] = generate_invoice_number(sale.branch_id, sale_dates[position].date(),
+                                                                bind=db.get_bind())
+
+    try:
+        # Bloquear el inventario de todo el lote, sucursal por sucursal en orden fijo
+        products_by_branch = {}
+        for position, quantities in pending:
+            products_by_branch.setdefault(sales[position].branch_id, set()).update(quantities)
+        stock = {
+            branch_id: lock_inventory_rows(db, branch_id, products_by_branch[branch_id])
+            for branch_id in sorted(products_by_branch)
+        }
+
+        accepted = []
+        missing_products = {}  # posición -> producto sin stock
+        for position, quantities in pending:
+            available = stock[sales[position].branch_id]
+            short = next((product_id for product_id, quantity in quantities.items()
+                          if available.get(product_id, Decimal("0")) < quantity), None)
+            if short is not None:
+                missing_products[position] = short
+                continue
+            for product_id, quantity in quantities.items():
+                available[product_id] -= quantity
+            accepted.append((position, quantities))
+
+        if missing_products:
+            names = dict(db.query(Product.product_id, Product.name)
+                         .filter(Product.product_id.in_(set(missing_products.values()))))
+            for position, product_id in missing_products.items():
+                product_name = names.get(product_id) or f"ID {product_id}"
+                results[position].update(
+                    status=SYNC_REJECTED,
+                    error=f"Stock insuficiente para {product_name} en la sucursal seleccionada"
+                )
+
+        if accepted:
+            headers = []
+            for position, _ in accepted:
+                sale = sales[position]
+                subtotal = sum(item.unit_price * item.quantity for item in sale.items)
+                discount = Decimal(str(sale.discount or 0))
+                headers.append({
+                    "invoice_number": invoice_numbers[position],
+                    "client_id": sale.client_id,
+                    "user_id": user_id,
+                    "branch_id": sale.branch_id,
+                    "subtotal": subtotal,
+                    "discount": discount,
+                    "total": subtotal - discount,
+                    "payment_method_id": sale.payment_method_id,
+                    "status": "COMPLETADA",
+                    "sale_date": sale_dates[position],
+                    "client_uuid": uuids[position]
+                })
+
+            # Todas las cabeceras en un INSERT de varias filas; los ids vuelven por UUID
+            sale_ids = dict(db.execute(insert(Sale).returning(Sale.client_uuid, Sale.sale_id), headers).all())
+
+            details = []
+            rollups = []
+            by_branch = {}
+            for (position, quantities), header in zip(accepted, headers):
+                sale_id = sale_ids[header["client_uuid"]]
+                lines = [
+                    {
+                        "sale_id": sale_id,
+                        "product_id": item.product_id,
+                        "quantity": item.quantity,
+                        "unit_price": item.unit_price,
+                        "discount": item.discount or 0,
+                        "total_line": item.unit_price * item.quantity - (item.discount or 0)
+                    }
+                    for item in sales[position].items
+                ]
+                details.extend(lines)
+                rollups.append({"day": header["sale_date"].date(), "branch_id": header["branch_id"],
+                                "subtotal": header["subtotal"], "discount": header["discount"],
+                                "total": header["total"], "lines": lines})
+                by_branch.setdefault(header["branch_id"], {})[sale_id] = quantities
+                results[position].update(status=SYNC_CREATED, sale_id=sale_id,
+                                         invoice_number=header["invoice_number"])
+            if details:
+                db.execute(insert(SaleDetail), details)
+
+            # Un UPDATE de stock por sucursal con los totales del lote
+            for branch_id, quantities_by_sale in sorted(by_branch.items()):
+                decrement_inventory_many(db, branch_id, quantities_by_sale, user_id=user_id)
+            record_sales(db, rollups)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # UUIDs repetidos dentro del lote: mismo resultado que su primera aparición
+    for position, result in enumerate(results):
+        if result["status"] is None:
+            first = results[first_position[uuids[position]]]
+            if first["status"] == SYNC_REJECTED:
+                result.update(status=SYNC_REJECTED, error=first["error"])
+            else:
+                result.update(status=SYNC_DUPLICATE, sale_id=first["sale_id"],
+                              invoice_number=first["invoice_number"])
+    return results
+
+def get_sales(db: Session, skip: int = 0, limit: int = 100, status: str = None, branch_id: int = None,
+              cursor: str = None, with_total: bool = False) -> Page:
+    """Ventas de la más reciente a la más antigua, paginadas por (sale_date, sale_id)"""
     query = db.query(Sale).options(
         joinedload(Sale.client),  # Carga eager del cliente
         joinedload(Sale.branch),  # Carga eager de la sucursal
@@ -92,8 +296,9 @@ def get_sales(db: Session, skip: int = 0, limit: int = 100, status: str = None,
         query = query.filter(Sale.status == status)
     if branch_id:
         query = query.filter(Sale.branch_id == branch_id)
-        
-    return query.offset(skip).limit(limit).all()
+
+    return paginate(query, [Sale.sale_date, Sale.sale_id], limit, cursor=cursor,
+                    descending=True, skip=skip, with_total=with_total)
 
 def get_sale(db: Session, sale_id: int):
     return db.query(Sale).options(
@@ -101,4 +306,54 @@ def get_sale(db: Session, sale_id: int):
         joinedload(Sale.branch),
         joinedload(Sale.payment_method),
         joinedload(Sale.details).joinedload(SaleDetail.product)
-    ).filter(Sale.sale_id == sale_id).first()
\ No newline at end of file
+    ).filter(Sale.sale_id == sale_id).first()
+
+def iter_sales_for_export(db: Session, status: str = None, branch_id: int = None,
+                          start_date: str = None, end_date: str = None, chunk_size: int = 500,
+                          include_details: bool = True):
+    """
+    Recorre las ventas filtradas (más recientes primero) por bloques de `chunk_size`
+    usando paginación por clave (sale_date, sale_id), sin cargarlas todas en memoria.
+    """
+    query = db.query(Sale).options(
+        joinedload(Sale.client),
+        joinedload(Sale.branch),
+        joinedload(Sale.payment_method)
+    )
+    if include_details:
+        query = query.options(selectinload(Sale.details).joinedload(SaleDetail.product))
+
+    if status:
+        query = query.filter(Sale.status == status)
+    if branch_id:
+        query = query.filter(Sale.branch_id == branch_id)
+    if start_date:
+        query = query.filter(Sale.sale_date >= start_date)
+    if end_date:
+        query = query.filter(Sale.sale_date <= end_date)
+
+    last_key = None
+    while True:
+        page = query
+        if last_key:
+            page = page.filter(tuple_(Sale.sale_date, Sale.sale_id) < last_key)
+        sales = page.order_by(Sale.sale_date.desc(), Sale.sale_id.desc()).limit(chunk_size).all()
+        if not sales:
+            break
+
+        yield from sales
+
+        last_key = (sales[-1].sale_date, sales[-1].sale_id)
+        # Liberar los objetos ya exportados para mantener la memoria constante
+        db.expunge_all()
+
+def get_sale_for_invoice(db: Session, sale_id: int):
+    """Venta con todas las relaciones que se imprimen en la factura"""
+    return db.query(Sale).options(
+        joinedload(Sale.client),
+        joinedload(Sale.branch),
+        joinedload(Sale.user),
+        joinedload(Sale.payment_method),
+        joinedload(Sale.details).joinedload(SaleDetail.product)
+    ).filter(Sale.sale_id == sale_id).first()
+
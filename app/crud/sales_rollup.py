@@ -0,0 +1,191 @@
+# crud/sales_rollup.py
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import func, select, insert
+from sqlalchemy.orm import Session
+from app.models.sale import Sale, SaleDetail
+from app.models.product import Product
+from app.models.sales_rollup import SalesDailyBranch, SalesDailyCategory, SalesDailyProduct
+from app.utils.db import dialect_insert
+
+NO_CATEGORY = 0  # Clave usada en sales_daily_category para productos sin categoría
+
+def _upsert_increment(db: Session, model, key_columns: list, rows: list):
+    """INSERT ... ON CONFLICT DO UPDATE que suma los valores a la fila existente"""
+    if not rows:
+        return
+    insert_stmt = dialect_insert(db)(model).values(rows)
+    value_columns = [column for column in rows[0] if column not in key_columns]
+    db.execute(insert_stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            column: getattr(model, column) + getattr(insert_stmt.excluded, column)
+            for column in value_columns
+        }
+    ))
+
+def record_sales(db: Session, sales: list):
+    """
+    Suma ventas nuevas a los resúmenes diarios dentro de la transacción en curso.
+    Cada venta es un dict con day, branch_id, subtotal, discount, total y
+    lines (product_id, quantity, total_line).
+    """
+    if not sales:
+        return
+
+    product_ids = {line["product_id"] for sale in sales for line in sale["lines"]}
+    categories = dict(
+        db.query(Product.product_id, Product.category_id)
+        .filter(Product.product_id.in_(product_ids))
+        .all()
+    )
+
+    # Agregar en memoria: una sola fila por clave en cada INSERT
+    by_branch = defaultdict(lambda: [0, Decimal("0"), Decimal("0"), Decimal("0")])
+    by_category = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    by_product = defaultdict(lambda: [Decimal("0"), Decimal("0")])
+    for sale in sales:
+        branch_row = by_branch[(sale["day"], sale["branch_id"])]
+        branch_row[0] += 1
+        branch_row[1] += Decimal(str(sale["subtotal"]))
+        branch_row[2] += Decimal(str(sale["discount"] or 0))
+        branch_row[3] += Decimal(str(sale["total"]))
+        for line in sale["lines"]:
+            quantity = Decimal(str(line["quantity"]))
+            total_line = Decimal(str(line["total_line"]))
+            category_id = categories.get(line["product_id"]) or NO_CATEGORY
+            category_row = by_category[(sale["day"], sale["branch_id"], category_id)]
+            category_row[0] += quantity
+            category_row[1] += total_line
+            product_row = by_product[(sale["day"], sale["branch_id"], line["product_id"])]
+            product_row[0] += quantity
+            product_row[1] += total_line
+
+    _upsert_increment(db, SalesDailyBranch, ["day", "branch_id"], [
+        {"day": day, "branch_id": branch_id, "sales_count": count,
+         "subtotal": subtotal, "discount": discount, "total": total}
+        for (day, branch_id), (count, subtotal, discount, total) in by_branch.items()
+    ])
+    _upsert_increment(db, SalesDailyCategory, ["day", "branch_id", "category_id"], [
+        {"day": day, "branch_id": branch_id, "category_id": category_id,
+         "quantity": quantity, "total": total}
+        for (day, branch_id, category_id), (quantity, total) in by_category.items()
+    ])
+    _upsert_increment(db, SalesDailyProduct, ["day", "branch_id", "product_id"], [
+        {"day": day, "branch_id": branch_id, "product_id": product_id,
+         "quantity": quantity, "total": total}
+        for (day, branch_id, product_id), (quantity, total) in by_product.items()
+    ])
+
+def rebuild_sales_rollups(db: Session):
+    """Reconstruye todos los resúmenes a partir del histórico de ventas"""
+    db.query(SalesDailyProduct).delete()
+    db.query(SalesDailyCategory).delete()
+    db.query(SalesDailyBranch).delete()
+
+    day = func.date(Sale.sale_date)
+    db.execute(insert(SalesDailyBranch).from_select(
+        ["day", "branch_id", "sales_count", "subtotal", "discount", "total"],
+        select(
+            day,
+            Sale.branch_id,
+            func.count(Sale.sale_id),
+            func.coalesce(func.sum(Sale.subtotal), 0),
+            func.coalesce(func.sum(Sale.discount), 0),
+            func.coalesce(func.sum(Sale.total), 0)
+        ).where(Sale.branch_id.isnot(None)).group_by(day, Sale.branch_id)
+    ))
+
+    category_id = func.coalesce(Product.category_id, NO_CATEGORY)
+    db.execute(insert(SalesDailyCategory).from_select(
+        ["day", "branch_id", "category_id", "quantity", "total"],
+        select(
+            day,
+            Sale.branch_id,
+            category_id,
+            func.sum(SaleDetail.quantity),
+            func.sum(SaleDetail.total_line)
+        ).join(Sale, Sale.sale_id == SaleDetail.sale_id)
+        .join(Product, Product.product_id == SaleDetail.product_id)
+        .where(Sale.branch_id.isnot(None))
+        .group_by(day, Sale.branch_id, category_id)
+    ))
+
+    db.execute(insert(SalesDailyProduct).from_select(
+        ["day", "branch_id", "product_id", "quantity", "total"],
+        select(
+            day,
+            Sale.branch_id,
+            SaleDetail.product_id,
+            func.sum(SaleDetail.quantity),
+            func.sum(SaleDetail.total_line)
+        ).join(Sale, Sale.sale_id == SaleDetail.sale_id)
+        .where(Sale.branch_id.isnot(None), SaleDetail.product_id.isnot(None))
+        .group_by(day, Sale.branch_id, SaleDetail.product_id)
+    ))
+    db.commit()
+
+def check_rollup_consistency(db: Session, start_date: Optional[date] = None, end_date: Optional[date] = None):
+    """
+    Compara los resúmenes contra las tablas de ventas por día y sucursal.
+    Devuelve la lista de diferencias encontradas (vacía si todo cuadra).
+    """
+    day = func.date(Sale.sale_date)
+    raw_sales = db.query(day, Sale.branch_id, func.count(Sale.sale_id), func.sum(Sale.total)) \
+        .filter(Sale.branch_id.isnot(None))
+    raw_lines = db.query(day, Sale.branch_id, func.sum(SaleDetail.quantity), func.sum(SaleDetail.total_line)) \
+        .join(Sale, Sale.sale_id == SaleDetail.sale_id) \
+        .filter(Sale.branch_id.isnot(None), SaleDetail.product_id.isnot(None))
+    branch_rollup = db.query(SalesDailyBranch.day, SalesDailyBranch.branch_id,
+                             SalesDailyBranch.sales_count, SalesDailyBranch.total)
+    product_rollup = db.query(SalesDailyProduct.day, SalesDailyProduct.branch_id,
+                              func.sum(SalesDailyProduct.quantity), func.sum(SalesDailyProduct.total))
+    category_rollup = db.query(SalesDailyCategory.day, SalesDailyCategory.branch_id,
+                               func.sum(SalesDailyCategory.quantity), func.sum(SalesDailyCategory.total))
+
+    if start_date:
+        raw_sales = raw_sales.filter(Sale.sale_date >= start_date)
+        raw_lines = raw_lines.filter(Sale.sale_date >= start_date)
+        branch_rollup = branch_rollup.filter(SalesDailyBranch.day >= start_date)
+        product_rollup = product_rollup.filter(SalesDailyProduct.day >= start_date)
+        category_rollup = category_rollup.filter(SalesDailyCategory.day >= start_date)
+    if end_date:
+        raw_sales = raw_sales.filter(Sale.sale_date < end_date + timedelta(days=1))
+        raw_lines = raw_lines.filter(Sale.sale_date < end_date + timedelta(days=1))
+        branch_rollup = branch_rollup.filter(SalesDailyBranch.day <= end_date)
+        product_rollup = product_rollup.filter(SalesDailyProduct.day <= end_date)
+        category_rollup = category_rollup.filter(SalesDailyCategory.day <= end_date)
+
+    def as_dict(rows):
+        # Normalizar el día a texto: func.date devuelve str en SQLite y date en Postgres
+        return {
+            (str(row[0]), row[1]): (Decimal(str(row[2] or 0)), Decimal(str(row[3] or 0)))
+            for row in rows
+        }
+
+    expected_lines = as_dict(raw_lines.group_by(day, Sale.branch_id).all())
+    comparisons = [
+        ("sales_daily_branch", as_dict(raw_sales.group_by(day, Sale.branch_id).all()), as_dict(branch_rollup.all())),
+        ("sales_daily_product", expected_lines,
+         as_dict(product_rollup.group_by(SalesDailyProduct.day, SalesDailyProduct.branch_id).all())),
+        ("sales_daily_category", expected_lines,
+         as_dict(category_rollup.group_by(SalesDailyCategory.day, SalesDailyCategory.branch_id).all())),
+    ]
+
+    mismatches = []
+    zero = (Decimal("0"), Decimal("0"))
+    for table, raw, rollup in comparisons:
+        for day_key, branch_id in sorted(set(raw) | set(rollup), key=str):
+            expected = raw.get((day_key, branch_id), zero)
+            found = rollup.get((day_key, branch_id), zero)
+            if expected != found:
+                mismatches.append({
+                    "table": table,
+                    "date": day_key,
+                    "branch_id": branch_id,
+                    "expected": [float(value) for value in expected],
+                    "found": [float(value) for value in found]
+                })
+    return mismatches
@@ -7,6 +7,7 @@ from app.models.supplier import Supplier, SupplierProduct, PurchaseOrder, Purcha
 from app.schemas.supplier import SupplierCreate
 from app.models.inventory import Inventory
 from app.models.product import Product  # Import the Product model
+from app.utils.pagination import Page, paginate
 
 def create_supplier(db: Session, supplier_data: SupplierCreate):
     try:
@@ -19,8 +20,8 @@ def create_supplier(db: Session, supplier_data: SupplierCreate):
         print(f"Error en create_supplier (CRUD): {e}")
         raise
 
-def get_suppliers(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(Supplier).offset(skip).limit(limit).all()
+def get_suppliers(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, with_total: bool = False) -> Page:
+    return paginate(db.query(Supplier), [Supplier.supplier_id], limit, cursor=cursor, skip=skip, with_total=with_total)
 
 def get_supplier(db: Session, supplier_id: int):
     return db.query(Supplier).filter(Supplier.supplier_id == supplier_id).first()
@@ -48,23 +49,8 @@ def approve_purchase_order(db: Session, order_id: int):
     if not db_order:
         return None
     
-    # Actualizar inventario
-    for item in db_order.items:
-        inventory = db.query(Inventory).filter(
-            Inventory.product_id == item.product_id,
-            Inventory.branch_id == db_order.branch_id
-        ).first()
-        
-        if inventory:
-            inventory.quantity += item.quantity
-        else:
-            inventory = Inventory(
-                product_id=item.product_id,
-                branch_id=db_order.branch_id,
-                quantity=item.quantity
-            )
-            db.add(inventory)
-    
-    db_order.status = "APPROVED"
-    db.commit()
+    # El inventario se actualiza al recibir la mercadería (/orders/{id}/receipts)
+    if db_order.status == "PENDING":
+        db_order.status = "APPROVED"
+        db.commit()
     return db_order
\ No newline at end of file
@@ -1,14 +1,16 @@
 from sqlalchemy.orm import Session
-from passlib.context import CryptContext
-import bcrypt  # Import bcrypt for password verification
 from ..models.user import User
 from ..schemas.user import UserCreate, UserUpdate
+from ..utils.principal_cache import principal_cache
+from ..utils.revocation import revocations
+from ..utils.security import get_password_hash, verify_password
+from ..utils.pagination import Page, paginate
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+REVOKING_FIELDS = {"username", "password", "role_id", "is_active"}
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: str = None, with_total: bool = False) -> Page:
     """Obtiene lista de usuarios"""
-    return db.query(User).offset(skip).limit(limit).all()
+    return paginate(db.query(User), [User.user_id], limit, cursor=cursor, skip=skip, with_total=with_total)
 
 def get_user(db: Session, user_id: int):
     """Obtiene un usuario por ID"""
@@ -19,7 +21,7 @@ def get_user_by_username(db: Session, username: str):
 
 def create_user(db: Session, user: UserCreate):
     """Crea un nuevo usuario"""
-    hashed_password = pwd_context.hash(user.password)
+    hashed_password = get_password_hash(user.password)
     db_user = User(
         username=user.username,
         password=user.password,
@@ -42,13 +44,20 @@ def update_user(db: Session, user_id: int, user: UserUpdate):
         if 'password' in update_data and update_data['password']:
             new_password = update_data['password'] # Guarda el password sin hashear
             db_user.password = new_password # Asigna el password sin hashear al objeto db_user
-            db_user.password_hash = pwd_context.hash(update_data.pop('password')) # Hashea y asigna a password_hash
+            db_user.password_hash = get_password_hash(update_data.pop('password')) # Hashea y asigna a password_hash
 
         for key, value in update_data.items():
             if key != 'password': # Evita reasignar el password (ya lo hicimos)
                 setattr(db_user, key, value)
+
+        # Cambios que deben invalidar los tokens ya emitidos
+        if REVOKING_FIELDS & user.model_fields_set:
+            db_user.token_version = (db_user.token_version or 0) + 1
         db.commit()
         db.refresh(db_user)
+        principal_cache.invalidate_user(user_id)
+        revocations.revoke(user_id, db_user.token_version, bool(db_user.is_active), db_user.role_id,
+                           bool(db_user.is_superuser))
     return db_user
 
 def delete_user(db: Session, user_id: int):
@@ -57,6 +66,8 @@ def delete_user(db: Session, user_id: int):
     if db_user:
         db.delete(db_user)
         db.commit()
+        principal_cache.invalidate_user(user_id)
+        revocations.revoke(user_id)
         return True
     return False
 
@@ -64,7 +75,7 @@ def authenticate_user(db: Session, username: str, password: str):
     user = db.query(User).filter(User.username == username).first()
     if not user:
         return False
-    if user.password != password:  # Aquí comparamos la contraseña en texto plano
+    if not verify_password(password, user.password_hash):
         return False
     return user
 
@@ -1,13 +1,20 @@
+import logging
+
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.httpsredirect import HTTPSRedirectMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, JSONResponse
 from .config import settings
-from .api.v1 import products, categories, inventory, sales, auth, users, unit_types, clients, payment_methods, supplier, purchase_order, branches, role
-from .database import Base, engine
+from .utils.revocation import revocations
+from .utils.passwords import password_hasher, PasswordHasherBusy
+from .utils.barcode_index import barcode_index
+from .api.v1 import products, categories, inventory, sales, auth, users, unit_types, clients, payment_methods, supplier, purchase_order, branches, role, jobs
+from .database import Base, engine, SessionLocal, async_engine
 
 #Base.metadata.create_all(bind=engine)
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title="SuperMarket Bolivia API",
     description="API completa para sistema de supermercados en Bolivia",
@@ -61,6 +68,42 @@ app.include_router(supplier.router, prefix=settings.API_V1_STR)
 app.include_router(purchase_order.router, prefix=settings.API_V1_STR)
 app.include_router(branches.router, prefix=settings.API_V1_STR)
 app.include_router(role.router, prefix=settings.API_V1_STR)
+app.include_router(jobs.router, prefix=settings.API_V1_STR)
+
+@app.exception_handler(PasswordHasherBusy)
+async def password_hasher_busy(request: Request, exc: PasswordHasherBusy):
+    # Backpressure: demasiadas operaciones de bcrypt en cola
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servidor ocupado, intente nuevamente"},
+        headers={"Retry-After": "1"}
+    )
+
+@app.on_event("startup")
+def start_token_revocations():
+    revocations.start()
+
+@app.on_event("startup")
+def load_barcode_index():
+    # Si la base no responde todavía, el índice se carga en la primera búsqueda
+    db = SessionLocal()
+    try:
+        barcode_index.load(db)
+    except Exception:
+        logger.warning("No se pudo cargar el índice de códigos de barras; se cargará en la primera búsqueda",
+                       exc_info=True)
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    jobs.job_manager.shutdown()
+    revocations.stop()
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    await async_engine.dispose()
 
 @app.get("/")
 def read_root():
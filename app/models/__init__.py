@@ -7,6 +7,11 @@ from .branch import Branch
 from .inventory import Inventory
 from .client import Client
 from .sale import Sale, SaleDetail
+from .invoice_counter import InvoiceCounter
+from .sales_rollup import SalesDailyBranch, SalesDailyCategory, SalesDailyProduct
+from .inventory_movement import InventoryMovement, InventorySnapshot
+from .low_stock import LowStockItem
+from .idempotency_key import IdempotencyKey
 
 __all__ = [
     "Base",
@@ -18,5 +23,13 @@ __all__ = [
     "Inventory",
     "Client",
     "Sale",
-    "SaleDetail"
+    "SaleDetail",
+    "InvoiceCounter",
+    "SalesDailyBranch",
+    "SalesDailyCategory",
+    "SalesDailyProduct",
+    "InventoryMovement",
+    "InventorySnapshot",
+    "LowStockItem",
+    "IdempotencyKey"
 ]
\ No newline at end of file
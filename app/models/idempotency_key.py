@@ -0,0 +1,23 @@
+# models/idempotency_key.py
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from .base import Base
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("caller", "method", "path", "idempotency_key", name="uq_idempotency_keys_caller_key"),
+    )
+
+    # Una fila por Idempotency-Key de cada usuario; status_code NULL = petición en curso
+    id = Column(Integer, primary_key=True)
+    caller = Column(String(80), nullable=False)  # "uid:<user_id>" o huella del header Authorization
+    method = Column(String(10), nullable=False)
+    path = Column(String(500), nullable=False)
+    idempotency_key = Column(String(255), nullable=False)
+    fingerprint = Column(String(64), nullable=False)  # sha256 del cuerpo
+    status_code = Column(Integer)
+    headers = Column(JSON)
+    body = Column(LargeBinary)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime, server_default=func.now())
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Numeric, Integer, ForeignKey, DateTime, func, UniqueConstraint
+from sqlalchemy import Column, Numeric, Integer, ForeignKey, DateTime, func, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -16,4 +16,5 @@ class Inventory(Base):
 
     __table_args__ = (
         UniqueConstraint('product_id', 'branch_id', name='_inventory_product_branch_uc'),
+        Index('ix_inventory_branch_product', 'branch_id', 'product_id'),
     )
@@ -0,0 +1,37 @@
+# models/inventory_movement.py
+from sqlalchemy import Column, Integer, BigInteger, String, Numeric, DateTime, Index
+from .base import Base
+
+# Libro de movimientos de inventario (solo se agregan filas) y fotos periódicas del
+# stock por sucursal. En Postgres inventory_movements está particionada por mes
+# (RANGE sobre created_at, ver migración inventory_ledger); ahí la clave primaria
+# es (movement_id, created_at).
+
+class InventoryMovement(Base):
+    __tablename__ = "inventory_movements"
+
+    movement_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    branch_id = Column(Integer, nullable=False)
+    quantity_delta = Column(Numeric(12, 3), nullable=False)
+    movement_type = Column(String(20), nullable=False)  # SALE, PURCHASE, ADJUSTMENT, ASSIGNMENT, IMPORT
+    reference_id = Column(Integer)  # sale_id / order_id según el tipo
+    user_id = Column(Integer)
+
+    __table_args__ = (
+        Index("ix_inventory_movements_branch_created", "branch_id", "created_at"),
+    )
+
+class InventorySnapshot(Base):
+    __tablename__ = "inventory_snapshots"
+
+    snapshot_id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    branch_id = Column(Integer, nullable=False)
+    product_id = Column(Integer, nullable=False)
+    quantity = Column(Numeric(14, 3), nullable=False)
+    taken_at = Column(DateTime, nullable=False)  # Incluye los movimientos con created_at <= taken_at
+
+    __table_args__ = (
+        Index("ix_inventory_snapshots_branch_taken", "branch_id", "taken_at", "product_id"),
+    )
@@ -0,0 +1,11 @@
+# models/invoice_counter.py
+from sqlalchemy import Column, Integer, BigInteger, Date, ForeignKey
+from .base import Base
+
+class InvoiceCounter(Base):
+    __tablename__ = "invoice_counters"
+
+    # Un contador por sucursal y por día; last_value es el último número ya reservado
+    branch_id = Column(Integer, ForeignKey("branches.branch_id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    last_value = Column(BigInteger, nullable=False, default=0)
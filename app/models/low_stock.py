@@ -0,0 +1,15 @@
+# models/low_stock.py
+from sqlalchemy import Column, Integer, Numeric, DateTime
+from .base import Base
+
+# Pares (sucursal, producto) con stock por debajo de min_stock. Se mantiene en la
+# misma transacción que cambia el inventario (ver app.utils.low_stock).
+
+class LowStockItem(Base):
+    __tablename__ = "low_stock_items"
+
+    branch_id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, primary_key=True, index=True)
+    quantity = Column(Numeric(10, 3), nullable=False)
+    min_stock = Column(Integer, nullable=False)
+    since = Column(DateTime, nullable=False)  # Desde cuándo está por debajo del mínimo
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, String, Numeric, Integer, ForeignKey, Boolean, func
-from sqlalchemy.orm import relationship, Session
+from sqlalchemy import Column, String, Numeric, Integer, ForeignKey, Boolean, Text, Index, DateTime, func
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, Session, deferred
 from typing import Optional
 from .base import Base
 from .inventory import Inventory  # Import the Inventory model
@@ -18,7 +19,14 @@ class Product(Base):
     cost = Column(Numeric(10, 2))
     min_stock = Column(Integer, default=5)
     is_active = Column(Boolean, default=True)
-    
+    # Los índices en memoria de cada worker (barcode_index) releen lo modificado desde su último refresco
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), index=True)
+    # Mantenida por el trigger products_search_vector_update (migración product_search)
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite")))
+
+    __table_args__ = (
+        Index("ix_products_name_product_id", "name", "product_id"),  # Paginación por clave
+    )
 
     category = relationship("Category", back_populates="products")
     inventory_items = relationship("Inventory", back_populates="product")
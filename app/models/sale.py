@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Numeric, Integer, String, ForeignKey, DateTime, Boolean
+from sqlalchemy import Column, Numeric, Integer, String, ForeignKey, DateTime, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .base import Base
 from datetime import datetime
@@ -17,6 +17,12 @@ class Sale(Base):
     total = Column(Numeric(12, 2), nullable=False)
     payment_method_id = Column(Integer, ForeignKey("payment_methods.payment_method_id"))
     status = Column(String(20), default="COMPLETADA")
+    client_uuid = Column(String(36), nullable=True)  # UUID de la caja para ventas sincronizadas fuera de línea
+
+    __table_args__ = (
+        Index("ix_sales_sale_date_sale_id", "sale_date", "sale_id"),  # Paginación por clave
+        UniqueConstraint("client_uuid", name="uq_sales_client_uuid"),  # Reenvíos de la misma venta
+    )
 
     client = relationship("Client", back_populates="sales", lazy="joined")
     user = relationship("User", back_populates="sales")
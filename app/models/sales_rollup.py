@@ -0,0 +1,34 @@
+# models/sales_rollup.py
+from sqlalchemy import Column, Integer, Date, Numeric
+from .base import Base
+
+# Resúmenes diarios de ventas, mantenidos por create_sale y reconstruibles
+# con scripts/backfill_sales_rollups.py
+
+class SalesDailyBranch(Base):
+    __tablename__ = "sales_daily_branch"
+
+    day = Column(Date, primary_key=True)
+    branch_id = Column(Integer, primary_key=True)
+    sales_count = Column(Integer, nullable=False, default=0)
+    subtotal = Column(Numeric(14, 2), nullable=False, default=0)
+    discount = Column(Numeric(14, 2), nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+
+class SalesDailyCategory(Base):
+    __tablename__ = "sales_daily_category"
+
+    day = Column(Date, primary_key=True)
+    branch_id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, primary_key=True)  # 0 = producto sin categoría
+    quantity = Column(Numeric(14, 3), nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
+
+class SalesDailyProduct(Base):
+    __tablename__ = "sales_daily_product"
+
+    day = Column(Date, primary_key=True)
+    branch_id = Column(Integer, primary_key=True)
+    product_id = Column(Integer, primary_key=True, index=True)
+    quantity = Column(Numeric(14, 3), nullable=False, default=0)
+    total = Column(Numeric(14, 2), nullable=False, default=0)
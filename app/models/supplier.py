@@ -64,6 +64,7 @@ class PurchaseOrderItem(Base):
     order_id = Column(Integer, ForeignKey("purchase_orders.order_id"))
     product_id = Column(Integer, ForeignKey("products.product_id"))
     quantity = Column(Numeric(10, 2), nullable=False)
+    received_quantity = Column(Numeric(10, 2), nullable=False, default=0)  # Total recibido hasta ahora
     unit_cost = Column(Numeric(10, 2), nullable=False)
     
     # Relaciones
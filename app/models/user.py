@@ -13,6 +13,7 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
     role_id = Column(Integer, ForeignKey("roles.role_id"))
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")  # Se incrementa para revocar tokens
 
     role = relationship("Role", back_populates="users")
     sales = relationship("Sale", back_populates="user")
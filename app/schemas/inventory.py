@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
+from typing import Optional
 
 class InventoryBase(BaseModel):
     product_id: int
@@ -15,3 +16,13 @@ class InventoryOut(InventoryBase):
 
     class Config:
         from_attributes = True
+
+class LowStockItemOut(BaseModel):
+    branch_id: int
+    product_id: int
+    product_name: str
+    barcode: Optional[str] = None
+    quantity: float
+    min_stock: int
+    shortage: float
+    since: datetime
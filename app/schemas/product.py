@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List
 from .unit_type import UnitTypeOut  # importa el nuevo esquema
 
@@ -28,6 +28,40 @@ class ProductOut(ProductBase):
     model_config = ConfigDict(from_attributes=True) 
 
 
+class InventoryStockOut(BaseModel):
+    branch_id: int
+    branch_name: Optional[str] = None
+    quantity: float
+
+# Producto del catálogo con stock agregado en SQL (se valida directamente desde las filas)
+class ProductCatalogItem(ProductOut):
+    stock: float = 0
+    inventory_items: List[InventoryStockOut] = []
+
+class ProductCatalogPage(BaseModel):
+    items: List[ProductCatalogItem]
+    total: Optional[int] = None
+    total_estimated: bool = False
+    skip: int
+    limit: int
+    next_cursor: Optional[str] = None
+
+class BarcodeBatchRequest(BaseModel):
+    barcodes: List[str] = Field(..., max_length=1000)
+
+class BarcodeBatchOut(BaseModel):
+    items: List[ProductOut]  # En el orden pedido, sin repetidos
+    missing: List[str]
+
+
+class ProductInventoryAssignments(BaseModel):
+    product_id: int
+    inventory_assignments: List[InventoryAssignment]
+
+class BulkInventoryRequest(BaseModel):
+    products: List[ProductInventoryAssignments] = Field(..., max_length=5000)
+
+
 class ProductUpdate(BaseModel):
 
     barcode: Optional[str] = None
@@ -3,7 +3,7 @@ from enum import Enum
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
 from typing import Optional, List
-from pydantic import field_validator
+from pydantic import Field, field_validator, model_validator
 
 class OrderStatus(str, Enum):
     PENDING = 'PENDING'
@@ -41,6 +41,7 @@ class PurchaseOrderCreate(BaseModel):
 class PurchaseOrderItemOut(PurchaseOrderItemBase):
     item_id: int
     order_id: int
+    received_quantity: float = 0
     
     class Config:
         from_attributes = True
@@ -58,6 +59,54 @@ class PurchaseOrderOut(BaseModel):
     
     model_config = ConfigDict(from_attributes=True)
 
+class GoodsReceiptLine(BaseModel):
+    item_id: Optional[int] = None
+    product_id: Optional[int] = None
+    received_quantity: float  # Total recibido de la línea, no el incremento
+
+    @field_validator('received_quantity')
+    def must_not_be_negative(cls, value):
+        if value < 0:
+            raise ValueError('No puede ser negativo')
+        return value
+
+    @model_validator(mode='after')
+    def item_or_product(self):
+        if (self.item_id is None) == (self.product_id is None):
+            raise ValueError('Indique item_id o product_id')
+        return self
+
+class GoodsReceipt(BaseModel):
+    items: List[GoodsReceiptLine] = Field(..., min_length=1, max_length=5000)
+
+class GoodsReceiptLineOut(BaseModel):
+    item_id: int
+    product_id: int
+    quantity: float
+    received_quantity: float
+    delta: float
+
+class GoodsReceiptOut(BaseModel):
+    order_id: int
+    status: str
+    lines: List[GoodsReceiptLineOut]
+
 class OrderStatusUpdate(BaseModel):
     status: OrderStatus
-    notes: Optional[str] = None
\ No newline at end of file
+    notes: Optional[str] = None
+
+class ReorderSuggestionItem(PurchaseOrderItemBase):
+    stock: float
+    on_order: float
+    daily_velocity: float
+    reorder_point: float
+    lead_time_days: int
+
+class ReorderDraft(BaseModel):
+    supplier_id: int
+    branch_id: int
+    status: str
+    expected_delivery_date: datetime
+    total_amount: float
+    notes: Optional[str] = None
+    items: List[ReorderSuggestionItem]
@@ -4,6 +4,7 @@ from .product import ProductOut
 from .client import ClientOut
 from .payment_method import PaymentMethodOut  # Import PaymentMethodOut from the appropriate module
 from typing import List, Optional
+from uuid import UUID
 from decimal import Decimal
 from .branch import BranchOut  # Import BranchOut from the appropriate module
 
@@ -32,6 +33,25 @@ class SaleCreate(SaleBase):
     items: List[SaleDetailCreate]  # Lista de detalles de venta, cada uno de tipo SaleDetailCreate
     discount: Optional[float] = 0.0  # El descuento total, también opcional
 
+class SaleSyncItem(SaleCreate):
+    """Venta registrada en la caja sin conexión, identificada por su UUID"""
+    client_uuid: UUID
+    sale_date: Optional[datetime] = None  # Hora de la venta en la caja (por defecto, la de sincronización)
+
+class SaleSyncResult(BaseModel):
+    index: int  # Posición en el lote
+    client_uuid: Optional[str] = None
+    status: str  # CREATED, DUPLICATE o REJECTED
+    sale_id: Optional[int] = None
+    invoice_number: Optional[str] = None
+    error: Optional[str] = None
+
+class SaleSyncOut(BaseModel):
+    created: int
+    duplicates: int
+    rejected: int
+    results: List[SaleSyncResult]
+
 class SaleOut(SaleBase):
     sale_id: int
     user_id: int
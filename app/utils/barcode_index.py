@@ -0,0 +1,141 @@
+# utils/barcode_index.py
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.product import Product
+from app.schemas.product import ProductOut
+
+IN_CHUNK_SIZE = 10000  # SQLite limita la cantidad de parámetros por consulta
+
+class BarcodeIndex:
+    """
+    Código de barras -> producto activo (ya serializado como ProductOut), en memoria
+    del proceso. Se carga al iniciar y se actualiza desde crud.product; un código que
+    no está se busca en la base (p. ej. producto creado por otro worker) y se agrega.
+    Los cambios hechos por otros workers o por la importación masiva se leen cada
+    `refresh_seconds`: una consulta por products.updated_at desde el último refresco
+    (con `overlap_seconds` de margen para transacciones que confirmaron tarde).
+    """
+
+    def __init__(self, refresh_seconds: float = 5, overlap_seconds: float = 60):
+        self.refresh_seconds = refresh_seconds
+        self.overlap_seconds = overlap_seconds
+        self._lock = threading.Lock()
+        self._products = {}  # barcode -> dict de ProductOut
+        self._barcodes = {}  # product_id -> barcode (para cambios de código)
+        self._watermark = None  # Mayor products.updated_at leído
+        self._checked_at = 0.0
+        self.loaded = False
+
+    def load(self, db: Session):
+        watermark = db.query(func.max(Product.updated_at)).scalar()
+        products = db.query(Product).filter(Product.is_active == True).all()
+        entries = [self._entry(product) for product in products]
+        with self._lock:
+            self._products = {entry["barcode"]: entry for entry in entries}
+            self._barcodes = {entry["product_id"]: entry["barcode"] for entry in entries}
+            self._watermark = watermark
+            self._checked_at = time.monotonic()
+            self.loaded = True
+
+    def refresh_changes(self, db: Session):
+        """Aplica los productos modificados desde el último refresco (incluye los desactivados)"""
+        self._checked_at = time.monotonic()  # Un solo hilo consulta por intervalo
+        query = db.query(Product)
+        if self._watermark is not None:
+            query = query.filter(Product.updated_at >= self._watermark - timedelta(seconds=self.overlap_seconds))
+        products = query.all()
+        entries = [self._entry(product) for product in products if product.is_active]
+        inactive = [product.product_id for product in products if not product.is_active]
+        watermark = max((product.updated_at for product in products if product.updated_at is not None),
+                        default=self._watermark)
+        with self._lock:
+            for entry in entries:
+                self._put(entry)
+            for product_id in inactive:
+                self._pop(product_id)
+            if watermark is not None and (self._watermark is None or watermark > self._watermark):
+                self._watermark = watermark
+
+    @staticmethod
+    def _entry(product) -> dict:
+        return ProductOut.model_validate(product).model_dump()
+
+    def _put(self, entry: dict):
+        old_barcode = self._barcodes.get(entry["product_id"])
+        if old_barcode is not None and old_barcode != entry["barcode"]:
+            self._products.pop(old_barcode, None)
+        self._products[entry["barcode"]] = entry
+        self._barcodes[entry["product_id"]] = entry["barcode"]
+
+    def upsert(self, product):
+        if not self.loaded:
+            return
+        if not product.is_active:
+            self.remove(product.product_id)
+            return
+        entry = self._entry(product)
+        with self._lock:
+            self._put(entry)
+
+    def _pop(self, product_id: int):
+        barcode = self._barcodes.pop(product_id, None)
+        if barcode is not None:
+            self._products.pop(barcode, None)
+
+    def remove(self, product_id: int):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._pop(product_id)
+
+    def get(self, db: Session, barcode: str) -> Optional[dict]:
+        return self.get_many(db, [barcode]).get(barcode)
+
+    def get_many(self, db: Session, barcodes: Iterable[str]) -> Dict[str, dict]:
+        """Productos encontrados por código; los que no están en memoria se buscan en una consulta"""
+        if not self.loaded:
+            self.load(db)
+        elif time.monotonic() - self._checked_at > self.refresh_seconds:
+            self.refresh_changes(db)
+        found = {}
+        missing = []
+        products = self._products
+        for barcode in barcodes:
+            entry = products.get(barcode)
+            if entry is not None:
+                found[barcode] = entry
+            else:
+                missing.append(barcode)
+        if missing:
+            found.update(self._load_missing(db, missing))
+        return found
+
+    def _load_missing(self, db: Session, barcodes: List[str]) -> Dict[str, dict]:
+        found = {}
+        unique = list(dict.fromkeys(barcodes))
+        for start in range(0, len(unique), IN_CHUNK_SIZE):
+            chunk = unique[start:start + IN_CHUNK_SIZE]
+            products = db.query(Product).filter(
+                Product.barcode.in_(chunk), Product.is_active == True
+            ).all()
+            for product in products:
+                found[product.barcode] = self._entry(product)
+        with self._lock:
+            for entry in found.values():
+                self._put(entry)
+        return found
+
+    def stats(self) -> dict:
+        return {"loaded": self.loaded, "products": len(self._products)}
+
+barcode_index = BarcodeIndex(
+    refresh_seconds=settings.BARCODE_INDEX_REFRESH_SECONDS,
+    overlap_seconds=settings.BARCODE_INDEX_REFRESH_OVERLAP_SECONDS
+)
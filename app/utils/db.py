@@ -0,0 +1,11 @@
+# utils/db.py
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+def dialect_insert(bind):
+    """Devuelve el INSERT del dialecto en uso (necesario para ON CONFLICT)"""
+    if isinstance(bind, Session):
+        bind = bind.get_bind()
+    if bind.dialect.name == "sqlite":
+        return sqlite.insert
+    return postgresql.insert
@@ -0,0 +1,234 @@
+# utils/idempotency.py
+import asyncio
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional, Tuple
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from sqlalchemy.exc import IntegrityError
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.idempotency_key import IdempotencyKey
+from app.utils.security import decode_access_token
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+MAX_KEY_LENGTH = 255
+# Respuestas que dependen del token y no del resultado de la operación
+UNSTORED_STATUS = {401, 403}
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """Respuesta guardada tal cual se envió: estado, headers crudos y cuerpo"""
+    status_code: int
+    headers: tuple
+    body: bytes
+
+    def to_response(self) -> Response:
+        response = Response(content=self.body, status_code=self.status_code)
+        response.raw_headers = list(self.headers) + [(REPLAYED_HEADER.lower().encode(), b"true")]
+        return response
+
+class IdempotencyStore:
+    """
+    Claves guardadas en la tabla idempotency_keys, compartida por todos los workers
+    y réplicas: la restricción única (caller, method, path, idempotency_key) decide
+    quién ejecuta la operación. Mientras la primera petición está en curso la fila
+    no tiene status_code y vence a los `lease_seconds` (un worker caído no bloquea
+    la clave para siempre); al terminar guarda la respuesta por `ttl_seconds`, o
+    por `error_ttl_seconds` si es un 4xx, que depende del estado del momento (p. ej.
+    stock insuficiente) y no debe repetirse una vez que cambió.
+    """
+
+    def __init__(self, ttl_seconds: float, error_ttl_seconds: float, lease_seconds: float,
+                 purge_interval_seconds: float = 60, session_factory=None):
+        self.ttl_seconds = ttl_seconds
+        self.error_ttl_seconds = error_ttl_seconds
+        self.lease_seconds = lease_seconds
+        self.purge_interval_seconds = purge_interval_seconds
+        self.session_factory = session_factory or SessionLocal
+        self._next_purge = 0.0
+        self.replays = 0
+        self.coalesced = 0
+
+    def ttl_for(self, status_code: int) -> float:
+        return self.error_ttl_seconds if status_code >= 400 else self.ttl_seconds
+
+    @staticmethod
+    def _filter(query, key: tuple):
+        caller, method, path, idempotency_key = key
+        return query.filter(
+            IdempotencyKey.caller == caller, IdempotencyKey.method == method,
+            IdempotencyKey.path == path, IdempotencyKey.idempotency_key == idempotency_key
+        )
+
+    def begin(self, key: tuple, fingerprint: str) -> Tuple[str, object]:
+        """
+        Devuelve ("replay", StoredResponse), ("wait", None) si hay una petición igual
+        en curso, ("mismatch", None) si la clave se usó con otro cuerpo o ("run", id):
+        quien lo recibe ejecuta la operación y llama a finish con ese id.
+        """
+        caller, method, path, idempotency_key = key
+        self._purge_expired()
+        db = self.session_factory()
+        try:
+            while True:
+                now = datetime.utcnow()
+                row = IdempotencyKey(
+                    caller=caller, method=method, path=path, idempotency_key=idempotency_key,
+                    fingerprint=fingerprint, expires_at=now + timedelta(seconds=self.lease_seconds)
+                )
+                db.add(row)
+                try:
+                    db.commit()
+                    return "run", row.id
+                except IntegrityError:
+                    db.rollback()
+                entry = self._filter(db.query(IdempotencyKey), key).first()
+                if entry is None:
+                    continue  # Se borró entre el INSERT y la lectura
+                if entry.expires_at < now:
+                    # Vencida (o petición abandonada): se borra solo si nadie la tomó antes
+                    db.query(IdempotencyKey).filter(
+                        IdempotencyKey.id == entry.id, IdempotencyKey.expires_at == entry.expires_at
+                    ).delete(synchronize_session=False)
+                    db.commit()
+                    # El DELETE no sincroniza la sesión: sin esto el INSERT del reintento choca
+                    # con la entrada vieja en el identity map (SAWarning)
+                    db.expunge(entry)
+                    continue
+                if entry.fingerprint != fingerprint:
+                    return "mismatch", None
+                if entry.status_code is None:
+                    self.coalesced += 1
+                    return "wait", None
+                self.replays += 1
+                headers = tuple((name.encode("latin-1"), value.encode("latin-1"))
+                                for name, value in entry.headers or [])
+                return "replay", StoredResponse(entry.status_code, headers, bytes(entry.body or b""))
+        finally:
+            db.close()
+
+    def finish(self, row_id: int, stored: Optional[StoredResponse]):
+        """Guarda la respuesta (None = borrar la clave: el siguiente reintento se ejecuta)"""
+        db = self.session_factory()
+        try:
+            # Solo la fila tomada por esta petición; si venció y otra la reemplazó, no se toca
+            query = db.query(IdempotencyKey).filter(
+                IdempotencyKey.id == row_id, IdempotencyKey.status_code.is_(None)
+            )
+            if stored is None:
+                query.delete(synchronize_session=False)
+            else:
+                query.update({
+                    IdempotencyKey.status_code: stored.status_code,
+                    IdempotencyKey.headers: [[name.decode("latin-1"), value.decode("latin-1")]
+                                             for name, value in stored.headers],
+                    IdempotencyKey.body: stored.body,
+                    IdempotencyKey.expires_at: datetime.utcnow() + timedelta(seconds=self.ttl_for(stored.status_code))
+                }, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def _purge_expired(self):
+        # Cada worker borra las claves vencidas como mucho una vez por intervalo
+        if time.monotonic() < self._next_purge:
+            return
+        self._next_purge = time.monotonic() + self.purge_interval_seconds
+        db = self.session_factory()
+        try:
+            db.query(IdempotencyKey).filter(IdempotencyKey.expires_at < datetime.utcnow()) \
+                .delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        return {"replays": self.replays, "coalesced": self.coalesced}
+
+idempotency_store = IdempotencyStore(
+    ttl_seconds=settings.IDEMPOTENCY_TTL_SECONDS,
+    error_ttl_seconds=settings.IDEMPOTENCY_ERROR_TTL_SECONDS,
+    lease_seconds=settings.IDEMPOTENCY_LEASE_SECONDS
+)
+
+def _caller(request: Request) -> str:
+    """Usuario del token si es válido; si no, el header tal cual (nunca coincide con otro usuario)"""
+    authorization = request.headers.get("authorization", "")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() == "bearer" and token:
+        try:
+            return f"uid:{decode_access_token(token)['uid']}"
+        except HTTPException:
+            pass
+    return "auth:" + hashlib.sha256(authorization.encode()).hexdigest()
+
+def _stored(response: Response) -> Optional[StoredResponse]:
+    body = getattr(response, "body", None)
+    if body is None or response.status_code >= 500 or response.status_code in UNSTORED_STATUS:
+        return None
+    return StoredResponse(response.status_code, tuple(response.raw_headers), bytes(body))
+
+class IdempotentRoute(APIRoute):
+    """
+    Rutas que aceptan el header Idempotency-Key en POST/PUT/PATCH/DELETE: el
+    reintento con la misma clave y el mismo cuerpo recibe la respuesta guardada
+    (con Idempotent-Replayed: true) sin resolver las dependencias de la ruta, y
+    los duplicados concurrentes (de este u otro worker) esperan a la primera.
+    Se usa con APIRouter(route_class=IdempotentRoute).
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def idempotent_handler(request: Request) -> Response:
+            idempotency_key = request.headers.get(IDEMPOTENCY_HEADER)
+            if idempotency_key is None or request.method not in MUTATING_METHODS:
+                return await handler(request)
+            if not idempotency_key or len(idempotency_key) > MAX_KEY_LENGTH:
+                return JSONResponse(
+                    status_code=400,
+                    content={"detail": f"{IDEMPOTENCY_HEADER} debe tener entre 1 y {MAX_KEY_LENGTH} caracteres"}
+                )
+
+            # La verificación del token puede recargar las revocaciones desde la base
+            key = (await run_in_threadpool(_caller, request), request.method, request.url.path, idempotency_key)
+            fingerprint = hashlib.sha256(await request.body()).hexdigest()
+            while True:
+                state, value = await run_in_threadpool(idempotency_store.begin, key, fingerprint)
+                if state == "run":
+                    break
+                if state == "mismatch":
+                    return JSONResponse(
+                        status_code=422,
+                        content={"detail": f"{IDEMPOTENCY_HEADER} ya se usó con otro cuerpo"}
+                    )
+                if state == "replay":
+                    return value.to_response()
+                # Duplicado concurrente: la primera petición puede estar en otro worker,
+                # así que se consulta la tabla hasta que guarde la respuesta o la libere
+                await asyncio.sleep(settings.IDEMPOTENCY_POLL_SECONDS)
+
+            stored = None
+            try:
+                response = await handler(request)
+                stored = _stored(response)
+                return response
+            except HTTPException as e:
+                if e.status_code < 500 and e.status_code not in UNSTORED_STATUS:
+                    error = JSONResponse(status_code=e.status_code, content={"detail": e.detail},
+                                         headers=e.headers)
+                    stored = _stored(error)
+                raise
+            finally:
+                await run_in_threadpool(idempotency_store.finish, value, stored)
+
+        return idempotent_handler
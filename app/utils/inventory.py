@@ -1,5 +1,48 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import update, delete, case, func, insert
 from sqlalchemy.orm import Session
 from ..models.inventory import Inventory
+from ..models.inventory_movement import InventoryMovement
+from .db import dialect_insert
+from .low_stock import refresh_low_stock
+
+QUANTITY_STEP = Decimal("0.001")  # Escala de Inventory.quantity
+
+# Tipos de movimiento del libro de inventario
+SALE = "SALE"
+PURCHASE = "PURCHASE"
+ADJUSTMENT = "ADJUSTMENT"
+ASSIGNMENT = "ASSIGNMENT"
+IMPORT = "IMPORT"
+
+def record_movements(db: Session, movements: List[dict]):
+    """
+    Agrega movimientos al libro de inventario en un solo INSERT, dentro de la
+    transacción que modifica Inventory. Cada movimiento es un dict con product_id,
+    branch_id, quantity_delta y movement_type (reference_id y user_id opcionales).
+    Se llama después de modificar el stock para que created_at sea posterior
+    a los bloqueos de las filas de inventario; también actualiza la lista de
+    stock bajo de los pares tocados.
+    """
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "created_at": created_at,
+            "product_id": movement["product_id"],
+            "branch_id": movement["branch_id"],
+            "quantity_delta": movement["quantity_delta"],
+            "movement_type": movement["movement_type"],
+            "reference_id": movement.get("reference_id"),
+            "user_id": movement.get("user_id"),
+        }
+        for movement in movements
+        if movement["quantity_delta"]
+    ]
+    if rows:
+        db.execute(insert(InventoryMovement), rows)
+        refresh_low_stock(db, {(row["product_id"], row["branch_id"]) for row in rows})
 
 def update_inventory_on_sale(db: Session, product_id: int, branch_id: int, quantity: float):
     inventory = db.query(Inventory).filter(
@@ -9,7 +52,149 @@ def update_inventory_on_sale(db: Session, product_id: int, branch_id: int, quant
     
     if inventory:
         inventory.quantity -= quantity
+        record_movements(db, [{
+            "product_id": product_id, "branch_id": branch_id,
+            "quantity_delta": -Decimal(str(quantity)), "movement_type": SALE
+        }])
         db.commit()
         db.refresh(inventory)
         return inventory
-    return None
\ No newline at end of file
+    return None
+
+def lock_inventory_rows(db: Session, branch_id: int, product_ids: Iterable[int]) -> Dict[int, Decimal]:
+    """
+    Bloquea con un solo SELECT ... FOR UPDATE las filas de inventario de la sucursal.
+    Las filas se bloquean en orden de product_id para que dos cajas que venden
+    los mismos productos no se bloqueen mutuamente (deadlock).
+    """
+    rows = db.query(Inventory.product_id, Inventory.quantity).filter(
+        Inventory.branch_id == branch_id,
+        Inventory.product_id.in_(list(product_ids))
+    ).order_by(Inventory.product_id).with_for_update().all()
+    return {row.product_id: row.quantity for row in rows}
+
+def decrement_inventory(db: Session, branch_id: int, quantities: Dict[int, Decimal],
+                        reference_id: Optional[int] = None, user_id: Optional[int] = None):
+    """Descuenta el stock de todos los productos de la sucursal en un solo UPDATE (y lo registra)"""
+    decrement_inventory_many(db, branch_id, {reference_id: quantities}, user_id=user_id)
+
+def decrement_inventory_many(db: Session, branch_id: int, quantities_by_reference: Dict[Optional[int], Dict[int, Decimal]],
+                             user_id: Optional[int] = None):
+    """
+    Descuenta varias ventas de la misma sucursal con un solo UPDATE por los
+    totales de cada producto; el libro recibe un movimiento por venta y producto.
+    """
+    totals = {}
+    for quantities in quantities_by_reference.values():
+        for product_id, quantity in quantities.items():
+            totals[product_id] = totals.get(product_id, Decimal("0")) + quantity
+    if not totals:
+        return
+    db.execute(
+        update(Inventory)
+        .where(
+            Inventory.branch_id == branch_id,
+            Inventory.product_id.in_(list(totals))
+        )
+        .values(quantity=Inventory.quantity - case(totals, value=Inventory.product_id))
+        .execution_options(synchronize_session=False)
+    )
+    record_movements(db, [
+        {"product_id": product_id, "branch_id": branch_id, "quantity_delta": -quantity,
+         "movement_type": SALE, "reference_id": reference_id, "user_id": user_id}
+        for reference_id, quantities in quantities_by_reference.items()
+        for product_id, quantity in quantities.items()
+    ])
+
+def increment_inventory(db: Session, branch_id: int, quantities: Dict[int, Decimal],
+                        movement_type: str = PURCHASE, reference_id: Optional[int] = None,
+                        user_id: Optional[int] = None):
+    """
+    Suma stock a los productos de la sucursal en un solo INSERT ... ON CONFLICT
+    (product_id, branch_id) DO UPDATE: crea las filas que falten y suma a las
+    existentes. Las filas van en orden de product_id, como en lock_inventory_rows.
+    No hace commit.
+    """
+    if not quantities:
+        return
+    statement = dialect_insert(db)(Inventory).values([
+        {"product_id": product_id, "branch_id": branch_id, "quantity": quantity}
+        for product_id, quantity in sorted(quantities.items())
+    ])
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["product_id", "branch_id"],
+        set_={"quantity": Inventory.quantity + statement.excluded.quantity, "last_updated": func.now()}
+    ))
+    record_movements(db, [
+        {"product_id": product_id, "branch_id": branch_id, "quantity_delta": quantity,
+         "movement_type": movement_type, "reference_id": reference_id, "user_id": user_id}
+        for product_id, quantity in quantities.items()
+    ])
+
+def set_inventory_assignments(db: Session, assignments: Dict[int, Dict[int, float]],
+                              user_id: Optional[int] = None) -> Dict[str, int]:
+    """
+    Deja el inventario de cada producto de `assignments` ({product_id: {branch_id: cantidad}})
+    exactamente como se indica comparando con lo que ya hay: un INSERT para las
+    sucursales nuevas, un UPDATE para las cantidades que cambian y un DELETE para las
+    sucursales que ya no están. Las filas sin cambios no se tocan. No hace commit.
+    """
+    if not assignments:
+        return {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0}
+
+    # Mismo orden de bloqueo que lock_inventory_rows
+    current = db.query(Inventory.inventory_id, Inventory.product_id, Inventory.branch_id, Inventory.quantity) \
+        .filter(Inventory.product_id.in_(list(assignments))) \
+        .order_by(Inventory.product_id, Inventory.branch_id) \
+        .with_for_update().all()
+    existing = {(row.product_id, row.branch_id): row for row in current}
+
+    new_rows = []
+    changed = {}
+    unchanged = 0
+    movements = []
+    for product_id, branches in assignments.items():
+        for branch_id, quantity in branches.items():
+            quantity = Decimal(str(quantity)).quantize(QUANTITY_STEP)
+            row = existing.get((product_id, branch_id))
+            if row is None:
+                new_rows.append({"product_id": product_id, "branch_id": branch_id, "quantity": quantity})
+                delta = quantity
+            elif row.quantity != quantity:
+                changed[row.inventory_id] = quantity
+                delta = quantity - row.quantity
+            else:
+                unchanged += 1
+                continue
+            movements.append({"product_id": product_id, "branch_id": branch_id, "quantity_delta": delta})
+    removed = []
+    for row in current:
+        if row.branch_id not in assignments[row.product_id]:
+            removed.append(row.inventory_id)
+            movements.append({"product_id": row.product_id, "branch_id": row.branch_id,
+                              "quantity_delta": -row.quantity})
+
+    if new_rows:
+        # ON CONFLICT sobre _inventory_product_branch_uc por si otra transacción insertó la fila
+        statement = dialect_insert(db)(Inventory)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["product_id", "branch_id"],
+            set_={"quantity": statement.excluded.quantity, "last_updated": func.now()}
+        ), new_rows)
+    if changed:
+        db.execute(
+            update(Inventory)
+            .where(Inventory.inventory_id.in_(list(changed)))
+            .values(quantity=case(changed, value=Inventory.inventory_id), last_updated=func.now())
+            .execution_options(synchronize_session=False)
+        )
+    if removed:
+        db.execute(
+            delete(Inventory)
+            .where(Inventory.inventory_id.in_(removed))
+            .execution_options(synchronize_session=False)
+        )
+    for movement in movements:
+        movement.update(movement_type=ASSIGNMENT, user_id=user_id)
+    record_movements(db, movements)
+    return {"inserted": len(new_rows), "updated": len(changed), "deleted": len(removed), "unchanged": unchanged}
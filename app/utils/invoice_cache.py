@@ -0,0 +1,178 @@
+# utils/invoice_cache.py
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from app.config import settings
+from app.utils.pdf_generator import generate_invoice_pdf
+
+def sale_content_hash(sale) -> str:
+    """Hash de todo lo que se imprime en la factura: si cambia, cambia la clave"""
+    parts = [
+        sale.invoice_number,
+        sale.sale_date.isoformat() if sale.sale_date else "",
+        sale.branch.name if sale.branch else "",
+        sale.client.full_name if sale.client else "",
+        sale.client.ci_nit if sale.client else "",
+        sale.user.username if sale.user else "",
+        str(sale.subtotal), str(sale.discount), str(sale.total), str(sale.status)
+    ]
+    for detail in sale.details:
+        parts.extend([
+            detail.product.name if detail.product else str(detail.product_id),
+            str(detail.quantity), str(detail.unit_price),
+            str(detail.discount), str(detail.total_line)
+        ])
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+class MemoryInvoiceStore:
+    """Almacén en memoria con desalojo LRU por tamaño total"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes):
+        with self._lock:
+            if key in self._items:
+                self._size -= len(self._items.pop(key))
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+class DiskInvoiceStore:
+    """
+    Almacén en disco local con desalojo LRU por tamaño total.
+    El orden de uso se mantiene en memoria y se reconstruye al iniciar
+    a partir de la fecha de modificación de los archivos.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith(".pdf"):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        self._sizes = OrderedDict((key, size) for _, key, size in sorted(files))
+        self._size = sum(self._sizes.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            if key not in self._sizes:
+                return None
+            self._sizes.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+            return data
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._sizes.pop(key, 0)
+            return None
+
+    def put(self, key: str, data: bytes):
+        # Escribir en un temporal y renombrar para no servir archivos a medias
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self._path(key))
+
+        evicted = []
+        with self._lock:
+            self._size -= self._sizes.pop(key, 0)
+            self._sizes[key] = len(data)
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._sizes) > 1:
+                old_key, old_size = self._sizes.popitem(last=False)
+                self._size -= old_size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except FileNotFoundError:
+                pass
+
+class InvoiceCache:
+    """Cache de facturas PDF direccionado por contenido (sale_id + hash de la venta)"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.render_seconds = 0.0
+
+    def key_for(self, sale) -> str:
+        return f"{sale.sale_id}-{sale_content_hash(sale)[:32]}"
+
+    def etag_for(self, sale) -> str:
+        return f'"{self.key_for(sale)}"'
+
+    def get_or_render(self, sale, key: Optional[str] = None) -> bytes:
+        key = key or self.key_for(sale)
+        pdf_content = self.store.get(key)
+        if pdf_content is not None:
+            with self._lock:
+                self.hits += 1
+            return pdf_content
+
+        started = time.perf_counter()
+        pdf_content = generate_invoice_pdf(sale)
+        elapsed = time.perf_counter() - started
+        self.store.put(key, pdf_content)
+        with self._lock:
+            self.misses += 1
+            self.render_seconds += elapsed
+        return pdf_content
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            average_render = self.render_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "average_render_ms": average_render * 1000,
+                "render_seconds_saved": self.hits * average_render
+            }
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compara la cabecera If-None-Match (puede traer varias etiquetas o *) con la ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+def _default_store():
+    max_bytes = settings.INVOICE_CACHE_MAX_MB * 1024 * 1024
+    if settings.INVOICE_CACHE_BACKEND == "memory":
+        return MemoryInvoiceStore(max_bytes)
+    directory = settings.INVOICE_CACHE_DIR or os.path.join(tempfile.gettempdir(), "invoice_cache")
+    return DiskInvoiceStore(directory, max_bytes)
+
+invoice_cache = InvoiceCache(_default_store())
@@ -0,0 +1,235 @@
+# utils/jobs.py
+import json
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from functools import partial
+from typing import Optional
+
+from app.config import settings
+
+# Estados de un trabajo
+PENDING = "PENDING"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+def export_sales_to_file(params: dict, output_path: str):
+    """Genera el reporte de ventas (pdf o csv) en output_path"""
+    from app.database import SessionLocal
+    from app.crud.sale import iter_sales_for_export
+    from app.utils.pdf_generator import iter_sales_csv, build_sales_report_pdf
+
+    db = SessionLocal()
+    try:
+        with open(output_path, "wb") as output:
+            if params["format"] == "csv":
+                for chunk in iter_sales_csv(iter_sales_for_export(db, **params["filters"])):
+                    output.write(chunk.encode("utf-8"))
+            else:
+                build_sales_report_pdf(
+                    iter_sales_for_export(db, include_details=False, **params["filters"]),
+                    output
+                )
+    finally:
+        db.close()
+
+def render_invoice_to_file(params: dict, output_path: str):
+    """Genera la factura PDF de una venta en output_path"""
+    from app.database import SessionLocal
+    from app.crud.sale import get_sale_for_invoice
+    from app.utils.pdf_generator import generate_invoice_pdf
+
+    db = SessionLocal()
+    try:
+        sale = get_sale_for_invoice(db, params["sale_id"])
+        if not sale:
+            raise ValueError("Venta no encontrada")
+        with open(output_path, "wb") as output:
+            output.write(generate_invoice_pdf(sale))
+    finally:
+        db.close()
+
+JOB_TYPES = {
+    "sales_export": export_sales_to_file,
+    "invoice": render_invoice_to_file,
+}
+
+def run_job(job_type: str, params: dict, output_path: str):
+    """Punto de entrada en el proceso hijo: escribe en un temporal y lo renombra al terminar"""
+    tmp_path = f"{output_path}.tmp"
+    JOB_TYPES[job_type](params, tmp_path)
+    os.replace(tmp_path, output_path)
+
+class JobManager:
+    """
+    Cola de trabajos pesados (PDF, exportaciones) fuera de los workers de la API.
+
+    El estado de cada trabajo se guarda como JSON en `directory`, así cualquier
+    proceso de la API puede responder estado y descarga. Backends:
+      - "process": el proceso que recibe el pedido lo ejecuta en su pool de procesos.
+      - "broker": la API solo encola; scripts/job_worker.py reclama y ejecuta los trabajos.
+    Cada tipo de trabajo tiene su propio límite de trabajos simultáneos.
+    """
+
+    def __init__(self, directory: str, max_workers: int, limits: dict, backend: str = "process",
+                 ttl_hours: int = 24):
+        self.directory = directory
+        self.max_workers = max_workers
+        self.limits = limits
+        self.backend = backend
+        self.ttl_seconds = ttl_hours * 3600
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = defaultdict(deque)
+        self._running = defaultdict(int)
+        self._last_prune = 0.0
+        os.makedirs(directory, exist_ok=True)
+
+    # --- Estado en disco ---
+
+    def _job_file(self, job_id: str, suffix: str) -> str:
+        """Archivo del trabajo dentro de `directory`; ValueError si el ID intenta salir de él"""
+        directory = os.path.realpath(self.directory)
+        path = os.path.realpath(os.path.join(directory, f"{job_id}{suffix}"))
+        if not job_id or os.path.basename(job_id) != job_id or os.path.dirname(path) != directory:
+            raise ValueError("ID de trabajo inválido")
+        return path
+
+    def _state_path(self, job_id: str) -> str:
+        return self._job_file(job_id, ".json")
+
+    def result_path(self, job_id: str) -> str:
+        return self._job_file(job_id, ".out")
+
+    def _save(self, state: dict):
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._state_path(state["job_id"]))
+
+    def get(self, job_id: str) -> Optional[dict]:
+        try:
+            with open(self._state_path(job_id)) as f:
+                return json.load(f)
+        except (ValueError, FileNotFoundError):
+            # json.JSONDecodeError es un ValueError
+            return None
+
+    # --- Envío y ejecución ---
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            # spawn: cada hijo crea su propio engine en vez de heredar conexiones abiertas
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def submit(self, job_type: str, params: dict, filename: str, media_type: str,
+               user_id: Optional[int] = None) -> dict:
+        if job_type not in JOB_TYPES:
+            raise ValueError(f"Tipo de trabajo desconocido: {job_type}")
+        self._prune()
+
+        state = {
+            "job_id": uuid.uuid4().hex,
+            "job_type": job_type,
+            "params": params,
+            "status": PENDING,
+            "user_id": user_id,
+            "filename": filename,
+            "media_type": media_type,
+            "error": None,
+            "created_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None
+        }
+        self._save(state)
+        if self.backend == "process":
+            self._enqueue(state)
+        return state
+
+    def _enqueue(self, state: dict):
+        with self._lock:
+            self._pending[state["job_type"]].append(state)
+        self._start_next(state["job_type"])
+
+    def _start_next(self, job_type: str):
+        limit = self.limits.get(job_type, 1)
+        while True:
+            with self._lock:
+                if self._running[job_type] >= limit or not self._pending[job_type]:
+                    return
+                state = self._pending[job_type].popleft()
+                self._running[job_type] += 1
+
+            state["status"] = RUNNING
+            state["started_at"] = datetime.utcnow().isoformat()
+            self._save(state)
+            future = self.executor.submit(
+                run_job, job_type, state["params"], self.result_path(state["job_id"])
+            )
+            future.add_done_callback(partial(self._finished, state))
+
+    def _finished(self, state: dict, future):
+        error = future.exception()
+        state["status"] = FAILED if error else DONE
+        state["error"] = str(error) if error else None
+        state["finished_at"] = datetime.utcnow().isoformat()
+        self._save(state)
+        with self._lock:
+            self._running[state["job_type"]] -= 1
+        self._start_next(state["job_type"])
+
+    def claim_pending(self) -> int:
+        """Usado por el worker del backend broker: reclama los trabajos pendientes"""
+        claimed = 0
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".json"):
+                continue
+            state = self.get(name[:-5])
+            if not state or state["status"] != PENDING:
+                continue
+            try:
+                # O_EXCL garantiza que un solo worker se quede con el trabajo
+                os.close(os.open(os.path.join(self.directory, f"{state['job_id']}.claim"),
+                                 os.O_CREAT | os.O_EXCL))
+            except FileExistsError:
+                continue
+            self._enqueue(state)
+            claimed += 1
+        return claimed
+
+    def _prune(self):
+        """Elimina trabajos y resultados más viejos que el TTL (como mucho una vez por minuto)"""
+        now = time.time()
+        if now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                if now - os.path.getmtime(path) > self.ttl_seconds:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+job_manager = JobManager(
+    directory=settings.JOBS_DIR or os.path.join(tempfile.gettempdir(), "inventory_jobs"),
+    max_workers=settings.JOBS_MAX_WORKERS,
+    limits=settings.JOBS_CONCURRENCY,
+    backend=settings.JOBS_BACKEND
+)
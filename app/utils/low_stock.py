@@ -0,0 +1,166 @@
+# utils/low_stock.py
+import asyncio
+import json
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, delete, literal, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.inventory import Inventory
+from app.models.low_stock import LowStockItem
+from app.models.product import Product
+from app.utils.db import dialect_insert
+
+IN_CHUNK_SIZE = 5000  # Pares por consulta (límite de parámetros de SQLite)
+
+def _is_low():
+    return and_(
+        Product.is_active == True,
+        Product.min_stock.isnot(None),
+        Inventory.quantity < Product.min_stock
+    )
+
+def _chunks(items: list):
+    for start in range(0, len(items), IN_CHUNK_SIZE):
+        yield items[start:start + IN_CHUNK_SIZE]
+
+def refresh_low_stock(db: Session, pairs: Iterable[Tuple[int, int]]):
+    """
+    Actualiza low_stock_items para los pares (product_id, branch_id) cuyo inventario
+    cambió en la transacción en curso: una consulta por clave, un upsert de los que
+    están por debajo del mínimo y un DELETE de los que ya no. No hace commit.
+    """
+    pairs = set(pairs)
+    if not pairs:
+        return
+    db.flush()  # Cambios pendientes del ORM (autoflush está desactivado)
+    keys = list(pairs)
+    low_rows = []
+    for chunk in _chunks(keys):
+        low_rows += db.query(Inventory.product_id, Inventory.branch_id, Inventory.quantity, Product.min_stock) \
+            .join(Product, Product.product_id == Inventory.product_id) \
+            .filter(tuple_(Inventory.product_id, Inventory.branch_id).in_(chunk), _is_low()) \
+            .all()
+
+    if low_rows:
+        now = datetime.utcnow()
+        statement = dialect_insert(db)(LowStockItem)
+        # Si ya estaba en la lista se conserva `since`
+        db.execute(statement.on_conflict_do_update(
+            index_elements=["branch_id", "product_id"],
+            set_={"quantity": statement.excluded.quantity, "min_stock": statement.excluded.min_stock}
+        ), [
+            {"branch_id": row.branch_id, "product_id": row.product_id, "quantity": row.quantity,
+             "min_stock": row.min_stock, "since": now}
+            for row in low_rows
+        ])
+    cleared = list(pairs - {(row.product_id, row.branch_id) for row in low_rows})
+    for chunk in _chunks(cleared):
+        db.execute(
+            delete(LowStockItem)
+            .where(tuple_(LowStockItem.product_id, LowStockItem.branch_id).in_(chunk))
+            .execution_options(synchronize_session=False)
+        )
+
+def refresh_low_stock_products(db: Session, product_ids: Iterable[int]):
+    """Para cambios de min_stock o de is_active: todas las sucursales de los productos"""
+    product_ids = list(set(product_ids))
+    pairs = set()
+    for chunk in _chunks(product_ids):
+        pairs.update(db.query(Inventory.product_id, Inventory.branch_id)
+                     .filter(Inventory.product_id.in_(chunk)).all())
+        pairs.update(db.query(LowStockItem.product_id, LowStockItem.branch_id)
+                     .filter(LowStockItem.product_id.in_(chunk)).all())
+    refresh_low_stock(db, pairs)
+
+def rebuild_low_stock(db: Session) -> int:
+    """
+    Recalcula toda la lista con un INSERT ... SELECT (una sola pasada por inventory)
+    y borra lo que ya no corresponde. Para cargas masivas, donde refrescar por
+    pares costaría más. No hace commit; devuelve la cantidad de pares con stock bajo.
+    """
+    db.flush()
+    now = datetime.utcnow()
+    low = select(Inventory.branch_id, Inventory.product_id, Inventory.quantity, Product.min_stock, literal(now)) \
+        .join(Product, Product.product_id == Inventory.product_id) \
+        .where(_is_low())
+    statement = dialect_insert(db)(LowStockItem).from_select(
+        ["branch_id", "product_id", "quantity", "min_stock", "since"], low
+    )
+    db.execute(statement.on_conflict_do_update(
+        index_elements=["branch_id", "product_id"],
+        set_={"quantity": statement.excluded.quantity, "min_stock": statement.excluded.min_stock}
+    ))
+    still_low = select(Inventory.product_id) \
+        .join(Product, Product.product_id == Inventory.product_id) \
+        .where(
+            Inventory.product_id == LowStockItem.product_id,
+            Inventory.branch_id == LowStockItem.branch_id,
+            _is_low()
+        )
+    db.execute(
+        delete(LowStockItem).where(~still_low.exists()).execution_options(synchronize_session=False)
+    )
+    return db.query(LowStockItem).count()
+
+def low_stock_query(db: Session, branch_id: Optional[int] = None):
+    """Filas de la lista con los datos del producto, para paginar por (branch_id, product_id)"""
+    query = db.query(
+        LowStockItem.branch_id,
+        LowStockItem.product_id,
+        Product.name.label("product_name"),
+        Product.barcode,
+        LowStockItem.quantity,
+        LowStockItem.min_stock,
+        LowStockItem.since
+    ).join(Product, Product.product_id == LowStockItem.product_id)
+    if branch_id is not None:
+        query = query.filter(LowStockItem.branch_id == branch_id)
+    return query
+
+def low_stock_item(row) -> dict:
+    quantity = float(row.quantity)
+    return {
+        "branch_id": row.branch_id,
+        "product_id": row.product_id,
+        "product_name": row.product_name,
+        "barcode": row.barcode,
+        "quantity": quantity,
+        "min_stock": row.min_stock,
+        "shortage": row.min_stock - quantity,
+        "since": row.since.isoformat()
+    }
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+async def low_stock_events(session_factory: Callable[[], AsyncSession], branch_id: Optional[int],
+                           interval: float, is_disconnected: Callable):
+    """
+    Eventos SSE: primero un `low_stock` por cada par en la lista, luego cada
+    `interval` segundos los cambios (`low_stock` al entrar o cambiar la cantidad,
+    `restocked` al salir). Lee low_stock_items, que ya está mantenida, con una
+    consulta por la clave primaria, en una sesión asíncrona por vuelta.
+    """
+    async def read_state() -> Dict[Tuple[int, int], dict]:
+        async with session_factory() as db:
+            rows = await db.run_sync(lambda session: low_stock_query(session, branch_id).all())
+        return {(row.branch_id, row.product_id): low_stock_item(row) for row in rows}
+
+    known: Dict[Tuple[int, int], dict] = {}
+    while not await is_disconnected():
+        state = await read_state()
+        changed = False
+        for key, item in state.items():
+            if known.get(key) != item:
+                changed = True
+                yield _sse("low_stock", item)
+        for key in known.keys() - state.keys():
+            changed = True
+            yield _sse("restocked", {"branch_id": key[0], "product_id": key[1]})
+        if not changed:
+            yield ": keep-alive\n\n"
+        known = state
+        await asyncio.sleep(interval)
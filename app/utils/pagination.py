@@ -0,0 +1,172 @@
+# utils/pagination.py
+import base64
+import json
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Optional, Sequence
+
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Session
+
+EXACT_COUNT_THRESHOLD = 10000  # Por debajo de esta estimación se cuenta exacto
+COUNT_CACHE_TTL_SECONDS = 30
+
+@dataclass
+class Page:
+    items: list
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_estimated: bool = False
+
+# --- Cursores opacos ---
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "n" in value:
+            return Decimal(value["n"])
+    return value
+
+def encode_cursor(keys: Sequence[str], values: Sequence) -> str:
+    payload = {"k": list(keys), "v": [_encode_value(value) for value in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, keys: Sequence[str]) -> list:
+    """Valores del cursor; ValueError si está mal formado o es de otro orden"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = [_decode_value(value) for value in payload["v"]]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Cursor inválido")
+    if payload.get("k") != list(keys) or len(values) != len(keys):
+        raise ValueError("Cursor inválido")
+    return values
+
+# --- Paginación por clave (keyset) ---
+
+def paginate(query, order_by: Sequence, limit: int, cursor: Optional[str] = None,
+             descending: bool = False, skip: int = 0, with_total: bool = False) -> Page:
+    """
+    Página de `query` ordenada por las columnas `order_by` (la última debe ser única).
+    Con `cursor` continúa después de la última fila de la página anterior sin
+    recorrer las filas ya vistas; `skip` queda para clientes que aún paginan por offset.
+    Con `with_total` agrega el total (ver estimate_total).
+    """
+    page = Page(items=[])
+    if with_total:
+        page.total, page.total_estimated = estimate_total(query.session, query)
+
+    keys = [column.key for column in order_by]
+    ordering = [column.desc() if descending else column.asc() for column in order_by]
+    query = query.order_by(None).order_by(*ordering)
+    if cursor:
+        values = decode_cursor(cursor, keys)
+        if descending:
+            query = query.filter(tuple_(*order_by) < tuple_(*values))
+        else:
+            query = query.filter(tuple_(*order_by) > tuple_(*values))
+    elif skip:
+        query = query.offset(skip)
+
+    rows = query.limit(limit + 1).all()
+
+    if len(rows) > limit:
+        rows = rows[:limit]
+        page.next_cursor = encode_cursor(keys, [getattr(rows[-1], key) for key in keys])
+    page.items = rows
+    return page
+
+def set_page_headers(response, page: Page):
+    """Para endpoints que devuelven una lista: el cursor y el total van en cabeceras"""
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    if page.total is not None:
+        response.headers["X-Total-Count"] = str(page.total)
+        response.headers["X-Total-Estimated"] = "true" if page.total_estimated else "false"
+
+def offset_cursor(offset: int) -> str:
+    """Cursor para listas que no admiten keyset (p. ej. ordenadas por relevancia)"""
+    return encode_cursor(["offset"], [offset])
+
+def decode_offset_cursor(cursor: str) -> int:
+    offset = decode_cursor(cursor, ["offset"])[0]
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError("Cursor inválido")
+    return offset
+
+# --- Totales ---
+
+class CountCache:
+    """Conteos exactos por consulta (SQL + parámetros) con TTL"""
+
+    def __init__(self, ttl_seconds: float, max_size: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get_or_count(self, key, count) -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        value = count()
+        with self._lock:
+            if len(self._items) >= self.max_size:
+                self._items = {k: v for k, v in self._items.items() if v[0] > now}
+                if len(self._items) >= self.max_size:
+                    self._items.clear()
+            self._items[key] = (now + self.ttl_seconds, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+count_cache = CountCache(COUNT_CACHE_TTL_SECONDS)
+
+def _planner_estimate(db: Session, statement) -> int:
+    compiled = statement.compile(bind=db.get_bind(), compile_kwargs={"render_postcompile": True})
+    params = compiled.params
+    if compiled.positional:
+        # asyncpg (run_sync desde una AsyncSession) usa parámetros posicionales
+        params = tuple(params[name] for name in compiled.positiontup)
+    plan = db.connection().exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+def estimate_total(db: Session, query) -> tuple:
+    """
+    Total aproximado de filas de `query`: (total, es_estimado).
+    Postgres: estimación del planificador, o conteo exacto si es pequeña.
+    Otras bases: conteo exacto cacheado por filtro durante COUNT_CACHE_TTL_SECONDS.
+    """
+    query = query.enable_eagerloads(False).order_by(None).limit(None).offset(None)
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = _planner_estimate(db, query.statement)
+        if estimate >= EXACT_COUNT_THRESHOLD:
+            return estimate, True
+        return query.count(), False
+
+    compiled = query.statement.compile(bind=db.get_bind(), compile_kwargs={"render_postcompile": True})
+    key = (str(compiled), json.dumps(compiled.params, sort_keys=True, default=str))
+    return count_cache.get_or_count(key, query.count), False
@@ -0,0 +1,118 @@
+# utils/passwords.py
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+
+import bcrypt
+
+from app.config import settings
+
+class PasswordHasherBusy(Exception):
+    """La cola del pool de hashing está llena"""
+
+def _password_bytes(password: str) -> bytes:
+    # bcrypt solo usa los primeros 72 bytes (passlib los truncaba igual)
+    return password.encode("utf-8")[:72]
+
+def hash_password(password: str, rounds: int) -> str:
+    return bcrypt.hashpw(_password_bytes(password), bcrypt.gensalt(rounds)).decode("utf-8")
+
+def check_password(password: str, hashed_password: str) -> bool:
+    try:
+        return bcrypt.checkpw(_password_bytes(password), hashed_password.encode("utf-8"))
+    except (ValueError, TypeError, AttributeError):
+        # Hash vacío o con formato inválido
+        return False
+
+class PasswordHasher:
+    """
+    Ejecuta bcrypt en un pool de procesos de tamaño fijo para no ocupar los
+    hilos de la API. Si hay `max_queue` operaciones en curso o esperando,
+    rechaza la nueva con PasswordHasherBusy (la API responde 503). Una
+    operación que vence su timeout también responde 503, pero sigue contando
+    en la cola hasta que el pool la termina.
+    Con workers=0 se ejecuta en el mismo hilo (scripts y tests).
+    """
+
+    def __init__(self, workers: int, max_queue: int, rounds: int, timeout: float):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.rounds = rounds
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _run(self, function, *args):
+        if self.workers <= 0:
+            return function(*args)
+
+        with self._lock:
+            if self.queue_depth >= self.max_queue:
+                self.rejected += 1
+                raise PasswordHasherBusy()
+            self.queue_depth += 1
+        try:
+            future = self.executor.submit(function, *args)
+        except Exception:
+            self._finished(None)
+            raise
+        # La cola se libera cuando el pool termina la operación, no cuando el pedido deja de esperar
+        future.add_done_callback(self._finished)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # Si todavía no empezó se cancela; si ya corre, ocupa su lugar hasta terminar
+            future.cancel()
+            with self._lock:
+                self.timed_out += 1
+            raise PasswordHasherBusy()
+
+    def _finished(self, future):
+        with self._lock:
+            self.queue_depth -= 1
+            if future is not None and not future.cancelled() and future.exception() is None:
+                self.completed += 1
+
+    def hash(self, password: str) -> str:
+        return self._run(hash_password, password, self.rounds)
+
+    def verify(self, password: str, hashed_password: str) -> bool:
+        if not hashed_password:
+            return False
+        return self._run(check_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "rounds": self.rounds,
+                "queue_depth": self.queue_depth,
+                "max_queue": self.max_queue,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+password_hasher = PasswordHasher(
+    workers=settings.BCRYPT_WORKERS,
+    max_queue=settings.BCRYPT_MAX_QUEUE,
+    rounds=settings.BCRYPT_ROUNDS,
+    timeout=settings.BCRYPT_TIMEOUT_SECONDS
+)
@@ -6,6 +6,7 @@ from reportlab.platypus import Table, TableStyle
 from reportlab.lib import colors
 from io import BytesIO
 from datetime import datetime
+import tempfile
 
 def generate_invoice_pdf(sale):
     buffer = BytesIO()
@@ -78,61 +79,125 @@ def generate_invoice_pdf(sale):
     buffer.seek(0)
     return buffer.getvalue()
 
-def generate_sales_report_pdf(sales):
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    width, height = letter
+REPORT_COLUMNS = ["Factura", "Fecha", "Cliente", "Sucursal", "Total", "Estado"]
+REPORT_COL_WIDTHS = [1.5*inch, inch, 1.4*inch, 1.6*inch, inch, inch]
+REPORT_ROW_HEIGHT = 14
+REPORT_HEADER_HEIGHT = 22
+REPORT_MARGIN = 0.5 * inch
+REPORT_TOP_MARGIN = 1.1 * inch
 
-    # Encabezado
-    pdf.setFont("Helvetica-Bold", 16)
-    pdf.drawString(1 * inch, height - 1 * inch, "REPORTE DE VENTAS")
-
-    # Fecha de generación
-    pdf.setFont("Helvetica", 12)
-    pdf.drawString(1 * inch, height - 1.3 * inch, f"Generado el: {datetime.now().strftime('%d/%m/%Y %H:%M')}")
-
-    # Tabla de ventas
-    data = [["Factura", "Fecha", "Cliente", "Sucursal", "Total", "Estado"]]
-    for sale in sales:
-        data.append([
-            sale.invoice_number,
-            sale.sale_date.strftime('%d/%m/%Y'),
-            sale.client.full_name if sale.client else "N/A",
-            sale.branch.name if sale.branch else "N/A",
-            f"${sale.total:.2f}",
-            sale.status
-        ])
+def _report_page_table(rows, page_total, grand_total=None):
+    """Tabla de una página: encabezado repetido, filas y subtotal de la página"""
+    data = [REPORT_COLUMNS] + rows
+    data.append(["", "", "", "Subtotal página", f"${page_total:.2f}", ""])
+    if grand_total is not None:
+        data.append(["", "", "", "TOTAL GENERAL", f"${grand_total:.2f}", ""])
+    footer_rows = len(data) - len(rows) - 1
 
-    # Crear tabla
     table = Table(
         data,
-        colWidths=[1.5*inch, inch, 1.2*inch, 1.8*inch, inch, inch]
+        colWidths=REPORT_COL_WIDTHS,
+        rowHeights=[REPORT_HEADER_HEIGHT] + [REPORT_ROW_HEIGHT] * (len(data) - 1)
     )
     table.setStyle(TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
         ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
         ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
         ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
         ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
         ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
         ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 8)
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('FONTNAME', (0, -footer_rows), (-1, -1), 'Helvetica-Bold'),
+        ('BACKGROUND', (0, -footer_rows), (-1, -1), colors.lightgrey)
     ]))
+    return table
 
-    # Dejar espacio para encabezado y fecha
-    x_offset = 0.8 * inch
-    y_start_table = height - 2.2 * inch  # Espacio debajo del encabezado y fecha
-    table_width, table_height = table.wrap(0, 0)
+def _report_pages(sales, rows_per_page):
+    """Agrupa las ventas en páginas de tamaño fijo y arma la tabla de cada una"""
+    rows = []
+    page_total = 0
+    grand_total = 0
+    for sale in sales:
+        rows.append([
+            sale.invoice_number,
+            sale.sale_date.strftime('%d/%m/%Y'),
+            sale.client.full_name if sale.client else "N/A",
+            sale.branch.name if sale.branch else "N/A",
+            f"${sale.total:.2f}",
+            sale.status
+        ])
+        page_total += sale.total or 0
+        # Se reserva una fila para el total general de la última página
+        if len(rows) == rows_per_page - 1:
+            grand_total += page_total
+            yield _report_page_table(rows, page_total)
+            rows, page_total = [], 0
 
-    # La tabla debe comenzar en y_start_table y dibujarse hacia abajo
-    table.drawOn(pdf, x_offset, y_start_table - table_height)
+    grand_total += page_total
+    yield _report_page_table(rows, page_total, grand_total)
+
+def _draw_report_header(pdf, generated_at, page):
+    width, height = letter
+    pdf.setFont("Helvetica-Bold", 16)
+    pdf.drawString(REPORT_MARGIN, height - 0.6 * inch, "REPORTE DE VENTAS")
+    pdf.setFont("Helvetica", 10)
+    pdf.drawString(REPORT_MARGIN, height - 0.85 * inch, f"Generado el: {generated_at}")
+    pdf.drawRightString(width - REPORT_MARGIN, height - 0.85 * inch, f"Página {page}")
+
+def build_sales_report_pdf(sales, output):
+    """
+    Escribe en `output` (archivo o buffer) el reporte de ventas paginado.
+    `sales` puede ser cualquier iterador; cada página se arma, se dibuja en el
+    canvas y se descarta antes de leer las filas de la siguiente, así que las
+    filas no se acumulan. El canvas de reportlab sí conserva el contenido de las
+    páginas terminadas hasta save() (unos 24 KB por página, ~55 MB para 100.000
+    ventas según scripts/bench_sales_report_pdf.py): la memoria crece con el
+    tamaño del reporte. Por eso el PDF se genera por defecto en el pool de
+    trabajos y los exportes muy grandes conviene pedirlos en CSV.
+    Devuelve la cantidad de páginas generadas.
+    """
+    generated_at = datetime.now().strftime('%d/%m/%Y %H:%M')
+    width, height = letter
+    pdf = canvas.Canvas(output, pagesize=letter)
+    pdf.setTitle("Reporte de ventas")
 
+    # Filas que entran debajo del encabezado junto con el encabezado de la tabla y el subtotal
+    frame_height = height - REPORT_TOP_MARGIN - REPORT_MARGIN - 12
+    rows_per_page = int((frame_height - REPORT_HEADER_HEIGHT) // REPORT_ROW_HEIGHT) - 1
+
+    pages = 0
+    for table in _report_pages(sales, rows_per_page):
+        pages += 1
+        _draw_report_header(pdf, generated_at, pages)
+        _, table_height = table.wrapOn(pdf, width - 2 * REPORT_MARGIN, frame_height)
+        table.drawOn(pdf, REPORT_MARGIN, height - REPORT_TOP_MARGIN - 6 - table_height)
+        pdf.showPage()
     pdf.save()
-    buffer.seek(0)
+    return pages
+
+def iter_sales_report_pdf(sales, chunk_size=64 * 1024):
+    """Genera el reporte en un archivo temporal y lo entrega por bloques"""
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as output:
+        build_sales_report_pdf(sales, output)
+        output.seek(0)
+        while True:
+            chunk = output.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+def generate_sales_report_pdf(sales):
+    buffer = BytesIO()
+    build_sales_report_pdf(sales, buffer)
     return buffer.getvalue()
 
-def generate_sales_csv(sales):
+def iter_sales_csv(sales, buffer_size=64 * 1024):
+    """
+    Genera el CSV de ventas por partes a medida que se recorre `sales`,
+    que puede ser una lista o cualquier iterador (p. ej. un cursor por bloques).
+    """
     import csv
     from io import StringIO
     
@@ -172,5 +237,15 @@ def generate_sales_csv(sales):
             
             # Escribir una línea combinando datos principales y de producto
             writer.writerow(main_data + product_data)
+
+        # Entregar el bloque acumulado y reutilizar el buffer
+        if output.tell() >= buffer_size:
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate()
     
-    return output.getvalue()
\ No newline at end of file
+    if output.tell():
+        yield output.getvalue()
+
+def generate_sales_csv(sales):
+    return "".join(iter_sales_csv(sales))
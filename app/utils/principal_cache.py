@@ -0,0 +1,107 @@
+# utils/principal_cache.py
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from app.config import settings
+
+@dataclass(frozen=True)
+class RoleSnapshot:
+    role_id: int
+    name: str
+    permissions: dict
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Copia liviana y desconectada de la sesión del usuario autenticado"""
+    user_id: int
+    username: str
+    full_name: Optional[str]
+    is_active: bool
+    is_superuser: bool
+    role_id: Optional[int]
+    role: Optional[RoleSnapshot] = None
+    password: Optional[str] = None  # Nunca se copia la contraseña
+
+    @classmethod
+    def from_user(cls, user) -> "UserSnapshot":
+        role = None
+        if user.role is not None:
+            role = RoleSnapshot(
+                role_id=user.role.role_id,
+                name=user.role.name,
+                permissions=dict(user.role.permissions or {})
+            )
+        return cls(
+            user_id=user.user_id,
+            username=user.username,
+            full_name=user.full_name,
+            is_active=bool(user.is_active),
+            is_superuser=bool(user.is_superuser),
+            role_id=user.role_id,
+            role=role
+        )
+
+class PrincipalCache:
+    """Cache LRU con TTL: username (sub del token) -> UserSnapshot"""
+
+    def __init__(self, ttl_seconds: float, max_size: int, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        self.enabled = enabled
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, username: str) -> Optional[UserSnapshot]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._items.get(username)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._items[username]
+                self.misses += 1
+                return None
+            self._items.move_to_end(username)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, snapshot: UserSnapshot):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._items[snapshot.username] = (time.monotonic() + self.ttl_seconds, snapshot)
+            self._items.move_to_end(snapshot.username)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def invalidate_user(self, user_id: int):
+        """Elimina al usuario aunque haya cambiado su username"""
+        with self._lock:
+            for username, (_, snapshot) in list(self._items.items()):
+                if snapshot.user_id == user_id:
+                    del self._items[username]
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "size": len(self._items),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else 0.0
+            }
+
+principal_cache = PrincipalCache(
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    enabled=settings.PRINCIPAL_CACHE_ENABLED
+)
@@ -0,0 +1,331 @@
+# utils/product_import.py
+import csv
+import io
+import json
+import time
+from datetime import datetime
+from decimal import Decimal
+from typing import IO, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, select, text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.branch import Branch
+from app.models.category import Category
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.unit_type import UnitType
+from app.schemas.product import ProductCreate
+from app.utils.barcode_index import barcode_index
+from app.utils.db import dialect_insert
+from app.utils.inventory import record_movements, IMPORT, QUANTITY_STEP
+from app.utils.low_stock import rebuild_low_stock, refresh_low_stock_products
+from app.utils.product_search import product_search_index
+
+FORMATS = ("csv", "ndjson")
+PRODUCT_COLUMNS = ("barcode", "name", "description", "category_id", "unit_type", "price", "cost", "min_stock")
+
+def detect_format(filename: Optional[str]) -> str:
+    """csv o ndjson según la extensión del archivo"""
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError("Formato no reconocido: use .csv, .ndjson o indique el formato")
+
+def _parse_inventory(value: str) -> list:
+    """Columna inventory del CSV: "branch_id:cantidad;branch_id:cantidad" """
+    assignments = []
+    for part in filter(None, (part.strip() for part in (value or "").split(";"))):
+        branch_id, separator, quantity = part.partition(":")
+        if not separator:
+            raise ValueError(f"inventario inválido '{part}' (se espera sucursal:cantidad)")
+        assignments.append({"branch_id": branch_id.strip(), "quantity": quantity.strip()})
+    return assignments
+
+def iter_import_rows(stream: IO[str], fmt: str) -> Iterator[Tuple[int, dict, Optional[str]]]:
+    """(número de fila, datos, error de lectura) sin cargar el archivo completo"""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            # Celda vacía = valor por defecto de ProductCreate
+            data = {key: value for key, value in row.items() if key and value not in ("", None)}
+            try:
+                data["inventory_assignments"] = _parse_inventory(data.pop("inventory", None))
+            except ValueError as e:
+                yield reader.line_num, data, str(e)
+                continue
+            yield reader.line_num, data, None
+    elif fmt == "ndjson":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                data = json.loads(line)
+            except ValueError as e:
+                yield line_number, {}, f"JSON inválido: {e}"
+                continue
+            if not isinstance(data, dict):
+                yield line_number, {}, "se espera un objeto JSON por línea"
+                continue
+            yield line_number, data, None
+    else:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors(include_url=False)
+    ]
+
+class _RowValidator:
+    """Valida cada fila con ProductCreate y contra las tablas de referencia"""
+
+    def __init__(self, db: Session):
+        self.category_ids = set(db.scalars(select(Category.category_id)))
+        self.unit_type_ids = set(db.scalars(select(UnitType.id)))
+        self.branch_ids = set(db.scalars(select(Branch.branch_id)))
+        self.lengths = {
+            column: Product.__table__.c[column].type.length
+            for column in ("barcode", "name", "description")
+        }
+        self.seen_barcodes = {}
+
+    def validate(self, line: int, data: dict) -> Tuple[Optional[ProductCreate], List[str]]:
+        try:
+            product = ProductCreate.model_validate(data)
+        except ValidationError as e:
+            return None, _validation_messages(e)
+
+        errors = []
+        for column, length in self.lengths.items():
+            value = getattr(product, column)
+            if value is not None and len(value) > length:
+                errors.append(f"{column}: máximo {length} caracteres")
+        if not product.barcode.strip():
+            errors.append("barcode: no puede estar vacío")
+        if product.category_id not in self.category_ids:
+            errors.append(f"category_id: la categoría {product.category_id} no existe")
+        if product.unit_type not in self.unit_type_ids:
+            errors.append(f"unit_type: el tipo de unidad {product.unit_type} no existe")
+        branches = set()
+        for assignment in product.inventory_assignments or []:
+            if assignment.branch_id not in self.branch_ids:
+                errors.append(f"inventory: la sucursal {assignment.branch_id} no existe")
+            elif assignment.branch_id in branches:
+                errors.append(f"inventory: la sucursal {assignment.branch_id} está repetida")
+            branches.add(assignment.branch_id)
+        # ON CONFLICT no puede tocar la misma fila dos veces en una sentencia
+        first_line = self.seen_barcodes.get(product.barcode)
+        if first_line is not None:
+            errors.append(f"barcode: repetido en el archivo (fila {first_line})")
+        if errors:
+            return None, errors
+        self.seen_barcodes[product.barcode] = line
+        return product, []
+
+class _PostgresLoader:
+    """COPY a tablas temporales y un solo INSERT ... ON CONFLICT al final"""
+
+    def __init__(self, db: Session, user_id: Optional[int] = None):
+        self.db = db
+        self.user_id = user_id
+        db.execute(text("""
+            CREATE TEMP TABLE product_import_staging (
+                barcode varchar(20), name varchar(100), description varchar(500),
+                category_id integer, unit_type integer, price numeric(10, 2),
+                cost numeric(10, 2), min_stock integer
+            ) ON COMMIT DROP
+        """))
+        db.execute(text("""
+            CREATE TEMP TABLE inventory_import_staging (
+                barcode varchar(20), branch_id integer, quantity numeric(10, 3)
+            ) ON COMMIT DROP
+        """))
+
+    def _copy(self, table: str, columns: tuple, rows: list):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+        finally:
+            cursor.close()
+
+    def load(self, products: List[ProductCreate]):
+        # En CSV de COPY un campo vacío sin comillas es NULL
+        self._copy("product_import_staging", PRODUCT_COLUMNS, [
+            ["" if value is None else value for value in (getattr(product, column) for column in PRODUCT_COLUMNS)]
+            for product in products
+        ])
+        self._copy("inventory_import_staging", ("barcode", "branch_id", "quantity"), [
+            (product.barcode, assignment.branch_id, assignment.quantity)
+            for product in products
+            for assignment in product.inventory_assignments or []
+        ])
+
+    def merge(self) -> Tuple[int, int]:
+        columns = ", ".join(PRODUCT_COLUMNS)
+        updates = ", ".join(f"{column} = EXCLUDED.{column}" for column in PRODUCT_COLUMNS if column != "barcode")
+        inserted_flags = self.db.execute(text(f"""
+            INSERT INTO products ({columns}, is_active)
+            SELECT {columns}, true FROM product_import_staging
+            ON CONFLICT (barcode) DO UPDATE SET {updates}, is_active = true, updated_at = now()
+            RETURNING (xmax = 0)
+        """)).scalars().all()
+        # Movimientos del libro: diferencia con la cantidad actual, con las filas ya bloqueadas
+        self.db.execute(text("""
+            SELECT 1 FROM inventory i
+            JOIN products p ON p.product_id = i.product_id
+            JOIN inventory_import_staging s ON s.barcode = p.barcode AND s.branch_id = i.branch_id
+            ORDER BY i.product_id, i.branch_id
+            FOR UPDATE OF i
+        """))
+        self.db.execute(text("""
+            INSERT INTO inventory_movements
+                (created_at, product_id, branch_id, quantity_delta, movement_type, user_id)
+            SELECT :created_at, p.product_id, s.branch_id, s.quantity - coalesce(i.quantity, 0), :movement_type, :user_id
+            FROM inventory_import_staging s
+            JOIN products p ON p.barcode = s.barcode
+            LEFT JOIN inventory i ON i.product_id = p.product_id AND i.branch_id = s.branch_id
+            WHERE s.quantity <> coalesce(i.quantity, 0)
+        """), {"created_at": datetime.utcnow(), "movement_type": IMPORT, "user_id": self.user_id})
+        self.db.execute(text("""
+            INSERT INTO inventory (product_id, branch_id, quantity, last_updated)
+            SELECT p.product_id, s.branch_id, s.quantity, now()
+            FROM inventory_import_staging s JOIN products p ON p.barcode = s.barcode
+            ON CONFLICT (product_id, branch_id)
+            DO UPDATE SET quantity = EXCLUDED.quantity, last_updated = now()
+        """))
+        # Cambian stock y min_stock de muchos productos: una pasada completa sale más barata
+        rebuild_low_stock(self.db)
+        inserted = sum(1 for flag in inserted_flags if flag)
+        return inserted, len(inserted_flags) - inserted
+
+class _BatchLoader:
+    """Otras bases (SQLite en tests): INSERT ... ON CONFLICT por lote"""
+
+    def __init__(self, db: Session, user_id: Optional[int] = None):
+        self.db = db
+        self.user_id = user_id
+        self.insert = dialect_insert(db)
+        self.inserted = 0
+        self.updated = 0
+
+    def load(self, products: List[ProductCreate]):
+        barcodes = [product.barcode for product in products]
+        existing = set(self.db.scalars(select(Product.barcode).where(Product.barcode.in_(barcodes))))
+        self.updated += len(existing)
+        self.inserted += len(products) - len(existing)
+
+        statement = self.insert(Product)
+        self.db.execute(statement.on_conflict_do_update(
+            index_elements=["barcode"],
+            set_=dict({column: statement.excluded[column] for column in PRODUCT_COLUMNS[1:]}, is_active=True,
+                      updated_at=func.now())
+        ), [
+            dict({column: getattr(product, column) for column in PRODUCT_COLUMNS}, is_active=True)
+            for product in products
+        ])
+
+        product_ids = dict(self.db.execute(
+            select(Product.barcode, Product.product_id).where(Product.barcode.in_(barcodes))
+        ).all())
+        inventory = [
+            {"product_id": product_ids[product.barcode], "branch_id": assignment.branch_id,
+             "quantity": assignment.quantity}
+            for product in products
+            for assignment in product.inventory_assignments or []
+        ]
+        if inventory:
+            current = {
+                (row.product_id, row.branch_id): row.quantity
+                for row in self.db.query(Inventory.product_id, Inventory.branch_id, Inventory.quantity)
+                .filter(Inventory.product_id.in_(list(product_ids.values())))
+                .order_by(Inventory.product_id, Inventory.branch_id)
+                .with_for_update()
+            }
+            statement = self.insert(Inventory)
+            self.db.execute(statement.on_conflict_do_update(
+                index_elements=["product_id", "branch_id"],
+                set_={"quantity": statement.excluded.quantity, "last_updated": func.now()}
+            ), inventory)
+            record_movements(self.db, [
+                {"product_id": row["product_id"], "branch_id": row["branch_id"], "movement_type": IMPORT,
+                 "quantity_delta": Decimal(str(row["quantity"])).quantize(QUANTITY_STEP)
+                 - current.get((row["product_id"], row["branch_id"]), 0),
+                 "user_id": self.user_id}
+                for row in inventory
+            ])
+        # min_stock también puede cambiar en las sucursales que no vienen en el archivo
+        refresh_low_stock_products(self.db, product_ids.values())
+
+    def merge(self) -> Tuple[int, int]:
+        return self.inserted, self.updated
+
+def import_products(db: Session, stream: IO[str], fmt: str, batch_size: Optional[int] = None,
+                    user_id: Optional[int] = None) -> dict:
+    """
+    Importa productos (con sus asignaciones de inventario) desde CSV o NDJSON.
+    Las filas se validan mientras se leen; las válidas se cargan por lotes
+    (COPY en Postgres) y se fusionan por código de barras: si ya existe el producto
+    se actualiza y las cantidades de las sucursales indicadas se reemplazan (con su
+    movimiento IMPORT en el libro de inventario). Las inválidas se informan
+    por fila y no detienen la importación.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+    batch_size = batch_size or settings.PRODUCT_IMPORT_BATCH_SIZE
+    started = time.perf_counter()
+
+    validator = _RowValidator(db)
+    loader_class = _PostgresLoader if db.get_bind().dialect.name == "postgresql" else _BatchLoader
+    loader = loader_class(db, user_id)
+    errors = []
+    error_count = 0
+    rows = 0
+    batch = []
+    try:
+        for line, data, read_error in iter_import_rows(stream, fmt):
+            rows += 1
+            product, messages = (None, [read_error]) if read_error else validator.validate(line, data)
+            if messages:
+                error_count += 1
+                if len(errors) < settings.PRODUCT_IMPORT_MAX_ERRORS:
+                    errors.append({"row": line, "barcode": data.get("barcode"), "errors": messages})
+                continue
+            batch.append(product)
+            if len(batch) >= batch_size:
+                loader.load(batch)
+                batch = []
+        if batch:
+            loader.load(batch)
+        inserted, updated = loader.merge()
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    # Los índices en memoria se reconstruyen una vez en lugar de producto por producto
+    if inserted or updated:
+        for index in (product_search_index, barcode_index):
+            if index.loaded:
+                index.load(db)
+
+    seconds = time.perf_counter() - started
+    return {
+        "format": fmt,
+        "rows": rows,
+        "imported": inserted + updated,
+        "inserted": inserted,
+        "updated": updated,
+        "error_count": error_count,
+        "errors": errors,
+        "errors_truncated": error_count > len(errors),
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds > 0 else rows
+    }
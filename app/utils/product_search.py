@@ -0,0 +1,196 @@
+# utils/product_search.py
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from typing import List
+
+from sqlalchemy import func, or_, literal_column
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.utils.pagination import Page, estimate_total, offset_cursor
+
+SIMILARITY_THRESHOLD = 0.3  # Igual al valor por defecto de pg_trgm.similarity_threshold
+IN_CHUNK_SIZE = 10000  # SQLite limita la cantidad de parámetros por consulta
+
+def normalize_search_text(text: str) -> str:
+    """Minúsculas y sin acentos (equivale a product_search_normalize en Postgres)"""
+    text = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in text if not unicodedata.combining(char)).lower()
+
+def search_words(term: str) -> List[str]:
+    return re.findall(r"\w+", normalize_search_text(term))
+
+def trigrams(text: str) -> set:
+    """Trigramas al estilo pg_trgm: cada palabra con dos espacios delante y uno detrás"""
+    result = set()
+    for word in re.findall(r"\w+", text):
+        padded = f"  {word} "
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+class ProductSearchIndex:
+    """
+    Índice de n-gramas en memoria para bases sin pg_trgm (SQLite en tests).
+    Reproduce la búsqueda de Postgres: coincidencia por subcadena sin acentos
+    en nombre o descripción, o nombre parecido por trigramas, ordenado por relevancia.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents = {}  # product_id -> (nombre, descripción, trigramas del nombre, palabras del nombre)
+        self._postings = defaultdict(set)  # trigrama (nombre o descripción) -> product_ids
+        self._name_postings = defaultdict(set)  # trigrama del nombre -> product_ids
+        self.loaded = False
+
+    def load(self, db: Session):
+        rows = db.query(Product.product_id, Product.name, Product.description) \
+            .filter(Product.is_active == True).all()
+        with self._lock:
+            self._documents.clear()
+            self._postings.clear()
+            self._name_postings.clear()
+            for product_id, name, description in rows:
+                self._add(product_id, name, description)
+            self.loaded = True
+
+    def _add(self, product_id: int, name: str, description: str):
+        name = normalize_search_text(name)
+        description = normalize_search_text(description)
+        name_grams = trigrams(name)
+        self._documents[product_id] = (name, description, name_grams, tuple(re.findall(r"\w+", name)))
+        for gram in name_grams | trigrams(description):
+            self._postings[gram].add(product_id)
+        for gram in name_grams:
+            self._name_postings[gram].add(product_id)
+
+    def _remove(self, product_id: int):
+        document = self._documents.pop(product_id, None)
+        if document is None:
+            return
+        for index, grams in ((self._postings, document[2] | trigrams(document[1])),
+                             (self._name_postings, document[2])):
+            for gram in grams:
+                postings = index.get(gram)
+                if postings is not None:
+                    postings.discard(product_id)
+                    if not postings:
+                        del index[gram]
+
+    def upsert(self, product):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(product.product_id)
+            if product.is_active:
+                self._add(product.product_id, product.name, product.description)
+
+    def remove(self, product_id: int):
+        if not self.loaded:
+            return
+        with self._lock:
+            self._remove(product_id)
+
+    def search(self, term: str) -> List[int]:
+        """IDs de productos que coinciden con `term`, del más al menos relevante"""
+        query = normalize_search_text(term).strip()
+        words = re.findall(r"\w+", query)
+        if not words:
+            return []
+        query_grams = trigrams(query)
+
+        with self._lock:
+            # Subcadena: como pg_trgm con LIKE, deben estar todos los trigramas interiores
+            inner = {word[i:i + 3] for word in words for i in range(len(word) - 2)}
+            if inner:
+                postings = sorted((self._postings.get(gram, set()) for gram in inner), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                # Con menos de 3 letras no hay trigramas interiores
+                candidates = set(self._documents)
+
+            # Parecidos: similarity >= umbral exige compartir al menos m = umbral * |trigramas|
+            # con el nombre, así que basta mirar los |trigramas| - m + 1 más raros (filtro por prefijo)
+            minimum = math.ceil(SIMILARITY_THRESHOLD * len(query_grams))
+            rarest = sorted((self._name_postings.get(gram, set()) for gram in query_grams), key=len)
+            for postings in rarest[:len(query_grams) - minimum + 1]:
+                candidates |= postings
+
+            scored = []
+            for product_id in candidates:
+                name, description, name_grams, name_words = self._documents[product_id]
+                shared = len(query_grams & name_grams)
+                score = shared / (len(query_grams) + len(name_grams) - shared)
+                in_name = query in name
+                if not (in_name or score >= SIMILARITY_THRESHOLD or query in description):
+                    continue
+                # Mismo criterio que ts_rank: pesa más el nombre que la descripción
+                if in_name:
+                    score += 1.0
+                if all(any(token.startswith(word) for token in name_words) for word in words):
+                    score += 0.5
+                scored.append((-score, product_id))
+        scored.sort()
+        return [product_id for _, product_id in scored]
+
+product_search_index = ProductSearchIndex()
+
+def search_products(db: Session, query, term: str, skip: int, limit: int,
+                    with_total: bool = False) -> Page:
+    """
+    Aplica la búsqueda a una consulta sobre Product (con los demás filtros ya puestos)
+    y devuelve la página de productos ordenada por relevancia; el cursor lleva la
+    posición. La consulta puede devolver entidades o filas con product_id. El total
+    solo se calcula con `with_total` (en Postgres, estimado como en estimate_total).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        query = _postgres_search(query, term)
+        # Una fila de más indica si hay página siguiente sin contar
+        products = query.offset(skip).limit(limit + 1).all()
+        page = Page(products[:limit], offset_cursor(skip + limit) if len(products) > limit else None)
+        if with_total:
+            page.total, page.total_estimated = estimate_total(db, query)
+        return page
+
+    if not product_search_index.loaded:
+        product_search_index.load(db)
+    ranked = product_search_index.search(term)
+
+    # Aplicar los demás filtros de la consulta sobre los productos encontrados
+    ids_query = query.with_entities(Product.product_id)
+    allowed = set()
+    for start in range(0, len(ranked), IN_CHUNK_SIZE):
+        chunk = ranked[start:start + IN_CHUNK_SIZE]
+        allowed.update(row[0] for row in ids_query.filter(Product.product_id.in_(chunk)).all())
+    ranked = [product_id for product_id in ranked if product_id in allowed]
+
+    page = ranked[skip:skip + limit]
+    position = {product_id: index for index, product_id in enumerate(page)}
+    products = query.filter(Product.product_id.in_(page)).all() if page else []
+    products.sort(key=lambda product: position[product.product_id])
+    # Con el índice en memoria el total sale sin consultas
+    return Page(products, offset_cursor(skip + limit) if skip + limit < len(ranked) else None,
+                total=len(ranked) if with_total else None)
+
+def _postgres_search(query, term: str):
+    """Filtro y orden por relevancia con los índices GIN de la migración product_search"""
+    normalized = normalize_search_text(term).strip()
+    name = func.product_search_normalize(Product.name)
+    # Mismas expresiones que los índices: el '' debe ir literal, no como parámetro
+    description = func.product_search_normalize(func.coalesce(Product.description, literal_column("''")))
+    conditions = [
+        name.contains(normalized, autoescape=True),
+        description.contains(normalized, autoescape=True),
+        name.op("%")(normalized),
+    ]
+    rank = func.similarity(name, normalized)
+
+    words = search_words(term)
+    if words:
+        ts_query = func.to_tsquery("spanish", " & ".join(f"{word}:*" for word in words))
+        conditions.append(Product.search_vector.op("@@")(ts_query))
+        rank = rank + func.ts_rank_cd(Product.search_vector, ts_query)
+
+    return query.filter(or_(*conditions)).order_by(rank.desc(), Product.product_id)
@@ -0,0 +1,197 @@
+# utils/reorder.py
+import math
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import Float, cast, func, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.branch import Branch
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.sales_rollup import SalesDailyProduct
+from app.models.supplier import PurchaseOrder, PurchaseOrderItem, Supplier, SupplierProduct
+
+OPEN_ORDER_STATUSES = ('PENDING', 'APPROVED', 'PARTIALLY_DELIVERED')
+
+def _slots(ids: np.ndarray, universe: np.ndarray) -> np.ndarray:
+    """Posición de cada id en `universe` (-1 si no está), con una tabla indexada por id"""
+    size = int(max(ids.max(initial=0), universe.max(initial=0))) + 1
+    table = np.full(size, -1, dtype=np.int64)
+    table[universe] = np.arange(len(universe))
+    return table[ids]
+
+def choose_suppliers(product_ids: np.ndarray, supplier_ids: np.ndarray, costs: np.ndarray,
+                     lead_times: np.ndarray) -> np.ndarray:
+    """Índices de la oferta elegida por producto: menor costo y, a igual costo, menor plazo"""
+    order = np.lexsort((lead_times, costs, product_ids))
+    _, first = np.unique(product_ids[order], return_index=True)
+    return order[first]
+
+def plan_reorders(branch_ids: np.ndarray, product_ids: np.ndarray, min_stock: np.ndarray,
+                  lead_times: np.ndarray, sales: tuple, stock: tuple, window_days: int,
+                  review_days: float, service_z: float, on_order: Optional[tuple] = None) -> Dict[str, np.ndarray]:
+    """
+    Núcleo vectorizado del planificador, sobre una grilla sucursal × producto.
+    `product_ids` son los productos que se pueden pedir, con su mínimo y el plazo
+    del proveedor elegido; `sales` son arrays branch_id, product_id, suma y suma de
+    cuadrados de las ventas diarias del período (una fila por par o por día y par:
+    se acumulan) y `stock` el inventario actual (branch_id, product_id, quantity).
+    `on_order` es lo pedido y aún no recibido (branch_id, product_id, quantity; se
+    acumula): cuenta como stock para decidir y se descuenta de la cantidad a pedir.
+    Los ids se ubican en la grilla con una tabla por id, sin ordenar las filas.
+
+    Por cada par: velocidad = ventas / días, desvío diario con los días sin venta en
+    cero, stock de seguridad = z · desvío · √plazo. Se pide cuando el stock no cubre
+    el plazo más la seguridad y el mínimo, hasta cubrir además `review_days` de venta.
+    Devuelve arrays alineados con los pares a pedir.
+    """
+    cells = len(branch_ids) * len(product_ids)
+
+    def grid_index(branches: np.ndarray, products: np.ndarray):
+        branch_slot = _slots(branches, branch_ids)
+        product_slot = _slots(products, product_ids)
+        valid = (branch_slot >= 0) & (product_slot >= 0)
+        return branch_slot[valid] * len(product_ids) + product_slot[valid], valid
+
+    sales_index, sold = grid_index(sales[0], sales[1])
+    totals = np.bincount(sales_index, weights=sales[2][sold], minlength=cells)
+    squares = np.bincount(sales_index, weights=sales[3][sold], minlength=cells)
+    velocity = totals / window_days
+    deviation = np.sqrt(np.maximum(squares / window_days - velocity ** 2, 0))
+
+    stock_index, stocked = grid_index(stock[0], stock[1])
+    on_hand = np.zeros(cells)
+    on_hand[stock_index] = stock[2][stocked]
+    present = np.zeros(cells, dtype=bool)
+    present[stock_index] = True
+    present[sales_index] = True
+    pending = np.zeros(cells)
+    if on_order is not None:
+        order_index, ordered = grid_index(on_order[0], on_order[1])
+        pending = np.bincount(order_index, weights=on_order[2][ordered], minlength=cells)
+    position = on_hand + pending
+
+    lead = np.tile(lead_times, len(branch_ids))
+    minimum = np.tile(min_stock, len(branch_ids))
+    safety = service_z * deviation * np.sqrt(lead)
+    reorder_point = velocity * lead + safety + minimum
+    quantity = np.ceil(velocity * (lead + review_days) + safety + minimum - position)
+    selected = np.flatnonzero(present & (position <= reorder_point) & (quantity > 0))
+
+    product_index = selected % len(product_ids)
+    return {
+        "branch_id": branch_ids[selected // len(product_ids)],
+        "product_id": product_ids[product_index],
+        "product_index": product_index,
+        "quantity": quantity[selected],
+        "velocity": velocity[selected],
+        "stock": on_hand[selected],
+        "on_order": pending[selected],
+        "reorder_point": reorder_point[selected],
+    }
+
+def _arrays(db: Session, statement, dtypes: tuple) -> List[np.ndarray]:
+    rows = db.execute(statement).all()
+    return [
+        np.fromiter((row[position] for row in rows), dtype=dtype, count=len(rows))
+        for position, dtype in enumerate(dtypes)
+    ]
+
+def get_reorder_suggestions(db: Session, branch_id: Optional[int] = None, supplier_id: Optional[int] = None,
+                            as_of: Optional[date] = None) -> List[dict]:
+    """
+    Borradores de órdenes de compra (uno por proveedor y sucursal) calculados desde
+    sales_daily_product de los últimos REORDER_LOOKBACK_DAYS días, el stock actual,
+    min_stock y lead_time_days, descontando lo pendiente de recibir de las órdenes
+    abiertas. No se guarda nada: cada borrador tiene la forma de PurchaseOrderCreate
+    para enviarlo a /suppliers/orders/.
+    """
+    as_of = as_of or datetime.utcnow().date()
+    window_days = settings.REORDER_LOOKBACK_DAYS
+    default_lead = settings.REORDER_DEFAULT_LEAD_TIME_DAYS
+
+    # Ofertas vigentes de proveedores activos para productos activos
+    offers = select(
+        SupplierProduct.product_id, SupplierProduct.supplier_id,
+        cast(SupplierProduct.cost_price, Float),
+        func.coalesce(SupplierProduct.lead_time_days, default_lead),
+        func.coalesce(Product.min_stock, 0)
+    ).join(Product, Product.product_id == SupplierProduct.product_id) \
+     .join(Supplier, Supplier.supplier_id == SupplierProduct.supplier_id) \
+     .where(SupplierProduct.is_available == True, Supplier.is_active == True, Product.is_active == True)
+    offer_products, offer_suppliers, offer_costs, offer_leads, offer_min_stock = _arrays(
+        db, offers, (np.int64, np.int64, np.float64, np.float64, np.float64)
+    )
+    chosen = choose_suppliers(offer_products, offer_suppliers, offer_costs, offer_leads)
+    if supplier_id is not None:
+        chosen = chosen[offer_suppliers[chosen] == supplier_id]
+    if not len(chosen):
+        return []
+
+    # La base suma las filas diarias: viaja una fila por par en lugar de una por día
+    quantity = cast(SalesDailyProduct.quantity, Float)
+    sales = select(SalesDailyProduct.branch_id, SalesDailyProduct.product_id,
+                   func.sum(quantity), func.sum(quantity * quantity)) \
+        .where(SalesDailyProduct.day >= as_of - timedelta(days=window_days), SalesDailyProduct.day < as_of) \
+        .group_by(SalesDailyProduct.branch_id, SalesDailyProduct.product_id)
+    stock = select(Inventory.branch_id, Inventory.product_id, cast(Inventory.quantity, Float))
+    # Lo pedido y no recibido de órdenes abiertas: sin esto se volvería a sugerir
+    outstanding = PurchaseOrderItem.quantity - PurchaseOrderItem.received_quantity
+    on_order = select(PurchaseOrder.branch_id, PurchaseOrderItem.product_id, cast(func.sum(outstanding), Float)) \
+        .join(PurchaseOrder, PurchaseOrder.order_id == PurchaseOrderItem.order_id) \
+        .where(PurchaseOrder.status.in_(OPEN_ORDER_STATUSES), outstanding > 0) \
+        .group_by(PurchaseOrder.branch_id, PurchaseOrderItem.product_id)
+    branches = select(Branch.branch_id).order_by(Branch.branch_id)
+    if branch_id is not None:
+        sales = sales.where(SalesDailyProduct.branch_id == branch_id)
+        stock = stock.where(Inventory.branch_id == branch_id)
+        on_order = on_order.where(PurchaseOrder.branch_id == branch_id)
+        branches = branches.where(Branch.branch_id == branch_id)
+
+    plan = plan_reorders(
+        _arrays(db, branches, (np.int64,))[0],
+        offer_products[chosen], offer_min_stock[chosen], offer_leads[chosen],
+        tuple(_arrays(db, sales, (np.int64, np.int64, np.float64, np.float64))),
+        tuple(_arrays(db, stock, (np.int64, np.int64, np.float64))),
+        window_days, settings.REORDER_REVIEW_DAYS, settings.REORDER_SERVICE_Z,
+        tuple(_arrays(db, on_order, (np.int64, np.int64, np.float64)))
+    )
+    offer = chosen[plan["product_index"]]
+    suppliers = offer_suppliers[offer]
+    costs = offer_costs[offer]
+    leads = offer_leads[offer]
+
+    # Agrupar por (proveedor, sucursal) con un solo ordenamiento
+    order = np.lexsort((plan["product_id"], plan["branch_id"], suppliers))
+    group_keys = np.stack((suppliers[order], plan["branch_id"][order]))
+    starts = np.flatnonzero(np.r_[True, np.any(group_keys[:, 1:] != group_keys[:, :-1], axis=0)])
+    drafts = []
+    for group in np.split(order, starts[1:]) if len(order) else []:
+        lead = float(leads[group].max())
+        items = [
+            {
+                "product_id": int(plan["product_id"][i]),
+                "quantity": float(plan["quantity"][i]),
+                "unit_cost": float(costs[i]),
+                "stock": float(plan["stock"][i]),
+                "on_order": float(plan["on_order"][i]),
+                "daily_velocity": round(float(plan["velocity"][i]), 3),
+                "reorder_point": round(float(plan["reorder_point"][i]), 3),
+                "lead_time_days": int(leads[i]),
+            }
+            for i in group.tolist()
+        ]
+        drafts.append({
+            "supplier_id": int(suppliers[group[0]]),
+            "branch_id": int(plan["branch_id"][group[0]]),
+            "status": "PENDING",
+            "expected_delivery_date": datetime.combine(as_of + timedelta(days=math.ceil(lead)),
+                                                       datetime.min.time()).isoformat(),
+            "total_amount": round(float(np.dot(plan["quantity"][group], costs[group])), 2),
+            "notes": f"Sugerencia automática: {window_days} días de ventas",
+            "items": items,
+        })
+    return drafts
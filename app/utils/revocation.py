@@ -0,0 +1,113 @@
+# utils/revocation.py
+import threading
+import time
+from typing import Optional
+
+from app.config import settings
+
+class RevocationList:
+    """
+    Versión de token vigente por usuario y permisos de cada rol, cargados de las
+    tablas users y roles y refrescados cada `refresh_seconds`. Un token se rechaza
+    si su claim `ver` es menor que la versión vigente, si el usuario está inactivo
+    o si ya no existe. Ni los permisos ni is_superuser viajan en el token: un cambio
+    en Role.permissions o en User.is_superuser rige para los tokens ya emitidos
+    desde el siguiente refresco.
+    """
+
+    def __init__(self, refresh_seconds: float):
+        self.refresh_seconds = refresh_seconds
+        self._versions = {}  # user_id -> (token_version, is_active, role_id, is_superuser)
+        self._permissions = {}  # role_id -> permisos del rol
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def refresh(self, session_factory=None):
+        """Recarga las versiones vigentes desde la base de datos"""
+        from app.database import SessionLocal
+        from app.models.role import Role
+        from app.models.user import User
+
+        with self._refresh_lock:
+            db = (session_factory or SessionLocal)()
+            try:
+                rows = db.query(User.user_id, User.token_version, User.is_active, User.role_id,
+                                User.is_superuser).all()
+                roles = db.query(Role.role_id, Role.permissions).all()
+            finally:
+                db.close()
+            versions = {
+                user_id: (version or 0, bool(is_active), role_id, bool(is_superuser))
+                for user_id, version, is_active, role_id, is_superuser in rows
+            }
+            permissions = {role_id: dict(role_permissions or {}) for role_id, role_permissions in roles}
+            with self._lock:
+                self._versions = versions
+                self._permissions = permissions
+                self._loaded_at = time.monotonic()
+
+    def _ensure_fresh(self, user_id: int):
+        age = time.monotonic() - self._loaded_at
+        # Sin hilo de refresco (scripts, tests) se refresca al vencer el intervalo;
+        # un usuario desconocido puede ser recién creado: se recarga como mucho una vez por segundo
+        stale = self._thread is None and age > self.refresh_seconds
+        if stale or (user_id not in self._versions and age > 1):
+            self.refresh()
+
+    def is_revoked(self, user_id: int, token_version: int) -> bool:
+        self._ensure_fresh(user_id)
+        with self._lock:
+            current = self._versions.get(user_id)
+        if current is None:
+            return True
+        version, is_active, _, _ = current
+        return not is_active or token_version < version
+
+    def permissions(self, user_id: int) -> dict:
+        """Permisos vigentes del rol actual del usuario (llamar después de is_revoked)"""
+        with self._lock:
+            current = self._versions.get(user_id)
+            if current is None:
+                return {}
+            return self._permissions.get(current[2], {})
+
+    def is_superuser(self, user_id: int) -> bool:
+        """Valor vigente de User.is_superuser (llamar después de is_revoked)"""
+        with self._lock:
+            current = self._versions.get(user_id)
+            return current is not None and current[3]
+
+    def revoke(self, user_id: int, token_version: Optional[int] = None, is_active: bool = True,
+               role_id: Optional[int] = None, is_superuser: bool = False):
+        """Aplica un cambio en este proceso sin esperar al próximo refresco"""
+        with self._lock:
+            if token_version is None:
+                self._versions.pop(user_id, None)
+            else:
+                self._versions[user_id] = (token_version, is_active, role_id, is_superuser)
+
+    def start(self):
+        """Inicia el refresco periódico en un hilo de fondo"""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.refresh_seconds):
+                try:
+                    self.refresh()
+                except Exception:
+                    # Se conserva la última lista cargada hasta el siguiente intento
+                    pass
+
+        self._thread = threading.Thread(target=loop, name="token-revocation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread = None
+
+revocations = RevocationList(refresh_seconds=settings.TOKEN_REVOCATION_REFRESH_SECONDS)
@@ -1,17 +1,93 @@
 # utils/sales.py
-from datetime import datetime
-import random
-import string
+import os
+import threading
+from datetime import datetime, date
+from typing import Optional
+from app.config import settings
 from app.models import Inventory, Product  # Import the Inventory and Product models
+from app.models.invoice_counter import InvoiceCounter
+from app.utils.db import dialect_insert
 
-def generate_invoice_number():
-    # Formato: YYYYMMDD-XXXXX (ej. 20230515-ABC123)
-    date_part = datetime.now().strftime("%Y%m%d")
-    random_part = ''.join(random.choices(
-        string.ascii_uppercase + string.digits, 
-        k=5
-    ))
-    return f"{date_part}-{random_part}"
+def format_invoice_number(branch_id: int, day: date, value: int) -> str:
+    # Formato: YYYYMMDD-SUCURSAL-NNNNNN (ej. 20230515-3-000042)
+    return f"{day.strftime('%Y%m%d')}-{branch_id}-{value:06d}"
+
+def reserve_invoice_block(connection, branch_id: int, day: date, size: int) -> int:
+    """
+    Reserva atómicamente `size` números consecutivos para la sucursal y el día.
+    Devuelve el primer número del bloque. El contador se confirma antes de usar
+    los números, así que tras un reinicio nunca se reutiliza uno ya entregado.
+    """
+    insert = dialect_insert(connection)
+    stmt = insert(InvoiceCounter).values(branch_id=branch_id, day=day, last_value=size)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[InvoiceCounter.branch_id, InvoiceCounter.day],
+        set_={"last_value": InvoiceCounter.last_value + size}
+    ).returning(InvoiceCounter.last_value)
+    last_value = connection.execute(stmt).scalar_one()
+    return last_value - size + 1
+
+class InvoiceNumberAllocator:
+    """
+    Entrega números de factura únicos por sucursal y día desde memoria.
+    Cada proceso reserva bloques en la tabla invoice_counters y solo vuelve a la
+    base de datos cuando agota su bloque. El día es el de Sale.sale_date (UTC).
+    """
+
+    def __init__(self, engine=None, block_size: Optional[int] = None):
+        self._engine = engine
+        self.block_size = block_size or settings.INVOICE_BLOCK_SIZE
+        self._blocks = {}  # (branch_id, day) -> bloques [siguiente, último] en orden
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            from app.database import engine
+            self._engine = engine
+        return self._engine
+
+    def _take(self, key) -> Optional[int]:
+        """Siguiente número de los bloques en memoria (con el lock tomado)"""
+        if self._pid != os.getpid():
+            # Proceso hijo (fork): los bloques heredados pertenecen al padre
+            self._blocks.clear()
+            self._pid = os.getpid()
+        blocks = self._blocks.get(key)
+        while blocks:
+            block = blocks[0]
+            if block[0] <= block[1]:
+                value = block[0]
+                block[0] += 1
+                return value
+            blocks.pop(0)
+        return None
+
+    def next_number(self, branch_id: int, day: Optional[date] = None, bind=None) -> str:
+        day = day or datetime.utcnow().date()
+        key = (branch_id, day)
+        with self._lock:
+            value = self._take(key)
+        while value is None:
+            # La reserva va sin el lock: la fila de invoice_counters ya serializa a
+            # quienes reservan el mismo día y sucursal, y las demás cajas siguen
+            # entregando números de sus bloques mientras tanto
+            with (bind or self.engine).begin() as connection:
+                start = reserve_invoice_block(connection, branch_id, day, self.block_size)
+            with self._lock:
+                # Descartar bloques de días anteriores
+                self._blocks = {k: v for k, v in self._blocks.items() if k[1] >= day}
+                blocks = self._blocks.setdefault(key, [])
+                blocks.append([start, start + self.block_size - 1])
+                blocks.sort()
+                value = self._take(key)
+        return format_invoice_number(branch_id, day, value)
+
+invoice_numbers = InvoiceNumberAllocator()
+
+def generate_invoice_number(branch_id: int, day: Optional[date] = None, bind=None):
+    return invoice_numbers.next_number(branch_id, day, bind=bind)
 
 def validate_sale_items(items, branch_id, db):
     """Valida que los productos tengan suficiente stock"""
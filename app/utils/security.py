@@ -1,26 +1,31 @@
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from starlette.concurrency import run_in_threadpool
 
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User
 from app.schemas.auth import TokenData
+from app.utils.principal_cache import principal_cache, UserSnapshot
+from app.utils.revocation import revocations
+from app.utils.passwords import password_hasher
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+    return password_hasher.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str):
-    return pwd_context.hash(password)
+    return password_hasher.hash(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -32,27 +37,101 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-):
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="No se pudieron validar las credenciales",
-        headers={"WWW-Authenticate": "Bearer"},
+def create_user_token(user, expires_delta: Optional[timedelta] = None) -> str:
+    """
+    Token con los claims necesarios para autorizar sin consultar la base de datos.
+    Los permisos del rol e is_superuser no van en el token: se leen de la lista de revocaciones.
+    """
+    return create_access_token(
+        data={
+            "sub": user.username,
+            "uid": user.user_id,
+            "role_id": user.role_id,
+            "ver": user.token_version or 0
+        },
+        expires_delta=expires_delta
     )
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="No se pudieron validar las credenciales",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+def decode_access_token(token: str) -> dict:
+    """Verifica firma, expiración y revocación del token y devuelve sus claims"""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
     except JWTError:
         raise credentials_exception
-    
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
+    if payload.get("sub") is None or payload.get("uid") is None or "ver" not in payload:
+        # Tokens emitidos antes de los claims de autorización: se debe iniciar sesión de nuevo
+        raise credentials_exception
+    if revocations.is_revoked(payload["uid"], payload["ver"]):
         raise credentials_exception
+    return payload
+
+@dataclass(frozen=True)
+class TokenPrincipal:
+    """Usuario autenticado construido a partir de los claims del token y de los permisos vigentes de su rol"""
+    user_id: int
+    username: str
+    role_id: Optional[int]
+    permissions: dict
+    is_superuser: bool
+    token_version: int
+    is_active: bool = True  # Los usuarios inactivos quedan revocados
+
+    def has_permission(self, *keys: str) -> bool:
+        if self.is_superuser or self.permissions.get("all"):
+            return True
+        return any(self.permissions.get(key) for key in keys)
+
+def get_current_principal(token: str = Depends(oauth2_scheme)) -> TokenPrincipal:
+    """Autentica sin consultas a la base de datos"""
+    payload = decode_access_token(token)
+    return TokenPrincipal(
+        user_id=payload["uid"],
+        username=payload["sub"],
+        role_id=payload.get("role_id"),
+        permissions=revocations.permissions(payload["uid"]),
+        is_superuser=revocations.is_superuser(payload["uid"]),
+        token_version=payload["ver"]
+    )
+
+def require_permission(*keys: str):
+    """
+    Dependencia que exige alguno de los permisos del rol (Role.permissions),
+    p. ej. Depends(require_permission("sales")). "all" y superusuario pasan siempre.
+    """
+    def dependency(principal: TokenPrincipal = Depends(get_current_principal)) -> TokenPrincipal:
+        if not principal.has_permission(*keys):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Se requiere el permiso: {', '.join(keys)}"
+            )
+        return principal
+    return dependency
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Usuario completo (nombre, rol), para los endpoints de perfil"""
+    # La verificación puede recargar las revocaciones desde la base (consulta síncrona)
+    payload = await run_in_threadpool(decode_access_token, token)
+    token_data = TokenData(username=payload["sub"])
+
+    # Evitar la consulta a la base de datos si el usuario ya está en cache
+    user = principal_cache.get(token_data.username)
+    if user is None:
+        db_user = (await db.execute(
+            select(User).options(joinedload(User.role)).where(User.username == token_data.username)
+        )).scalars().first()
+        if db_user is None:
+            raise credentials_exception
+        user = UserSnapshot.from_user(db_user)
+        principal_cache.put(user)
     return user
 
 def get_current_active_user(current_user: User = Depends(get_current_user)):
@@ -60,7 +139,7 @@ def get_current_active_user(current_user: User = Depends(get_current_user)):
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     return current_user
 
-def admin_required(current_user: User = Depends(get_current_active_user)):
+def admin_required(current_user: TokenPrincipal = Depends(get_current_principal)):
     """
     Dependencia que verifica si el usuario es administrador
     """
@@ -69,4 +148,4 @@ def admin_required(current_user: User = Depends(get_current_active_user)):
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Se requieren privilegios de administrador"
         )
-    return current_user
\ No newline at end of file
+    return current_user
@@ -11,11 +11,12 @@ from app.models.base import Base
 from app.config import settings
 
 config = context.config
+config.set_main_option("sqlalchemy.url", str(settings.DATABASE_URL))
 fileConfig(config.config_file_name)
 target_metadata = Base.metadata
 
 def run_migrations_offline():
-    url = settings.DATABASE_URL
+    url = str(settings.DATABASE_URL)
     context.configure(
         url=url,
         target_metadata=target_metadata,
@@ -0,0 +1,38 @@
+"""Contadores de números de factura por sucursal y día
+
+Revision ID: 1c7e9a3b5d02
+Revises:
+Create Date: 2026-10-18 19:00:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c7e9a3b5d02'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la tabla no existe
+    return not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Las bases creadas con scripts/init_db.py (create_all) ya tienen la tabla
+    if _has_table('invoice_counters'):
+        return
+    op.create_table(
+        'invoice_counters',
+        sa.Column('branch_id', sa.Integer(), sa.ForeignKey('branches.branch_id'), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('last_value', sa.BigInteger(), nullable=False, server_default='0'),
+        sa.PrimaryKeyConstraint('branch_id', 'day'),
+    )
+
+
+def downgrade():
+    op.drop_table('invoice_counters')
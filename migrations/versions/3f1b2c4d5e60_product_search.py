@@ -0,0 +1,71 @@
+"""Búsqueda de productos: tsvector, pg_trgm y unaccent
+
+Revision ID: 3f1b2c4d5e60
+Revises: 9d1f3a5c7e24
+Create Date: 2026-10-18 19:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1b2c4d5e60'
+down_revision = '9d1f3a5c7e24'
+branch_labels = None
+depends_on = None
+
+SEARCH_VECTOR = """
+    setweight(to_tsvector('spanish', product_search_normalize(coalesce({row}name, ''))), 'A') ||
+    setweight(to_tsvector('spanish', product_search_normalize(coalesce({row}description, ''))), 'B')
+"""
+
+
+def upgrade():
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+
+    # unaccent() no es IMMUTABLE; se envuelve con el diccionario explícito para poder indexar
+    op.execute("""
+        CREATE OR REPLACE FUNCTION product_search_normalize(text) RETURNS text AS $$
+            SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1))
+        $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+    """)
+
+    # La columna también está en el modelo: una base creada con create_all (scripts/init_db.py) ya la tiene
+    op.execute("ALTER TABLE products ADD COLUMN IF NOT EXISTS search_vector tsvector")
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION products_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS products_search_vector_trigger ON products")
+    op.execute("""
+        CREATE TRIGGER products_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF name, description ON products
+        FOR EACH ROW EXECUTE FUNCTION products_search_vector_update()
+    """)
+    op.execute(f"UPDATE products SET search_vector = {SEARCH_VECTOR.format(row='')}")
+
+    op.execute("CREATE INDEX IF NOT EXISTS ix_products_search_vector ON products USING gin (search_vector)")
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products
+        USING gin (product_search_normalize(name) gin_trgm_ops)
+    """)
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_products_description_trgm ON products
+        USING gin (product_search_normalize(coalesce(description, '')) gin_trgm_ops)
+    """)
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_products_description_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_products_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_products_search_vector")
+    op.execute("DROP TRIGGER IF EXISTS products_search_vector_trigger ON products")
+    op.execute("DROP FUNCTION IF EXISTS products_search_vector_update()")
+    op.drop_column('products', 'search_vector')
+    op.execute("DROP FUNCTION IF EXISTS product_search_normalize(text)")
@@ -0,0 +1,94 @@
+"""Resúmenes diarios de ventas (sales_daily_*) con carga inicial desde el histórico
+
+Revision ID: 5b8e2d4c9a17
+Revises: 1c7e9a3b5d02
+Create Date: 2026-10-18 19:05:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b8e2d4c9a17'
+down_revision = '1c7e9a3b5d02'
+branch_labels = None
+depends_on = None
+
+NO_CATEGORY = 0  # Igual que app.crud.sales_rollup.NO_CATEGORY
+
+
+def _has_table(name):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la tabla no existe
+    return not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Las bases creadas con scripts/init_db.py (create_all) ya tienen las tablas, mantenidas por create_sale
+    if _has_table('sales_daily_branch'):
+        return
+
+    op.create_table(
+        'sales_daily_branch',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('branch_id', sa.Integer(), nullable=False),
+        sa.Column('sales_count', sa.Integer(), nullable=False),
+        sa.Column('subtotal', sa.Numeric(14, 2), nullable=False),
+        sa.Column('discount', sa.Numeric(14, 2), nullable=False),
+        sa.Column('total', sa.Numeric(14, 2), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'branch_id'),
+    )
+    op.create_table(
+        'sales_daily_category',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('branch_id', sa.Integer(), nullable=False),
+        sa.Column('category_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Numeric(14, 3), nullable=False),
+        sa.Column('total', sa.Numeric(14, 2), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'branch_id', 'category_id'),
+    )
+    op.create_table(
+        'sales_daily_product',
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('branch_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Numeric(14, 3), nullable=False),
+        sa.Column('total', sa.Numeric(14, 2), nullable=False),
+        sa.PrimaryKeyConstraint('day', 'branch_id', 'product_id'),
+    )
+    op.create_index('ix_sales_daily_product_product_id', 'sales_daily_product', ['product_id'])
+
+    # Carga inicial: las mismas consultas que rebuild_sales_rollups (scripts/backfill_sales_rollups.py)
+    op.execute("""
+        INSERT INTO sales_daily_branch (day, branch_id, sales_count, subtotal, discount, total)
+        SELECT date(s.sale_date), s.branch_id, count(s.sale_id),
+               coalesce(sum(s.subtotal), 0), coalesce(sum(s.discount), 0), coalesce(sum(s.total), 0)
+        FROM sales s
+        WHERE s.branch_id IS NOT NULL
+        GROUP BY date(s.sale_date), s.branch_id
+    """)
+    op.execute(f"""
+        INSERT INTO sales_daily_category (day, branch_id, category_id, quantity, total)
+        SELECT date(s.sale_date), s.branch_id, coalesce(p.category_id, {NO_CATEGORY}),
+               sum(d.quantity), sum(d.total_line)
+        FROM sale_details d
+        JOIN sales s ON s.sale_id = d.sale_id
+        JOIN products p ON p.product_id = d.product_id
+        WHERE s.branch_id IS NOT NULL
+        GROUP BY date(s.sale_date), s.branch_id, coalesce(p.category_id, {NO_CATEGORY})
+    """)
+    op.execute("""
+        INSERT INTO sales_daily_product (day, branch_id, product_id, quantity, total)
+        SELECT date(s.sale_date), s.branch_id, d.product_id, sum(d.quantity), sum(d.total_line)
+        FROM sale_details d
+        JOIN sales s ON s.sale_id = d.sale_id
+        WHERE s.branch_id IS NOT NULL AND d.product_id IS NOT NULL
+        GROUP BY date(s.sale_date), s.branch_id, d.product_id
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_sales_daily_product_product_id', table_name='sales_daily_product')
+    op.drop_table('sales_daily_product')
+    op.drop_table('sales_daily_category')
+    op.drop_table('sales_daily_branch')
@@ -0,0 +1,27 @@
+"""Índices para paginación por clave de productos y ventas
+
+Revision ID: 8a4d6e2f1b73
+Revises: 3f1b2c4d5e60
+Create Date: 2026-10-18 20:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4d6e2f1b73'
+down_revision = '3f1b2c4d5e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Índices también declarados en los modelos (create_all ya los crea)
+    op.create_index('ix_products_name_product_id', 'products', ['name', 'product_id'], if_not_exists=True)
+    op.create_index('ix_sales_sale_date_sale_id', 'sales', ['sale_date', 'sale_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_sales_sale_date_sale_id', table_name='sales')
+    op.drop_index('ix_products_name_product_id', table_name='products')
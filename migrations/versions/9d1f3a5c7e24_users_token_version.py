@@ -0,0 +1,34 @@
+"""Versión de token por usuario para revocar los tokens emitidos
+
+Revision ID: 9d1f3a5c7e24
+Revises: 5b8e2d4c9a17
+Create Date: 2026-10-18 19:12:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d1f3a5c7e24'
+down_revision = '5b8e2d4c9a17'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la columna no existe
+    if context.is_offline_mode():
+        return False
+    return column in {existing['name'] for existing in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    # Las bases creadas con scripts/init_db.py (create_all) ya tienen la columna
+    if _has_column('users', 'token_version'):
+        return
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    op.drop_column('users', 'token_version')
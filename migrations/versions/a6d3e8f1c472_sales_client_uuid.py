@@ -0,0 +1,36 @@
+"""UUID de la caja en ventas sincronizadas fuera de línea
+
+Revision ID: a6d3e8f1c472
+Revises: f2c8d4b6a913
+Create Date: 2026-10-19 15:00:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6d3e8f1c472'
+down_revision = 'f2c8d4b6a913'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la columna no existe
+    if context.is_offline_mode():
+        return False
+    return column in {existing['name'] for existing in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    # Las bases creadas con scripts/init_db.py (create_all) ya tienen la columna y la restricción
+    if _has_column('sales', 'client_uuid'):
+        return
+    op.add_column('sales', sa.Column('client_uuid', sa.String(36), nullable=True))
+    op.create_unique_constraint('uq_sales_client_uuid', 'sales', ['client_uuid'])
+
+
+def downgrade():
+    op.drop_constraint('uq_sales_client_uuid', 'sales', type_='unique')
+    op.drop_column('sales', 'client_uuid')
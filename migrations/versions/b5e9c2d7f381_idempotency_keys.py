@@ -0,0 +1,48 @@
+"""Claves de idempotencia compartidas entre workers
+
+Revision ID: b5e9c2d7f381
+Revises: a6d3e8f1c472
+Create Date: 2026-10-20 10:00:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5e9c2d7f381'
+down_revision = 'a6d3e8f1c472'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la tabla no existe
+    return not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Las bases creadas con scripts/init_db.py (create_all) ya tienen la tabla
+    if _has_table('idempotency_keys'):
+        return
+    op.create_table(
+        'idempotency_keys',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('caller', sa.String(80), nullable=False),
+        sa.Column('method', sa.String(10), nullable=False),
+        sa.Column('path', sa.String(500), nullable=False),
+        sa.Column('idempotency_key', sa.String(255), nullable=False),
+        sa.Column('fingerprint', sa.String(64), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('headers', sa.JSON(), nullable=True),
+        sa.Column('body', sa.LargeBinary(), nullable=True),
+        sa.Column('expires_at', sa.DateTime(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.func.now()),
+        sa.UniqueConstraint('caller', 'method', 'path', 'idempotency_key', name='uq_idempotency_keys_caller_key'),
+    )
+    op.create_index('ix_idempotency_keys_expires_at', 'idempotency_keys', ['expires_at'])
+
+
+def downgrade():
+    op.drop_index('ix_idempotency_keys_expires_at', table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
@@ -0,0 +1,110 @@
+"""Libro de movimientos de inventario particionado por mes y fotos por sucursal
+
+Revision ID: c41e7b9a2d58
+Revises: 8a4d6e2f1b73
+Create Date: 2026-10-18 22:00:00
+
+"""
+from datetime import date, timedelta
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41e7b9a2d58'
+down_revision = '8a4d6e2f1b73'
+branch_labels = None
+depends_on = None
+
+PARTITIONS_AHEAD = 3  # Luego las crea scripts/compact_inventory_snapshots.py
+
+
+def _next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _has_table(name):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la tabla no existe
+    return not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Una base creada con scripts/init_db.py (create_all) ya tiene las tablas, pero
+    # inventory_movements sin particionar: se reemplaza y se copian sus filas.
+    # En modo offline (--sql) se asume que no existen
+    existing_kind = None
+    if not context.is_offline_mode():
+        existing_kind = op.get_bind().execute(sa.text(
+            "SELECT relkind FROM pg_class WHERE relname = 'inventory_movements' AND relkind IN ('r', 'p')"
+        )).scalar()
+    if existing_kind == 'r':
+        op.execute("ALTER TABLE inventory_movements RENAME TO inventory_movements_unpartitioned")
+        op.execute("DROP INDEX IF EXISTS ix_inventory_movements_branch_created")
+
+    if existing_kind != 'p':
+        # La clave primaria de una tabla particionada debe incluir la columna de partición
+        op.execute("""
+            CREATE TABLE inventory_movements (
+                movement_id bigint GENERATED BY DEFAULT AS IDENTITY,
+                created_at timestamp without time zone NOT NULL,
+                product_id integer NOT NULL,
+                branch_id integer NOT NULL,
+                quantity_delta numeric(12, 3) NOT NULL,
+                movement_type varchar(20) NOT NULL,
+                reference_id integer,
+                user_id integer,
+                PRIMARY KEY (movement_id, created_at)
+            ) PARTITION BY RANGE (created_at)
+        """)
+        op.execute("CREATE TABLE inventory_movements_default PARTITION OF inventory_movements DEFAULT")
+        month = date.today().replace(day=1)
+        for _ in range(PARTITIONS_AHEAD + 1):
+            op.execute(
+                f"CREATE TABLE inventory_movements_y{month:%Y}m{month:%m} PARTITION OF inventory_movements "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+            )
+            month = _next_month(month)
+        op.create_index('ix_inventory_movements_branch_created', 'inventory_movements', ['branch_id', 'created_at'])
+
+    if existing_kind == 'r':
+        op.execute("""
+            INSERT INTO inventory_movements (movement_id, created_at, product_id, branch_id,
+                                             quantity_delta, movement_type, reference_id, user_id)
+            SELECT movement_id, created_at, product_id, branch_id,
+                   quantity_delta, movement_type, reference_id, user_id
+            FROM inventory_movements_unpartitioned
+        """)
+        op.execute("""
+            SELECT setval(pg_get_serial_sequence('inventory_movements', 'movement_id'),
+                          coalesce(max(movement_id), 0) + 1, false)
+            FROM inventory_movements
+        """)
+        op.execute("DROP TABLE inventory_movements_unpartitioned")
+
+    if not _has_table('inventory_snapshots'):
+        op.create_table(
+            'inventory_snapshots',
+            sa.Column('snapshot_id', sa.BigInteger(), primary_key=True, autoincrement=True),
+            sa.Column('branch_id', sa.Integer(), nullable=False),
+            sa.Column('product_id', sa.Integer(), nullable=False),
+            sa.Column('quantity', sa.Numeric(14, 3), nullable=False),
+            sa.Column('taken_at', sa.DateTime(), nullable=False),
+        )
+        op.create_index('ix_inventory_snapshots_branch_taken', 'inventory_snapshots',
+                        ['branch_id', 'taken_at', 'product_id'])
+
+    # Foto inicial: el stock actual de cada sucursal (product_id 0 marca sucursales sin inventario)
+    op.execute("""
+        INSERT INTO inventory_snapshots (branch_id, product_id, quantity, taken_at)
+        SELECT branch_id, product_id, quantity, now() AT TIME ZONE 'utc' FROM inventory
+        UNION ALL
+        SELECT b.branch_id, 0, 0, now() AT TIME ZONE 'utc' FROM branches b
+        WHERE NOT EXISTS (SELECT 1 FROM inventory i WHERE i.branch_id = b.branch_id)
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_inventory_snapshots_branch_taken', table_name='inventory_snapshots')
+    op.drop_table('inventory_snapshots')
+    op.execute("DROP TABLE inventory_movements")  # Elimina también las particiones
@@ -0,0 +1,36 @@
+"""Fecha de modificación de productos (refresco del índice de códigos de barras)
+
+Revision ID: c8f3a1e6d925
+Revises: b5e9c2d7f381
+Create Date: 2026-10-20 16:00:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c8f3a1e6d925'
+down_revision = 'b5e9c2d7f381'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la columna no existe
+    if context.is_offline_mode():
+        return False
+    return column in {existing['name'] for existing in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    # Las bases creadas con scripts/init_db.py (create_all) ya tienen la columna
+    if _has_column('products', 'updated_at'):
+        return
+    op.add_column('products', sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now()))
+    op.create_index('ix_products_updated_at', 'products', ['updated_at'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_products_updated_at', table_name='products')
+    op.drop_column('products', 'updated_at')
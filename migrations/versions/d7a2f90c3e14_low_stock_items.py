@@ -0,0 +1,50 @@
+"""Lista mantenida de productos por debajo del stock mínimo por sucursal
+
+Revision ID: d7a2f90c3e14
+Revises: c41e7b9a2d58
+Create Date: 2026-10-18 23:00:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd7a2f90c3e14'
+down_revision = 'c41e7b9a2d58'
+branch_labels = None
+depends_on = None
+
+
+def _has_table(name):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la tabla no existe
+    return not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table(name)
+
+
+def upgrade():
+    # Las bases creadas con scripts/init_db.py (create_all) ya tienen la tabla, mantenida por la aplicación
+    if _has_table('low_stock_items'):
+        return
+    op.create_table(
+        'low_stock_items',
+        sa.Column('branch_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('quantity', sa.Numeric(10, 3), nullable=False),
+        sa.Column('min_stock', sa.Integer(), nullable=False),
+        sa.Column('since', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('branch_id', 'product_id'),
+    )
+    op.create_index('ix_low_stock_items_product_id', 'low_stock_items', ['product_id'])
+
+    # Carga inicial en una sola pasada por inventory
+    op.execute("""
+        INSERT INTO low_stock_items (branch_id, product_id, quantity, min_stock, since)
+        SELECT i.branch_id, i.product_id, i.quantity, p.min_stock, now() AT TIME ZONE 'utc'
+        FROM inventory i JOIN products p ON p.product_id = i.product_id
+        WHERE p.is_active AND p.min_stock IS NOT NULL AND i.quantity < p.min_stock
+    """)
+
+
+def downgrade():
+    op.drop_index('ix_low_stock_items_product_id', table_name='low_stock_items')
+    op.drop_table('low_stock_items')
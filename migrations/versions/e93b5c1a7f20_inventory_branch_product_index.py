@@ -0,0 +1,24 @@
+"""Índice (branch_id, product_id) de inventory para paginar y recorrer por sucursal
+
+Revision ID: e93b5c1a7f20
+Revises: d7a2f90c3e14
+Create Date: 2026-10-19 09:00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93b5c1a7f20'
+down_revision = 'd7a2f90c3e14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # También declarado en el modelo (create_all ya lo crea)
+    op.create_index('ix_inventory_branch_product', 'inventory', ['branch_id', 'product_id'], if_not_exists=True)
+
+
+def downgrade():
+    op.drop_index('ix_inventory_branch_product', table_name='inventory')
@@ -0,0 +1,38 @@
+"""Cantidad recibida por línea de orden de compra
+
+Revision ID: f2c8d4b6a913
+Revises: e93b5c1a7f20
+Create Date: 2026-10-19 11:00:00
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f2c8d4b6a913'
+down_revision = 'e93b5c1a7f20'
+branch_labels = None
+depends_on = None
+
+
+def _has_column(table, column):
+    # En modo offline (--sql) no hay base que inspeccionar: se asume que la columna no existe
+    if context.is_offline_mode():
+        return False
+    return column in {existing['name'] for existing in sa.inspect(op.get_bind()).get_columns(table)}
+
+
+def upgrade():
+    # Las bases creadas con scripts/init_db.py (create_all) ya tienen la columna, mantenida al recibir
+    if _has_column('purchase_order_items', 'received_quantity'):
+        return
+    op.add_column('purchase_order_items', sa.Column('received_quantity', sa.Numeric(10, 2),
+                                                    nullable=False, server_default='0'))
+    # Hasta ahora el inventario se sumaba completo al crear la orden: las órdenes
+    # existentes ya están recibidas en el stock
+    op.execute("UPDATE purchase_order_items SET received_quantity = quantity")
+
+
+def downgrade():
+    op.drop_column('purchase_order_items', 'received_quantity')
@@ -0,0 +1,44 @@
+"""
+Reconstruye los resúmenes diarios de ventas (sales_daily_*) desde el histórico.
+
+Uso:
+    python scripts/backfill_sales_rollups.py           # reconstruir y verificar
+    python scripts/backfill_sales_rollups.py --check   # solo verificar
+"""
+import argparse
+import os
+import sys
+import time
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.crud.sales_rollup import rebuild_sales_rollups, check_rollup_consistency
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--check", action="store_true", help="Solo verificar, sin reconstruir")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.check:
+            started = time.perf_counter()
+            rebuild_sales_rollups(db)
+            print(f"Resúmenes reconstruidos en {time.perf_counter() - started:.2f}s")
+
+        mismatches = check_rollup_consistency(db)
+        for mismatch in mismatches:
+            print(mismatch)
+        if mismatches:
+            print(f"{len(mismatches)} diferencias encontradas")
+            sys.exit(1)
+        print("Resúmenes consistentes con las ventas")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
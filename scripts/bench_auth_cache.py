@@ -0,0 +1,87 @@
+"""
+Benchmark del cache de usuarios autenticados.
+
+Mide latencia p50/p99 de GET /products/{id}, que autoriza solo con los claims
+del token, y de GET /users/me con y sin el cache de principal
+(app/utils/principal_cache.py), usando la base de datos configurada.
+
+Uso:
+    python scripts/bench_auth_cache.py --username admin --product-id 1
+    python scripts/bench_auth_cache.py --username admin --product-id 1 --requests 5000
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.config import settings
+from app.database import SessionLocal
+from app.crud.user import get_user_by_username
+from app.utils.security import create_user_token
+from app.utils.principal_cache import principal_cache
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run(client, url, headers, requests):
+    # Calentamiento: conexiones del pool y primera carga del cache
+    for _ in range(20):
+        client.get(url, headers=headers)
+
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        response = client.get(url, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise SystemExit(f"Respuesta inesperada {response.status_code}: {response.text}")
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--username", required=True, help="Usuario existente con el que firmar el token")
+    parser.add_argument("--product-id", type=int, required=True, help="Producto existente a consultar")
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        user = get_user_by_username(db, args.username)
+        if user is None:
+            raise SystemExit(f"Usuario no encontrado: {args.username}")
+        token = create_user_token(user)
+    finally:
+        db.close()
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app, base_url="https://testserver")
+
+    cases = [
+        ("products claims  ", f"{settings.API_V1_STR}/products/{args.product_id}", True),
+        ("users/me cache off", f"{settings.API_V1_STR}/users/me", False),
+        ("users/me cache on ", f"{settings.API_V1_STR}/users/me", True),
+    ]
+    for name, url, enabled in cases:
+        principal_cache.enabled = enabled
+        principal_cache.clear()
+        samples = run(client, url, headers, args.requests)
+        print(
+            f"{name} peticiones={len(samples)} "
+            f"p50={percentile(samples, 50):.2f}ms p99={percentile(samples, 99):.2f}ms "
+            f"media={statistics.mean(samples):.2f}ms"
+        )
+    print(f"estadísticas del cache: {principal_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
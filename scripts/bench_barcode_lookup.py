@@ -0,0 +1,98 @@
+"""
+Benchmark de la búsqueda por código de barras.
+
+Compara la búsqueda en la base (SELECT por Product.barcode + ProductOut) con el
+índice en memoria (app.utils.barcode_index), y mide el endpoint
+GET /api/v1/products/barcode/{code} completo. Reporta p50/p99 en microsegundos.
+
+Uso:
+    python scripts/bench_product_search.py --seed 100000    # sembrar productos
+    python scripts/bench_barcode_lookup.py
+    python scripts/bench_barcode_lookup.py --url sqlite:///bench.db --lookups 20000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import SessionLocal, get_db
+from app.main import app
+from app.models.product import Product
+from app.schemas.product import ProductOut
+from app.utils.barcode_index import barcode_index
+from app.utils.security import TokenPrincipal, get_current_principal
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(lookup, barcodes):
+    samples = []
+    for barcode in barcodes:
+        started = time.perf_counter()
+        lookup(barcode)
+        samples.append((time.perf_counter() - started) * 1_000_000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=5000, help="Búsquedas por caso")
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        session_factory = sessionmaker(bind=create_engine(args.url), autoflush=False)
+
+    db = session_factory()
+    try:
+        all_barcodes = [row[0] for row in db.query(Product.barcode).filter(Product.is_active == True).all()]
+        if not all_barcodes:
+            print("No hay productos; sembrar con scripts/bench_product_search.py --seed N")
+            return
+        barcodes = [random.choice(all_barcodes) for _ in range(args.lookups)]
+
+        started = time.perf_counter()
+        barcode_index.load(db)
+        print(f"productos={len(all_barcodes)} índice cargado en {time.perf_counter() - started:.2f}s")
+
+        def database_lookup(barcode):
+            product = db.query(Product).filter(Product.barcode == barcode).first()
+            return ProductOut.model_validate(product).model_dump()
+
+        def index_lookup(barcode):
+            return barcode_index.get(db, barcode)
+
+        def override_get_db():
+            yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_current_principal] = lambda: TokenPrincipal(
+            user_id=0, username="bench", role_id=None, permissions={"all": True},
+            is_superuser=True, token_version=0
+        )
+        client = TestClient(app, base_url="https://testserver")
+
+        def endpoint_lookup(barcode):
+            client.get(f"/api/v1/products/barcode/{barcode}").raise_for_status()
+
+        for name, lookup in (("base", database_lookup), ("índice", index_lookup), ("endpoint", endpoint_lookup)):
+            samples = measure(lookup, barcodes)
+            print(f"{name:9} p50={percentile(samples, 50):.1f}µs p99={percentile(samples, 99):.1f}µs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Benchmark de concurrencia del checkout (create_sale).
+
+Varias cajas (hilos) venden en paralelo canastas aleatorias sobre el mismo
+conjunto de productos hasta agotar el stock. Al final se verifica que:
+  - ningún inventario quedó en negativo (cero sobreventas)
+  - stock inicial - líneas vendidas == stock final, producto por producto
+
+Uso:
+    python scripts/bench_checkout.py --cashiers 8 --products 50 --stock 200 --basket 40
+"""
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import SessionLocal
+from app.models.branch import Branch
+from app.models.inventory import Inventory
+from app.models.payment_method import PaymentMethod
+from app.models.product import Product
+from app.crud.sale import create_sale
+from app.schemas.sale import SaleCreate
+
+
+def setup_data(db, products: int, stock: int):
+    """Crea una sucursal y productos de prueba con el stock indicado"""
+    tag = uuid.uuid4().hex[:8]
+    branch = Branch(name=f"Bench {tag}", address="Benchmark")
+    payment_method = db.query(PaymentMethod).first()
+    if not payment_method:
+        payment_method = PaymentMethod(name=f"BENCH{tag[:4]}")
+        db.add(payment_method)
+    db.add(branch)
+    db.flush()
+
+    product_ids = []
+    for i in range(products):
+        product = Product(barcode=f"B{tag}{i:05d}", name=f"Bench {tag} {i}", price=1)
+        db.add(product)
+        db.flush()
+        db.add(Inventory(product_id=product.product_id, branch_id=branch.branch_id, quantity=stock))
+        product_ids.append(product.product_id)
+    db.commit()
+    return branch.branch_id, payment_method.payment_method_id, product_ids
+
+
+def cashier(session_factory, branch_id, payment_method_id, product_ids, basket, sold, stats, lock, deadline):
+    """Vende canastas aleatorias hasta que se acaba el tiempo o el stock"""
+    db = session_factory()
+    rejected_in_a_row = 0
+    try:
+        while time.perf_counter() < deadline and rejected_in_a_row < 50:
+            lines = [
+                {"product_id": product_id, "quantity": random.randint(1, 3), "unit_price": 1}
+                for product_id in random.sample(product_ids, min(basket, len(product_ids)))
+            ]
+            sale = SaleCreate(branch_id=branch_id, payment_method_id=payment_method_id, items=lines)
+            try:
+                create_sale(db, sale, user_id=None)
+            except ValueError:
+                # Stock insuficiente: la venta se rechaza completa
+                rejected_in_a_row += 1
+                with lock:
+                    stats["rejected"] += 1
+                continue
+
+            rejected_in_a_row = 0
+            with lock:
+                stats["sales"] += 1
+                stats["lines"] += len(lines)
+                for line in lines:
+                    sold[line["product_id"]] += Decimal(line["quantity"])
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cashiers", type=int, default=8)
+    parser.add_argument("--products", type=int, default=50)
+    parser.add_argument("--stock", type=int, default=200)
+    parser.add_argument("--basket", type=int, default=40)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        engine = create_engine(args.url, pool_size=args.cashiers, max_overflow=0)
+        session_factory = sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    db = session_factory()
+    branch_id, payment_method_id, product_ids = setup_data(db, args.products, args.stock)
+    db.close()
+
+    sold = defaultdict(Decimal)
+    stats = {"sales": 0, "lines": 0, "rejected": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    threads = [
+        threading.Thread(
+            target=cashier,
+            args=(session_factory, branch_id, payment_method_id, product_ids,
+                  args.basket, sold, stats, lock, deadline)
+        )
+        for _ in range(args.cashiers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    # Verificar que no hubo sobreventas
+    db = session_factory()
+    final_stock = dict(
+        db.query(Inventory.product_id, Inventory.quantity)
+        .filter(Inventory.branch_id == branch_id)
+        .all()
+    )
+    db.close()
+
+    negative = {pid: qty for pid, qty in final_stock.items() if qty < 0}
+    mismatched = {
+        pid: (qty, args.stock - sold[pid])
+        for pid, qty in final_stock.items()
+        if qty != args.stock - sold[pid]
+    }
+
+    print(f"cajas={args.cashiers} productos={args.products} canasta={args.basket}")
+    print(f"ventas={stats['sales']} lineas={stats['lines']} rechazadas={stats['rejected']} tiempo={elapsed:.2f}s")
+    print(f"lineas/segundo={stats['lines'] / elapsed:.1f} ventas/segundo={stats['sales'] / elapsed:.1f}")
+    print(f"inventarios negativos={len(negative)} descuadres={len(mismatched)}")
+
+    if negative or mismatched:
+        print("FALLO: se detectaron sobreventas o descuadres de stock")
+        sys.exit(1)
+    print("OK: cero sobreventas")
+
+
+if __name__ == "__main__":
+    main()
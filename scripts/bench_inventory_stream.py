@@ -0,0 +1,80 @@
+"""
+Benchmark del listado de inventario de una sucursal (GET /api/v1/inventory/branch/{id}).
+
+Compara el armado anterior (query.all() + InventoryOut por fila + JSON completo)
+con el stream por bloques (yield_per) en JSON y NDJSON. Mide tiempo total y
+memoria del servidor (pico de tracemalloc) consumiendo el cuerpo a medida que
+se genera, como lo envía StreamingResponse.
+
+Uso:
+    python scripts/bench_product_list.py --seed 100000 --branches 1   # sembrar
+    python scripts/bench_inventory_stream.py --branch 1
+    python scripts/bench_inventory_stream.py --url sqlite:///bench.db --branch 1
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import app.api.v1.inventory as inventory_api
+from app.database import SessionLocal
+from app.models.inventory import Inventory
+from app.schemas.inventory import InventoryOut
+
+
+def legacy_body(session_factory, branch_id):
+    # read_inventory_by_branch antes del stream: todo en memoria antes de enviar
+    db = session_factory()
+    try:
+        items = db.query(Inventory).filter(Inventory.branch_id == branch_id).all()
+        yield json.dumps([InventoryOut.model_validate(item).model_dump(mode="json") for item in items]).encode()
+    finally:
+        db.close()
+
+
+def measure(body):
+    started = time.perf_counter()
+    size = sum(len(chunk) for chunk in body())
+    seconds = time.perf_counter() - started
+
+    # Memoria en una pasada aparte: tracemalloc distorsiona los tiempos
+    tracemalloc.start()
+    for _ in body():
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return seconds, peak / 1024 / 1024, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--branch", type=int, default=1, help="Sucursal a listar")
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        session_factory = sessionmaker(bind=create_engine(args.url), autoflush=False)
+    inventory_api.SessionLocal = session_factory
+
+    cases = (
+        ("anterior", lambda: legacy_body(session_factory, args.branch)),
+        ("json", lambda: inventory_api._stream_inventory(False, branch_id=args.branch)),
+        ("ndjson", lambda: inventory_api._stream_inventory(True, branch_id=args.branch)),
+    )
+    for name, body in cases:
+        measure(body)  # calentamiento
+        seconds, peak_mb, size = measure(body)
+        print(f"{name:9} {seconds * 1000:.0f}ms memoria={peak_mb:.1f}MB cuerpo={size / 1024 / 1024:.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
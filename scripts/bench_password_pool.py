@@ -0,0 +1,94 @@
+"""
+Benchmark del pool de bcrypt.
+
+Contra un servidor en marcha, lanza una ráfaga de logins concurrentes y, en
+paralelo, consulta otro endpoint para medir cómo le afecta el hashing.
+Reporta logins/segundo, respuestas 503 (backpressure) y latencia p50/p99 del
+otro endpoint antes y durante la ráfaga.
+
+Uso:
+    uvicorn app.main:app --workers 1 &
+    python scripts/bench_password_pool.py --url http://localhost:8000 \\
+        --username admin --password Admin123 --logins 200 --concurrency 32
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+API_V1_STR = "/api/v1"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def probe(client, path, headers, stop, samples):
+    """Consulta `path` en bucle hasta que se active `stop`"""
+    while not stop.is_set():
+        started = time.perf_counter()
+        client.get(path, headers=headers)
+        samples.append((time.perf_counter() - started) * 1000)
+
+
+def measure_probe(client, path, headers, seconds):
+    samples = []
+    stop = threading.Event()
+    thread = threading.Thread(target=probe, args=(client, path, headers, stop, samples))
+    thread.start()
+    time.sleep(seconds)
+    stop.set()
+    thread.join()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--probe-path", default=f"{API_V1_STR}/products/?limit=10",
+                        help="Endpoint a medir mientras corre el hashing")
+    args = parser.parse_args()
+
+    client = httpx.Client(base_url=args.url, timeout=60)
+    credentials = {"username": args.username, "password": args.password}
+    response = client.post(f"{API_V1_STR}/login", data=credentials)
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    baseline = measure_probe(client, args.probe_path, headers, seconds=5)
+
+    codes = []
+    probe_samples = []
+    stop = threading.Event()
+    probe_thread = threading.Thread(target=probe, args=(client, args.probe_path, headers, stop, probe_samples))
+    probe_thread.start()
+
+    def login(_):
+        codes.append(client.post(f"{API_V1_STR}/login", data=credentials).status_code)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(login, range(args.logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    probe_thread.join()
+
+    ok = codes.count(200)
+    print(f"logins={len(codes)} ok={ok} 503={codes.count(503)} tiempo={elapsed:.2f}s "
+          f"logins/segundo={ok / elapsed:.1f}")
+    for name, samples in (("sin hashing", baseline), ("con hashing", probe_samples)):
+        if samples:
+            print(f"{args.probe_path} {name}: peticiones={len(samples)} "
+                  f"p50={percentile(samples, 50):.1f}ms p99={percentile(samples, 99):.1f}ms")
+    print(client.get(f"{API_V1_STR}/auth/password-hasher/stats", headers=headers).json())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Benchmark del listado de productos (GET /api/v1/products/).
+
+Compara el armado anterior (productos ORM + consulta de inventario agrupada en
+Python + model_validate por producto) con el catálogo agregado en SQL
+(GROUP BY + json_agg). Mide latencia p50/p99 y memoria asignada por petición
+(pico de tracemalloc) para páginas de 200 y 1000 productos.
+
+Uso:
+    python scripts/bench_product_list.py --seed 5000 --branches 5
+    python scripts/bench_product_list.py
+    python scripts/bench_product_list.py --url sqlite:///bench.db --rounds 50
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi import Depends
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import SessionLocal, get_db, get_async_db, async_database_url
+from app.main import app
+from app.models.branch import Branch
+from app.models.category import Category
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.unit_type import UnitType
+from app.schemas.product import ProductOut
+from app.utils.pagination import paginate
+
+PAGE_SIZES = (200, 1000)
+
+
+def seed(db, count: int, branches: int):
+    tag = uuid.uuid4().hex[:6]
+    rng = random.Random(count)
+    branch_ids = [branch.branch_id for branch in db.query(Branch).all()]
+    for index in range(len(branch_ids), branches):
+        branch = Branch(name=f"Sucursal bench {tag} {index}", address="-")
+        db.add(branch)
+        db.flush()
+        branch_ids.append(branch.branch_id)
+    category = db.query(Category).first() or Category(name=f"Bench {tag}")
+    unit_type = db.query(UnitType).first() or UnitType(name=f"bench-{tag}")
+    db.add_all([category, unit_type])
+    db.commit()
+
+    batch = 2000
+    for offset in range(0, count, batch):
+        products = [{
+            "barcode": f"L{tag}{i:08d}", "name": f"Producto {tag} {i:08d}",
+            "category_id": category.category_id, "unit_type": unit_type.id,
+            "price": 10, "cost": 5, "is_active": True
+        } for i in range(offset, min(offset + batch, count))]
+        product_ids = db.execute(insert(Product).returning(Product.product_id), products).scalars().all()
+        db.execute(insert(Inventory), [
+            {"product_id": product_id, "branch_id": branch_id, "quantity": rng.randint(0, 100)}
+            for product_id in product_ids
+            for branch_id in branch_ids
+        ])
+        db.commit()
+    print(f"Sembrados {count} productos en {len(branch_ids)} sucursales")
+
+
+def legacy_read_products(limit: int = 200, branch_id: int = None, db: Session = Depends(get_db)):
+    # read_products antes de agregar en SQL
+    query = db.query(Product).filter(Product.is_active == True)
+    page = paginate(query, [Product.name, Product.product_id], limit)
+    products = page.items
+    inventory_query = db.query(
+        Inventory.product_id, Inventory.branch_id, Inventory.quantity, Branch.name.label("branch_name")
+    ).join(Branch, Inventory.branch_id == Branch.branch_id).filter(
+        Inventory.product_id.in_([p.product_id for p in products])
+    )
+    if branch_id is not None:
+        inventory_query = inventory_query.filter(Inventory.branch_id == branch_id)
+    inventory_by_product = {}
+    for item in inventory_query.all():
+        inventory_by_product.setdefault(item.product_id, []).append({
+            "branch_id": item.branch_id,
+            "branch_name": item.branch_name,
+            "quantity": float(item.quantity) if item.quantity else 0
+        })
+    products_data = []
+    for product in products:
+        product_dict = ProductOut.model_validate(product).model_dump()
+        inventory_items = inventory_by_product.get(product.product_id, [])
+        if branch_id:
+            branch_item = next((item for item in inventory_items if item["branch_id"] == branch_id), None)
+            product_dict["stock"] = branch_item["quantity"] if branch_item else 0
+        else:
+            product_dict["stock"] = sum(item["quantity"] for item in inventory_items)
+        product_dict["inventory_items"] = inventory_items
+        products_data.append(product_dict)
+    return {"items": products_data, "next_cursor": page.next_cursor}
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(client, path, limit, rounds):
+    params = {"limit": limit, "include_total": "false"}
+    client.get(path, params=params).raise_for_status()  # calentamiento
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        client.get(path, params=params).raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    # Memoria en una pasada aparte: tracemalloc distorsiona los tiempos
+    peaks = []
+    tracemalloc.start()
+    for _ in range(max(3, rounds // 10)):
+        tracemalloc.reset_peak()
+        client.get(path, params=params).raise_for_status()
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+    tracemalloc.stop()
+    return samples, sum(peaks) / len(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, help="Sembrar N productos con inventario y salir")
+    parser.add_argument("--branches", type=int, default=5, help="Sucursales con inventario al sembrar")
+    parser.add_argument("--rounds", type=int, default=30, help="Peticiones por caso")
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        session_factory = sessionmaker(bind=create_engine(args.url), autoflush=False)
+
+    if args.seed:
+        db = session_factory()
+        try:
+            seed(db, args.seed, args.branches)
+        finally:
+            db.close()
+        return
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    if args.url:
+        # El catálogo usa la sesión asíncrona: misma base con el driver asíncrono
+        async_session_factory = async_sessionmaker(bind=create_async_engine(async_database_url(args.url)),
+                                                   autoflush=False, expire_on_commit=False)
+
+        async def override_get_async_db():
+            async with async_session_factory() as db:
+                yield db
+        app.dependency_overrides[get_async_db] = override_get_async_db
+    app.get("/bench/legacy-products")(legacy_read_products)
+    client = TestClient(app, base_url="https://testserver")
+
+    for limit in PAGE_SIZES:
+        for name, path in (("anterior", "/bench/legacy-products"), ("sql", "/api/v1/products/")):
+            samples, peak_kb = measure(client, path, limit, args.rounds)
+            print(f"limit={limit:<5} {name:9} p50={percentile(samples, 50):.1f}ms "
+                  f"p99={percentile(samples, 99):.1f}ms memoria={peak_kb:.0f}KB/petición")
+
+
+if __name__ == "__main__":
+    main()
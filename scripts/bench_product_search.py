@@ -0,0 +1,123 @@
+"""
+Benchmark de la búsqueda de productos.
+
+Compara la búsqueda anterior (ILIKE '%término%' sobre nombre y descripción)
+con el índice de búsqueda (tsvector + pg_trgm en Postgres, índice de n-gramas
+en memoria en otras bases). Reporta latencia p50/p99 por búsqueda.
+
+Uso:
+    python scripts/bench_product_search.py --seed 100000    # sembrar 100k productos
+    python scripts/bench_product_search.py --seed 900000    # hasta 1M
+    python scripts/bench_product_search.py
+    python scripts/bench_product_search.py --url sqlite:///bench.db
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, insert, or_
+from sqlalchemy.orm import sessionmaker
+
+from app.database import SessionLocal
+import app.models.payment_method  # noqa: F401 (registra el mapper de Sale)
+from app.models.product import Product
+from app.utils.product_search import search_products, product_search_index
+
+WORDS = [
+    "leche", "entera", "deslactosada", "yogur", "frutilla", "durazno", "pan", "maíz", "arroz",
+    "azúcar", "café", "té", "jabón", "detergente", "aceite", "girasol", "fideo", "tallarín",
+    "galleta", "chocolate", "quinua", "api", "salteña", "mantequilla", "queso", "pollo", "carne",
+    "refresco", "cerveza", "agua", "mineral", "limón", "naranja", "papa", "cebolla", "tomate",
+]
+BRANDS = ["PIL", "Copacabana", "Bolívar", "Fino", "Venado", "Ideal", "Paceña", "Coca", "Irupana"]
+TERMS = ["leche", "maiz", "cafe copa", "jabon", "yog fru", "quinua", "aceite gir", "chocolate", "pil", "salte"]
+
+
+def seed(db, count: int):
+    tag = uuid.uuid4().hex[:6]
+    rng = random.Random(count)
+    batch = 5000
+    for offset in range(0, count, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, count)):
+            words = rng.sample(WORDS, 3)
+            rows.append({
+                "barcode": f"S{tag}{i:08d}",
+                "name": f"{words[0].capitalize()} {words[1]} {rng.choice(BRANDS)} {i}",
+                "description": f"{words[2]} de {rng.choice(BRANDS)}",
+                "price": 1, "is_active": True
+            })
+        db.execute(insert(Product), rows)
+        db.commit()
+    print(f"Sembrados {count} productos")
+
+
+def legacy_search(db, term):
+    # Igual que read_products antes del índice: total + primera página
+    query = db.query(Product).filter(
+        Product.is_active == True,
+        or_(Product.name.ilike(f"%{term}%"), Product.description.ilike(f"%{term}%"))
+    )
+    return query.count(), query.limit(50).all()
+
+
+def indexed_search(db, term):
+    query = db.query(Product).filter(Product.is_active == True)
+    return search_products(db, query, term, 0, 50)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def measure(db, search, rounds):
+    samples = []
+    for _ in range(rounds):
+        for term in TERMS:
+            started = time.perf_counter()
+            search(db, term)
+            samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, help="Sembrar N productos y salir")
+    parser.add_argument("--rounds", type=int, default=5, help="Repeticiones de la lista de búsquedas")
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        session_factory = sessionmaker(bind=create_engine(args.url), autoflush=False)
+
+    db = session_factory()
+    try:
+        if args.seed:
+            seed(db, args.seed)
+            return
+
+        products = db.query(Product).count()
+        dialect = db.get_bind().dialect.name
+        if dialect != "postgresql":
+            started = time.perf_counter()
+            product_search_index.load(db)
+            print(f"índice en memoria cargado en {time.perf_counter() - started:.1f}s")
+
+        print(f"base={dialect} productos={products} búsquedas={args.rounds * len(TERMS)}")
+        for name, search in (("ilike", legacy_search), ("índice", indexed_search)):
+            samples = measure(db, search, args.rounds)
+            print(f"{name:7} p50={percentile(samples, 50):.1f}ms p99={percentile(samples, 99):.1f}ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Benchmark de creación y recepción de órdenes de compra.
+
+Compara el armado anterior (un INSERT por item y un SELECT + incremento en
+Python por producto) con el actual (items en un solo INSERT; al recibir, un
+UPDATE de received_quantity y los incrementos de inventario en un solo
+INSERT ... ON CONFLICT DO UPDATE) para órdenes de 10, 100 y 1000 líneas.
+Reporta tiempo y sentencias SQL por operación. El armado anterior suma stock
+también al crear; el actual solo al recibir.
+
+Uso:
+    python scripts/bench_purchase_orders.py
+    python scripts/bench_purchase_orders.py --url sqlite:///bench.db --rounds 10
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from decimal import Decimal
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.database import SessionLocal
+from app.main import app  # noqa: F401 (registra todos los modelos)
+from app.crud.purchase_order import create_purchase_order, update_order_status
+from app.models.branch import Branch
+from app.models.inventory import Inventory
+from app.models.product import Product
+from app.models.supplier import PurchaseOrder, PurchaseOrderItem, Supplier
+from app.schemas.purchase_order import OrderStatusUpdate, PurchaseOrderCreate
+from app.utils.inventory import record_movements, PURCHASE
+
+LINE_COUNTS = (10, 100, 1000)
+
+
+def setup_data(db, products: int):
+    """Sucursal, proveedor y productos de prueba; la mitad ya con inventario"""
+    tag = uuid.uuid4().hex[:8]
+    branch = Branch(name=f"Bench {tag}", address="Benchmark")
+    supplier = Supplier(name=f"Bench {tag}")
+    db.add_all([branch, supplier])
+    db.flush()
+    product_ids = []
+    for i in range(products):
+        product = Product(barcode=f"P{tag}{i:05d}", name=f"Bench {tag} {i}", price=1)
+        db.add(product)
+        db.flush()
+        if i % 2:
+            db.add(Inventory(product_id=product.product_id, branch_id=branch.branch_id, quantity=10))
+        product_ids.append(product.product_id)
+    db.commit()
+    return branch.branch_id, supplier.supplier_id, product_ids
+
+
+def legacy_create(db, order_data, user_id):
+    # create_purchase_order antes: un INSERT por item y SELECT + incremento por producto
+    db_order = PurchaseOrder(
+        supplier_id=order_data.supplier_id, branch_id=order_data.branch_id,
+        status=order_data.status, total_amount=0, created_by=user_id
+    )
+    db.add(db_order)
+    db.flush()
+    for item in order_data.items:
+        db.add(PurchaseOrderItem(order_id=db_order.order_id, product_id=item.product_id,
+                                 quantity=item.quantity, unit_cost=item.unit_cost))
+        inventory = db.query(Inventory).filter(
+            Inventory.product_id == item.product_id, Inventory.branch_id == order_data.branch_id
+        ).first()
+        if inventory:
+            inventory.quantity += Decimal(str(item.quantity))
+        else:
+            db.add(Inventory(product_id=item.product_id, branch_id=order_data.branch_id, quantity=item.quantity))
+    record_movements(db, [
+        {"product_id": item.product_id, "branch_id": order_data.branch_id,
+         "quantity_delta": Decimal(str(item.quantity)), "movement_type": PURCHASE,
+         "reference_id": db_order.order_id, "user_id": user_id}
+        for item in order_data.items
+    ])
+    db.commit()
+    return db_order
+
+
+def legacy_receive(db, order_id):
+    # approve_purchase_order antes: items por relación lazy y SELECT + incremento por item
+    db_order = db.query(PurchaseOrder).filter(PurchaseOrder.order_id == order_id).first()
+    for item in db_order.items:
+        inventory = db.query(Inventory).filter(
+            Inventory.product_id == item.product_id, Inventory.branch_id == db_order.branch_id
+        ).first()
+        if inventory:
+            inventory.quantity += item.quantity
+        else:
+            db.add(Inventory(product_id=item.product_id, branch_id=db_order.branch_id, quantity=item.quantity))
+    record_movements(db, [
+        {"product_id": item.product_id, "branch_id": db_order.branch_id,
+         "quantity_delta": item.quantity, "movement_type": PURCHASE, "reference_id": db_order.order_id}
+        for item in db_order.items
+    ])
+    db_order.status = "APPROVED"
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=5, help="Órdenes por caso")
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        session_factory = sessionmaker(bind=create_engine(args.url), autoflush=False, expire_on_commit=False)
+    db = session_factory()
+    branch_id, supplier_id, product_ids = setup_data(db, max(LINE_COUNTS) * 2)
+
+    statements = [0]
+
+    @event.listens_for(db.get_bind(), "before_cursor_execute")
+    def count_statement(*_):
+        statements[0] += 1
+
+    def measure(operation):
+        statements[0] = 0
+        started = time.perf_counter()
+        result = operation()
+        return result, (time.perf_counter() - started) * 1000, statements[0]
+
+    def new_receive(db, order_id):
+        update_order_status(db, order_id, OrderStatusUpdate(status="DELIVERED"))
+
+    try:
+        for lines in LINE_COUNTS:
+            for name, create, receive in (("anterior", legacy_create, legacy_receive),
+                                          ("actual", create_purchase_order, new_receive)):
+                totals = [0.0, 0, 0.0, 0]
+                for _ in range(args.rounds):
+                    order = PurchaseOrderCreate(
+                        supplier_id=supplier_id, branch_id=branch_id, status="PENDING",
+                        items=[{"product_id": product_id, "quantity": random.randint(1, 20), "unit_cost": 1}
+                               for product_id in random.sample(product_ids, lines)]
+                    )
+                    db_order, create_ms, create_statements = measure(lambda: create(db, order, None))
+                    _, receive_ms, receive_statements = measure(lambda: receive(db, db_order.order_id))
+                    totals = [totals[0] + create_ms, create_statements, totals[2] + receive_ms, receive_statements]
+                print(f"líneas={lines:<5} {name:9} crear={totals[0] / args.rounds:.1f}ms ({totals[1]} sentencias) "
+                      f"recibir={totals[2] / args.rounds:.1f}ms ({totals[3]} sentencias)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
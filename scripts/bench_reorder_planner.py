@@ -0,0 +1,124 @@
+"""
+Benchmark del planificador de reposición (app.utils.reorder).
+
+Genera datos sintéticos en memoria (productos × sucursales, ventas diarias con
+la densidad indicada) y mide el núcleo vectorizado contra el mismo cálculo par
+por par en Python sobre una muestra. Con --url mide además
+get_reorder_suggestions completo (consultas + agrupación) contra una base existente.
+
+Uso:
+    python scripts/bench_reorder_planner.py                          # 50k SKUs × 50 sucursales
+    python scripts/bench_reorder_planner.py --products 10000 --branches 20 --density 0.3
+    python scripts/bench_reorder_planner.py --url postgresql://.../pos --branch 1
+"""
+import argparse
+import math
+import os
+import sys
+import time
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.main import app  # noqa: F401 (registra todos los modelos)
+from app.utils.reorder import plan_reorders, get_reorder_suggestions
+
+
+def synthetic(products, branches, days, density, seed=0):
+    rng = np.random.default_rng(seed)
+    pairs = products * branches
+    branch_ids = np.arange(1, branches + 1, dtype=np.int64)
+    product_ids = np.arange(1, products + 1, dtype=np.int64)
+    stock_branches = np.repeat(branch_ids, products)
+    stock_products = np.tile(product_ids, branches)
+    # Una fila por (día, par) con venta: cantidad de días con venta de cada par
+    sales_days = rng.binomial(days, density, pairs)
+    sales_branches = np.repeat(stock_branches, sales_days)
+    sales_products = np.repeat(stock_products, sales_days)
+    # Las filas llegan de la base sin un orden útil
+    shuffle = rng.permutation(len(sales_branches))
+    quantities = rng.gamma(2.0, 2.0, len(shuffle)).round(3)
+    sales = (sales_branches[shuffle], sales_products[shuffle], quantities, quantities ** 2)
+    stock = (stock_branches, stock_products, rng.integers(0, 60, pairs).astype(np.float64))
+    min_stock = rng.integers(0, 20, products).astype(np.float64)
+    lead_times = rng.integers(1, 21, products).astype(np.float64)
+    return branch_ids, product_ids, min_stock, lead_times, sales, stock
+
+
+def python_plan(sales, stock, min_stock, lead_times, days, review_days, z):
+    """El mismo cálculo con diccionarios, como referencia"""
+    totals, squares = {}, {}
+    for branch, product, quantity in sales:
+        key = (branch, product)
+        totals[key] = totals.get(key, 0.0) + quantity
+        squares[key] = squares.get(key, 0.0) + quantity * quantity
+    orders = 0
+    for key, on_hand in stock.items():
+        product = key[1]
+        velocity = totals.get(key, 0.0) / days
+        deviation = math.sqrt(max(squares.get(key, 0.0) / days - velocity ** 2, 0))
+        lead = lead_times[product - 1]
+        safety = z * deviation * math.sqrt(lead)
+        reorder_point = velocity * lead + safety + min_stock[product - 1]
+        quantity = math.ceil(velocity * (lead + review_days) + safety + min_stock[product - 1] - on_hand)
+        if on_hand <= reorder_point and quantity > 0:
+            orders += 1
+    return orders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=50000)
+    parser.add_argument("--branches", type=int, default=50)
+    parser.add_argument("--density", type=float, default=0.1, help="Fracción de días con venta por par")
+    parser.add_argument("--sample", type=int, default=200000, help="Pares para la referencia en Python")
+    parser.add_argument("--url", help="Medir también get_reorder_suggestions contra esta base")
+    parser.add_argument("--branch", type=int, help="Sucursal para la medición con --url")
+    args = parser.parse_args()
+
+    days = settings.REORDER_LOOKBACK_DAYS
+    review_days, z = settings.REORDER_REVIEW_DAYS, settings.REORDER_SERVICE_Z
+    started = time.perf_counter()
+    branch_ids, product_ids, min_stock, lead_times, sales, stock = synthetic(
+        args.products, args.branches, days, args.density
+    )
+    pairs = len(stock[0])
+    print(f"pares={pairs} filas de ventas={len(sales[0])} generados en {time.perf_counter() - started:.1f}s")
+
+    started = time.perf_counter()
+    plan = plan_reorders(branch_ids, product_ids, min_stock, lead_times, sales, stock, days, review_days, z)
+    vectorized = time.perf_counter() - started
+    print(f"numpy    {vectorized:.2f}s  pares a pedir={len(plan['product_id'])}")
+
+    # Referencia en Python sobre los pares de las primeras sucursales, extrapolada
+    sample_branches = max(1, min(args.branches, args.sample // args.products))
+    in_sample = sales[0] <= sample_branches
+    sample_sales = list(zip(sales[0][in_sample].tolist(), sales[1][in_sample].tolist(), sales[2][in_sample].tolist()))
+    stocked = stock[0] <= sample_branches
+    sample_stock = dict(zip(zip(stock[0][stocked].tolist(), stock[1][stocked].tolist()), stock[2][stocked].tolist()))
+    started = time.perf_counter()
+    orders = python_plan(sample_sales, sample_stock, min_stock.tolist(), lead_times.tolist(), days, review_days, z)
+    elapsed = time.perf_counter() - started
+    estimated = elapsed * pairs / len(sample_stock)
+    sample_orders = int(np.count_nonzero(plan["branch_id"] <= sample_branches))
+    print(f"python   {elapsed:.2f}s para {len(sample_stock)} pares (≈{estimated:.1f}s para todos, "
+          f"{estimated / vectorized:.0f}x más lento; coincide: {orders == sample_orders})")
+
+    if args.url:
+        db = sessionmaker(bind=create_engine(args.url), autoflush=False)()
+        try:
+            started = time.perf_counter()
+            drafts = get_reorder_suggestions(db, branch_id=args.branch)
+            print(f"endpoint {time.perf_counter() - started:.2f}s  borradores={len(drafts)} "
+                  f"ítems={sum(len(draft['items']) for draft in drafts)}")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    main()
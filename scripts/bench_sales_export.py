@@ -0,0 +1,132 @@
+"""
+Benchmark de la exportación CSV de ventas.
+
+Mide filas/segundo y memoria máxima (RSS) del proceso al exportar todas las
+ventas. Conviene sembrar los datos en una corrida aparte para que la memoria
+del sembrado no se mezcle con la de la exportación.
+
+Uso:
+    python scripts/bench_sales_export.py --seed 1000000   # sembrar 1M líneas
+    python scripts/bench_sales_export.py                  # exportación por streaming
+    python scripts/bench_sales_export.py --legacy         # carga todo en memoria (anterior)
+"""
+import argparse
+import os
+import resource
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from io import BytesIO
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, func, insert
+from sqlalchemy.orm import sessionmaker, joinedload
+
+from app.database import SessionLocal
+from app.models.branch import Branch
+from app.models.client import Client
+from app.models.payment_method import PaymentMethod
+from app.models.product import Product
+from app.models.sale import Sale, SaleDetail
+from app.crud.sale import iter_sales_for_export
+from app.utils.pdf_generator import iter_sales_csv, generate_sales_csv
+
+LINES_PER_SALE = 10
+
+
+def peak_rss_mb():
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def seed(db, lines: int):
+    """Inserta ventas de prueba con LINES_PER_SALE líneas cada una"""
+    tag = uuid.uuid4().hex[:6]
+    branch = Branch(name=f"Export {tag}", address="Benchmark")
+    client = Client(ci_nit=f"X{tag}", full_name="Cliente Benchmark")
+    payment_method = PaymentMethod(name=f"EXP{tag[:4]}")
+    db.add_all([branch, client, payment_method])
+    db.flush()
+    products = [Product(barcode=f"E{tag}{i:04d}", name=f"Producto export {i}", price=1) for i in range(100)]
+    db.add_all(products)
+    db.flush()
+    product_ids = [product.product_id for product in products]
+
+    next_id = (db.query(func.max(Sale.sale_id)).scalar() or 0) + 1
+    start = datetime.utcnow() - timedelta(days=365)
+    total_sales = lines // LINES_PER_SALE
+    batch = 1000
+    for offset in range(0, total_sales, batch):
+        sale_rows, detail_rows = [], []
+        for sale_id in range(next_id + offset, next_id + min(offset + batch, total_sales)):
+            sale_rows.append({
+                "sale_id": sale_id, "invoice_number": f"EXP-{sale_id}",
+                "client_id": client.client_id, "branch_id": branch.branch_id,
+                "payment_method_id": payment_method.payment_method_id,
+                "sale_date": start + timedelta(seconds=sale_id % 31_536_000),
+                "subtotal": 10, "discount": 0, "total": 10, "status": "COMPLETADA"
+            })
+            detail_rows.extend({
+                "sale_id": sale_id, "product_id": product_ids[(sale_id + i) % len(product_ids)],
+                "quantity": 1, "unit_price": 1, "discount": 0, "total_line": 1
+            } for i in range(LINES_PER_SALE))
+        db.execute(insert(Sale), sale_rows)
+        db.execute(insert(SaleDetail), detail_rows)
+        db.commit()
+    print(f"Sembradas {total_sales} ventas / {total_sales * LINES_PER_SALE} líneas")
+
+
+def export_streaming(db):
+    for chunk in iter_sales_csv(iter_sales_for_export(db)):
+        yield chunk.encode('utf-8')
+
+
+def export_legacy(db):
+    sales = db.query(Sale).options(
+        joinedload(Sale.client),
+        joinedload(Sale.branch),
+        joinedload(Sale.payment_method),
+        joinedload(Sale.details).joinedload(SaleDetail.product)
+    ).order_by(Sale.sale_date.desc()).all()
+    yield BytesIO(generate_sales_csv(sales).encode('utf-8')).getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, help="Sembrar N líneas de venta y salir")
+    parser.add_argument("--legacy", action="store_true", help="Usar la exportación que carga todo en memoria")
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        session_factory = sessionmaker(bind=create_engine(args.url), autoflush=False, expire_on_commit=False)
+
+    db = session_factory()
+    try:
+        if args.seed:
+            seed(db, args.seed)
+            return
+
+        rss_before = peak_rss_mb()
+        started = time.perf_counter()
+        rows = 0
+        size = 0
+        for chunk in (export_legacy(db) if args.legacy else export_streaming(db)):
+            rows += chunk.count(b"\n")
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+        rows -= 1  # encabezado
+
+        print(f"modo={'legacy' if args.legacy else 'streaming'} filas={rows} bytes={size} tiempo={elapsed:.2f}s")
+        print(f"filas/segundo={rows / elapsed:.0f}")
+        print(f"RSS pico={peak_rss_mb():.1f} MB (antes de exportar {rss_before:.1f} MB)")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark del reporte PDF de ventas paginado.
+
+Genera en un archivo temporal el reporte para --rows ventas sintéticas (sin
+base de datos) leídas desde un iterador y reporta páginas/segundo, tamaño y
+memoria máxima. El canvas guarda las páginas terminadas hasta save(), así que
+el RSS pico crece con el reporte: se informa también el crecimiento por página
+respecto del RSS antes de generar.
+
+Uso:
+    python scripts/bench_sales_report_pdf.py --rows 100000
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.utils.pdf_generator import build_sales_report_pdf
+
+
+def fake_sales(rows: int):
+    branch = SimpleNamespace(name="Sucursal Centro")
+    client = SimpleNamespace(full_name="Cliente Benchmark")
+    start = datetime(2024, 1, 1)
+    for i in range(rows):
+        yield SimpleNamespace(
+            invoice_number=f"20240101-1-{i:06d}",
+            sale_date=start + timedelta(minutes=i),
+            client=client,
+            branch=branch,
+            total=Decimal("10.50"),
+            status="COMPLETADA"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--output", help="Guardar el PDF generado en esta ruta")
+    args = parser.parse_args()
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    started = time.perf_counter()
+    with tempfile.TemporaryFile() as output:
+        pages = build_sales_report_pdf(fake_sales(args.rows), output)
+        size = output.tell()
+        if args.output:
+            output.seek(0)
+            with open(args.output, "wb") as pdf:
+                pdf.write(output.read())
+    elapsed = time.perf_counter() - started
+
+    print(f"filas={args.rows} bytes={size} tiempo={elapsed:.2f}s")
+    print(f"paginas={pages} paginas/segundo={pages / elapsed:.1f}")
+    print(f"filas/segundo={args.rows / elapsed:.0f}")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"RSS pico={peak:.1f} MB (antes de generar {baseline:.1f} MB)")
+    print(f"crecimiento por pagina={(peak - baseline) * 1024 / pages:.1f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark de la sincronización de ventas fuera de línea.
+
+Simula una caja que vuelve a tener conexión con N ventas en cola y las envía
+de dos formas a través de la API: una por una a POST /api/v1/sales/ (como
+hacían las cajas) y en un solo lote a POST /api/v1/sales/batch. Reporta
+ventas/segundo de cada forma, verifica que el lote creó todas las ventas y que
+reenviarlo no crea ninguna nueva.
+
+Uso:
+    python scripts/bench_sales_sync.py --sales 500 --basket 5
+    python scripts/bench_sales_sync.py --url sqlite:///bench.db --sales 1000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import SessionLocal, get_db
+from app.main import app
+from app.models.branch import Branch
+from app.models.category import Category
+from app.models.client import Client
+from app.models.inventory import Inventory
+from app.models.payment_method import PaymentMethod
+from app.models.product import Product
+from app.models.role import Role
+from app.models.unit_type import UnitType
+from app.models.user import User
+from app.utils.revocation import revocations
+from app.utils.security import create_user_token
+
+
+def setup_data(db, products: int, stock: int):
+    """Sucursal, cliente, método de pago, usuario y productos (completos para SaleOut) con stock de sobra"""
+    tag = uuid.uuid4().hex[:8]
+    branch = Branch(name=f"Sync {tag}", address="Benchmark")
+    client = Client(ci_nit=f"S{tag}", full_name="Cliente Benchmark")
+    payment_method = PaymentMethod(name=f"SYN{tag[:4]}")
+    role = Role(name=f"Sync {tag}", permissions={"sales": True})
+    category = Category(name=f"Sync {tag}")
+    unit_type = UnitType(name=f"Sync {tag}")
+    db.add_all([branch, client, payment_method, role, category, unit_type])
+    db.flush()
+    user = User(username=f"sync_{tag}", password_hash="x", role_id=role.role_id)
+    db.add(user)
+    db.flush()
+    product_ids = []
+    for i in range(products):
+        product = Product(barcode=f"S{tag}{i:05d}", name=f"Sync {tag} {i}", price=1,
+                          category_id=category.category_id, unit_type=unit_type.id)
+        db.add(product)
+        db.flush()
+        db.add(Inventory(product_id=product.product_id, branch_id=branch.branch_id, quantity=stock))
+        product_ids.append(product.product_id)
+    db.commit()
+    db.refresh(user)
+    return branch.branch_id, client.client_id, payment_method.payment_method_id, user, product_ids
+
+
+def queued_sales(count, basket, branch_id, client_id, payment_method_id, product_ids):
+    return [
+        {
+            "client_uuid": str(uuid.uuid4()),
+            "client_id": client_id,
+            "branch_id": branch_id,
+            "payment_method_id": payment_method_id,
+            "items": [
+                {"product_id": product_id, "quantity": random.randint(1, 3), "unit_price": 1}
+                for product_id in random.sample(product_ids, basket)
+            ],
+        }
+        for _ in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, default=500, help="Ventas en cola")
+    parser.add_argument("--basket", type=int, default=5, help="Líneas por venta")
+    parser.add_argument("--products", type=int, default=200)
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        session_factory = sessionmaker(bind=create_engine(args.url), autoflush=False, expire_on_commit=False)
+
+        def override_get_db():
+            db = session_factory()
+            try:
+                yield db
+            finally:
+                db.close()
+        app.dependency_overrides[get_db] = override_get_db
+
+    db = session_factory()
+    try:
+        branch_id, client_id, payment_method_id, user, product_ids = setup_data(
+            db, args.products, stock=args.sales * args.basket * 10
+        )
+        token = create_user_token(user)
+    finally:
+        db.close()
+    revocations.refresh(session_factory)
+    headers = {"Authorization": f"Bearer {token}"}
+    client = TestClient(app, base_url="https://testserver")
+    queue = lambda: queued_sales(args.sales, args.basket, branch_id, client_id, payment_method_id, product_ids)
+
+    # Una por una, como reenvían hoy las cajas
+    sequential = queue()
+    started = time.perf_counter()
+    for sale in sequential:
+        payload = {key: value for key, value in sale.items() if key != "client_uuid"}
+        response = client.post(f"{settings.API_V1_STR}/sales/", json=payload, headers=headers)
+        if response.status_code != 201:
+            raise SystemExit(f"Respuesta inesperada {response.status_code}: {response.text}")
+    one_by_one = time.perf_counter() - started
+    print(f"una por una  {one_by_one:.2f}s  {args.sales / one_by_one:.0f} ventas/s")
+
+    # En lotes de hasta SALES_SYNC_MAX_BATCH ventas
+    batch = queue()
+    size = settings.SALES_SYNC_MAX_BATCH
+
+    def sync():
+        results = []
+        for start in range(0, len(batch), size):
+            response = client.post(f"{settings.API_V1_STR}/sales/batch", json=batch[start:start + size],
+                                   headers=headers)
+            if response.status_code != 200:
+                raise SystemExit(f"Respuesta inesperada {response.status_code}: {response.text}")
+            results.extend(response.json()["results"])
+        return results
+
+    started = time.perf_counter()
+    results = sync()
+    batched = time.perf_counter() - started
+    created = sum(result["status"] == "CREATED" for result in results)
+    print(f"lote         {batched:.2f}s  {args.sales / batched:.0f} ventas/s  "
+          f"({one_by_one / batched:.1f}x más rápido, creadas={created}/{args.sales})")
+
+    # Reenviar el mismo lote no debe crear ventas
+    duplicates = sum(result["status"] == "DUPLICATE" for result in sync())
+    print(f"reenvío      duplicadas={duplicates}/{args.sales}")
+    if created != args.sales or duplicates != args.sales:
+        print("FALLO: el lote no creó exactamente una venta por UUID")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
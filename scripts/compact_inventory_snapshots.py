@@ -0,0 +1,56 @@
+"""
+Mantenimiento del libro de inventario (inventory_movements).
+
+Crea las particiones mensuales de los próximos meses y toma una nueva foto del
+stock por sucursal a partir de la anterior y los movimientos. Pensado para
+correr periódicamente (p. ej. cada noche desde cron).
+
+Uso:
+    python scripts/compact_inventory_snapshots.py              # particiones + fotos
+    python scripts/compact_inventory_snapshots.py --branch 1   # solo una sucursal
+    python scripts/compact_inventory_snapshots.py --check      # comparar el libro con inventory
+"""
+import argparse
+import os
+import sys
+import time
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.database import SessionLocal
+from app.crud.inventory_ledger import (
+    ensure_movement_partitions, compact_inventory_snapshots, check_inventory_drift
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--branch", type=int, action="append", help="Sucursal (se puede repetir)")
+    parser.add_argument("--check", action="store_true", help="Solo verificar diferencias con inventory")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if not args.check:
+            for name in ensure_movement_partitions(db):
+                print(f"Partición creada: {name}")
+            started = time.perf_counter()
+            result = compact_inventory_snapshots(db, branch_ids=args.branch)
+            for branch_id, rows in result.items():
+                print(f"Sucursal {branch_id}: foto con {rows} productos")
+            print(f"Fotos tomadas en {time.perf_counter() - started:.2f}s")
+
+        mismatches = check_inventory_drift(db, branch_ids=args.branch)
+        for mismatch in mismatches:
+            print(mismatch)
+        if mismatches:
+            print(f"{len(mismatches)} diferencias entre inventory y el libro de movimientos")
+            sys.exit(1)
+        print("Inventario consistente con el libro de movimientos")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Importación masiva de productos desde CSV o NDJSON (ver app.utils.product_import).
+
+CSV: columnas barcode,name,description,category_id,unit_type,price,cost,min_stock,inventory
+con inventory = "branch_id:cantidad;branch_id:cantidad". NDJSON: un ProductCreate por línea.
+
+Uso:
+    python scripts/import_products.py catalogo.csv
+    python scripts/import_products.py catalogo.ndjson --batch-size 10000
+    python scripts/import_products.py --generate 50000 bench.csv   # catálogo sintético
+    python scripts/import_products.py bench.csv --url sqlite:///bench.db
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import sys
+import uuid
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from app.database import SessionLocal
+import app.models.payment_method  # noqa: F401 (registra el mapper de Sale)
+from app.models.branch import Branch
+from app.models.category import Category
+from app.models.unit_type import UnitType
+from app.utils.product_import import import_products, detect_format, FORMATS
+
+
+def generate(db, path: str, count: int, fmt: str):
+    """Catálogo sintético con las categorías, unidades y sucursales existentes"""
+    categories = list(db.scalars(select(Category.category_id)))
+    unit_types = list(db.scalars(select(UnitType.id)))
+    branches = list(db.scalars(select(Branch.branch_id)))
+    if not categories or not unit_types:
+        raise SystemExit("Se necesitan al menos una categoría y un tipo de unidad")
+    tag = uuid.uuid4().hex[:6]
+    rng = random.Random(count)
+    with open(path, "w", encoding="utf-8", newline="") as output:
+        writer = csv.writer(output) if fmt == "csv" else None
+        if writer:
+            writer.writerow(["barcode", "name", "description", "category_id", "unit_type",
+                             "price", "cost", "min_stock", "inventory"])
+        for i in range(count):
+            stock = {branch_id: rng.randint(0, 200) for branch_id in rng.sample(branches, min(2, len(branches)))}
+            row = {
+                "barcode": f"I{tag}{i:08d}", "name": f"Producto importado {tag} {i}",
+                "description": "Catálogo de proveedor", "category_id": rng.choice(categories),
+                "unit_type": rng.choice(unit_types), "price": round(rng.uniform(1, 200), 2),
+                "cost": round(rng.uniform(1, 150), 2), "min_stock": 5
+            }
+            if writer:
+                writer.writerow(list(row.values()) + [";".join(f"{b}:{q}" for b, q in stock.items())])
+            else:
+                row["inventory_assignments"] = [{"branch_id": b, "quantity": q} for b, q in stock.items()]
+                output.write(json.dumps(row) + "\n")
+    print(f"Generadas {count} filas en {path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path", help="Archivo a importar (o a generar con --generate)")
+    parser.add_argument("--format", choices=FORMATS, help="Por defecto según la extensión")
+    parser.add_argument("--batch-size", type=int, help="Filas por lote de COPY (PRODUCT_IMPORT_BATCH_SIZE)")
+    parser.add_argument("--generate", type=int, help="Generar un catálogo sintético de N filas y salir")
+    parser.add_argument("--url", help="URL de base de datos (por defecto DATABASE_URL)")
+    args = parser.parse_args()
+
+    session_factory = SessionLocal
+    if args.url:
+        session_factory = sessionmaker(bind=create_engine(args.url), autoflush=False)
+
+    db = session_factory()
+    try:
+        fmt = args.format or detect_format(args.path)
+        if args.generate:
+            generate(db, args.path, args.generate, fmt)
+            return
+
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            report = import_products(db, stream, fmt, batch_size=args.batch_size)
+
+        for error in report["errors"]:
+            print(f"fila {error['row']} ({error['barcode']}): {'; '.join(error['errors'])}")
+        if report["errors_truncated"]:
+            print(f"... {report['error_count'] - len(report['errors'])} errores más")
+        print(f"{report['rows']} filas: {report['inserted']} nuevos, {report['updated']} actualizados, "
+              f"{report['error_count']} con errores en {report['seconds']}s "
+              f"({report['rows_per_second']} filas/s)")
+        if report["error_count"]:
+            sys.exit(1)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Worker de trabajos en segundo plano para el backend "broker".
+
+Con JOBS_BACKEND=broker la API solo encola los trabajos en JOBS_DIR; este
+proceso los reclama y los ejecuta en su propio pool de procesos respetando
+los límites por tipo de JOBS_CONCURRENCY. Se pueden lanzar varios workers
+apuntando al mismo directorio.
+
+Uso:
+    python scripts/job_worker.py --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from app.config import settings
+from app.utils.jobs import JobManager, job_manager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=settings.JOBS_MAX_WORKERS)
+    parser.add_argument("--poll", type=float, default=0.5, help="Segundos entre revisiones de la cola")
+    args = parser.parse_args()
+
+    manager = JobManager(
+        directory=job_manager.directory,
+        max_workers=args.workers,
+        limits=settings.JOBS_CONCURRENCY,
+        backend="process"
+    )
+    print(f"Worker escuchando {manager.directory} con {args.workers} procesos")
+    try:
+        while True:
+            claimed = manager.claim_pending()
+            if claimed:
+                print(f"{claimed} trabajos reclamados")
+            time.sleep(args.poll)
+    except KeyboardInterrupt:
+        manager.shutdown()
+
+
+if __name__ == "__main__":
+    main()
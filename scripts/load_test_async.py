@@ -0,0 +1,121 @@
+"""
+Prueba de carga de los endpoints de lectura (capa asíncrona con asyncpg).
+
+Contra uno o más servidores en marcha, mantiene N clientes concurrentes (500
+por defecto) pidiendo en rueda los endpoints de lectura portados a AsyncSession
+durante --seconds segundos. Reporta por servidor peticiones/segundo, latencia
+p50/p99 y errores (respuestas distintas de 200 o timeouts).
+
+Para comparar con la versión síncrona, levantar la revisión anterior en otro
+puerto contra la misma base y pasar ambos servidores con --target:
+
+    git worktree add /tmp/pos-sync <revisión anterior>
+    (cd /tmp/pos-sync && uvicorn app.main:app --port 8001 --workers 1) &
+    uvicorn app.main:app --port 8000 --workers 1 &
+    python scripts/load_test_async.py --username admin --password Admin123 \\
+        --target sync=http://localhost:8001 --target async=http://localhost:8000
+
+Uso:
+    python scripts/load_test_async.py --username admin --password Admin123
+    python scripts/load_test_async.py --username admin --password Admin123 --concurrency 500 --seconds 30
+"""
+import argparse
+import asyncio
+import time
+
+import httpx
+
+API_V1_STR = "/api/v1"
+
+READ_PATHS = [
+    f"{API_V1_STR}/products/?limit=50&include_total=false",
+    f"{API_V1_STR}/products/{{product_id}}",
+    f"{API_V1_STR}/products/{{product_id}}/stock",
+    f"{API_V1_STR}/inventory/branch/{{branch_id}}?limit=100",
+    f"{API_V1_STR}/inventory/low-stock?limit=100",
+    f"{API_V1_STR}/sales/summary",
+    f"{API_V1_STR}/sales/top-products",
+    f"{API_V1_STR}/sales/by-branch",
+    f"{API_V1_STR}/users/me",
+]
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def worker(client, paths, offset, headers, deadline, samples, errors):
+    """Un cliente: pide los endpoints en rueda hasta el final de la prueba"""
+    position = offset
+    while time.perf_counter() < deadline:
+        path = paths[position % len(paths)]
+        position += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            samples.append((time.perf_counter() - started) * 1000)
+        else:
+            errors.append(path)
+
+
+async def load(url, paths, headers, concurrency, seconds, timeout):
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=timeout, limits=limits) as client:
+        # Calentamiento: conexiones del pool del servidor y caches
+        for path in paths:
+            await client.get(path, headers=headers)
+
+        samples, errors = [], []
+        started = time.perf_counter()
+        deadline = started + seconds
+        await asyncio.gather(*(
+            worker(client, paths, index, headers, deadline, samples, errors)
+            for index in range(concurrency)
+        ))
+        return samples, errors, time.perf_counter() - started
+
+
+def login(url, username, password) -> dict:
+    response = httpx.post(f"{url}{API_V1_STR}/login", data={"username": username, "password": password}, timeout=60)
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", action="append", metavar="NOMBRE=URL",
+                        help="Servidor a medir (repetible); por defecto actual=http://localhost:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=500, help="Clientes simultáneos")
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--timeout", type=float, default=30.0, help="Segundos por petición antes de contarla como error")
+    parser.add_argument("--product-id", type=int, default=1)
+    parser.add_argument("--branch-id", type=int, default=1)
+    parser.add_argument("--path", action="append", help="Endpoint a pedir (repetible); por defecto los de lectura portados")
+    args = parser.parse_args()
+
+    targets = [target.split("=", 1) for target in (args.target or ["actual=http://localhost:8000"])]
+    paths = [path.format(product_id=args.product_id, branch_id=args.branch_id) for path in (args.path or READ_PATHS)]
+
+    print(f"clientes={args.concurrency} duración={args.seconds:.0f}s endpoints={len(paths)}")
+    for name, url in targets:
+        headers = login(url, args.username, args.password)
+        samples, errors, elapsed = asyncio.run(
+            load(url, paths, headers, args.concurrency, args.seconds, args.timeout)
+        )
+        if not samples:
+            print(f"{name:8} sin respuestas exitosas (errores={len(errors)})")
+            continue
+        print(f"{name:8} peticiones/segundo={len(samples) / elapsed:.0f} "
+              f"p50={percentile(samples, 50):.0f}ms p99={percentile(samples, 99):.0f}ms "
+              f"ok={len(samples)} errores={len(errors)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Prueba de estrés del generador de números de factura.
+
+Lanza varios procesos que generan en total --count números para unas pocas
+sucursales. Cada proceso descarta su asignador a mitad de camino para simular
+un reinicio. Al final se verifica que no haya ningún número duplicado y que
+la secuencia de cada proceso sea creciente por sucursal.
+
+Uso:
+    python scripts/stress_invoice_numbers.py --count 1000000 --workers 8
+    python scripts/stress_invoice_numbers.py --url sqlite:////tmp/invoices.db
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date
+from multiprocessing import Pool
+
+# Añadir el directorio raíz del proyecto al PATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.models.invoice_counter import InvoiceCounter
+from app.utils.sales import InvoiceNumberAllocator
+
+
+def worker(args):
+    url, count, branches, block_size, day = args
+    engine = create_engine(url, poolclass=NullPool)
+    numbers = []
+    allocator = InvoiceNumberAllocator(engine=engine, block_size=block_size)
+    for i in range(count):
+        if i == count // 2:
+            # Simular un reinicio del proceso: se pierde el bloque en memoria
+            allocator = InvoiceNumberAllocator(engine=engine, block_size=block_size)
+        numbers.append(allocator.next_number(branches[i % len(branches)], day))
+    engine.dispose()
+    return numbers
+
+
+def is_increasing(numbers):
+    last_by_branch = {}
+    for number in numbers:
+        _, branch, value = number.split("-")
+        if int(value) <= last_by_branch.get(branch, 0):
+            return False
+        last_by_branch[branch] = int(value)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--branches", type=int, default=3)
+    parser.add_argument("--block-size", type=int, default=settings.INVOICE_BLOCK_SIZE)
+    parser.add_argument("--url", default=str(settings.DATABASE_URL))
+    args = parser.parse_args()
+
+    engine = create_engine(args.url)
+    InvoiceCounter.__table__.create(engine, checkfirst=True)
+    engine.dispose()
+
+    # Usar un día "futuro" propio de la corrida para no chocar con facturas reales
+    day = date(2999, 1, 1 + int(time.time()) % 28)
+    branches = list(range(1, args.branches + 1))
+    per_worker = args.count // args.workers
+
+    started = time.perf_counter()
+    with Pool(args.workers) as pool:
+        results = pool.map(
+            worker,
+            [(args.url, per_worker, branches, args.block_size, day)] * args.workers
+        )
+    elapsed = time.perf_counter() - started
+
+    total = sum(len(numbers) for numbers in results)
+    unique = len({number for numbers in results for number in numbers})
+    increasing = all(is_increasing(numbers) for numbers in results)
+
+    print(f"procesos={args.workers} bloque={args.block_size} numeros={total} tiempo={elapsed:.2f}s")
+    print(f"numeros/segundo={total / elapsed:.0f} unicos={unique} duplicados={total - unique}")
+    print(f"secuencias crecientes por proceso={increasing}")
+
+    if unique != total or not increasing:
+        print("FALLO")
+        sys.exit(1)
+    print("OK: sin duplicados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+from fastapi import status
+from app.crud.inventory_ledger import check_inventory_drift, compact_inventory_snapshots, get_stock_as_of
+from app.models import InventoryMovement, InventorySnapshot
+from app.models.supplier import Supplier
+
+def sell(client, auth_token, catalog, product_id, quantity):
+    response = client.post(
+        "/api/v1/sales/",
+        json={
+            "client_id": catalog["client_id"],
+            "branch_id": catalog["branch_id"],
+            "payment_method_id": catalog["payment_method_id"],
+            "items": [{"product_id": product_id, "quantity": quantity, "unit_price": 10}]
+        },
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+def receive(client, db, auth_token, catalog, product_id, quantity):
+    supplier = Supplier(name="Distribuidora")
+    db.add(supplier)
+    db.commit()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    order = client.post("/api/v1/orders/", json={
+        "supplier_id": supplier.supplier_id,
+        "branch_id": catalog["branch_id"],
+        "items": [{"product_id": product_id, "quantity": quantity, "unit_cost": 5}]
+    }, headers=headers)
+    assert order.status_code == status.HTTP_201_CREATED
+    response = client.post(
+        f"/api/v1/orders/{order.json()['order_id']}/receipts",
+        json={"items": [{"product_id": product_id, "received_quantity": quantity}]},
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+def adjust(client, auth_token, catalog, product_id, quantity):
+    response = client.put(
+        f"/api/v1/inventory/{product_id}/{catalog['branch_id']}",
+        json={"quantity": quantity},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+
+def test_first_snapshot_uses_the_requested_time(db, catalog):
+    taken_at = datetime.utcnow()
+    compact_inventory_snapshots(db, taken_at=taken_at)
+    first, second = catalog["product_ids"]
+    assert get_stock_as_of(db, catalog["branch_id"], taken_at) == {first: 10, second: 10}
+    assert db.query(InventorySnapshot.taken_at).distinct().all() == [(taken_at,)]
+
+def test_first_snapshot_in_the_past_discounts_later_movements(client, db, auth_token, catalog):
+    first, second = catalog["product_ids"]
+    before_sale = datetime.utcnow()
+    sell(client, auth_token, catalog, first, 3)
+
+    # La foto inicial se pide para antes de la venta: no debe incluirla
+    compact_inventory_snapshots(db, taken_at=before_sale)
+    assert get_stock_as_of(db, catalog["branch_id"], before_sale) == {first: 10, second: 10}
+    assert get_stock_as_of(db, catalog["branch_id"], datetime.utcnow()) == {first: 7, second: 10}
+    assert check_inventory_drift(db) == []
+
+def test_ledger_follows_sales_receipts_and_adjustments(client, db, auth_token, catalog):
+    first, second = catalog["product_ids"]
+    start = datetime.utcnow()
+    compact_inventory_snapshots(db, taken_at=start)
+
+    sell(client, auth_token, catalog, first, 3)
+    after_sale = datetime.utcnow()
+    receive(client, db, auth_token, catalog, second, 5)
+    after_receipt = datetime.utcnow()
+    adjust(client, auth_token, catalog, first, 4)
+
+    db.expire_all()
+    movements = db.query(InventoryMovement.movement_type, InventoryMovement.product_id,
+                         InventoryMovement.quantity_delta).order_by(InventoryMovement.movement_id).all()
+    assert movements == [("SALE", first, -3), ("PURCHASE", second, 5), ("ADJUSTMENT", first, -3)]
+
+    # Compactar no cambia el pasado ni el presente
+    compact_inventory_snapshots(db, taken_at=datetime.utcnow())
+    assert db.query(InventorySnapshot.taken_at).distinct().count() == 2
+    branch_id = catalog["branch_id"]
+    assert get_stock_as_of(db, branch_id, start) == {first: 10, second: 10}
+    assert get_stock_as_of(db, branch_id, after_sale) == {first: 7, second: 10}
+    assert get_stock_as_of(db, branch_id, after_receipt) == {first: 7, second: 15}
+    assert get_stock_as_of(db, branch_id, datetime.utcnow()) == {first: 4, second: 15}
+    assert check_inventory_drift(db) == []
+
+    response = client.get(
+        "/api/v1/inventory/as-of",
+        params={"branch_id": branch_id, "at": after_sale.isoformat(), "product_ids": str(first)},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json() == [{"product_id": first, "quantity": 7.0}]
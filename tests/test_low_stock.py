@@ -0,0 +1,91 @@
+from fastapi import status
+from app.models import Inventory
+from app.models.supplier import Supplier
+from app.utils.low_stock import rebuild_low_stock
+
+def low_stock(client, auth_token):
+    response = client.get("/api/v1/inventory/low-stock", headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == status.HTTP_200_OK
+    return [(item["branch_id"], item["product_id"], item["quantity"]) for item in response.json()]
+
+def sell(client, auth_token, catalog, product_id, quantity):
+    response = client.post(
+        "/api/v1/sales/",
+        json={
+            "client_id": catalog["client_id"],
+            "branch_id": catalog["branch_id"],
+            "payment_method_id": catalog["payment_method_id"],
+            "items": [{"product_id": product_id, "quantity": quantity, "unit_price": 10}]
+        },
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+
+def update_product(client, auth_token, product_id, **fields):
+    response = client.put(f"/api/v1/products/{product_id}", json=fields,
+                          headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == status.HTTP_200_OK
+
+def test_sale_below_min_stock_adds_the_pair(client, auth_token, catalog):
+    first = catalog["product_ids"][0]
+    assert low_stock(client, auth_token) == []
+
+    sell(client, auth_token, catalog, first, 8)
+    # 2 unidades no están por debajo del mínimo (2)
+    assert low_stock(client, auth_token) == []
+
+    sell(client, auth_token, catalog, first, 1)
+    assert low_stock(client, auth_token) == [(catalog["branch_id"], first, 1)]
+
+def test_receipt_removes_the_pair(client, db, auth_token, catalog):
+    product_id = catalog["product_ids"][0]
+    sell(client, auth_token, catalog, product_id, 9)
+    assert low_stock(client, auth_token) == [(catalog["branch_id"], product_id, 1)]
+
+    supplier = Supplier(name="Distribuidora")
+    db.add(supplier)
+    db.commit()
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    order = client.post("/api/v1/orders/", json={
+        "supplier_id": supplier.supplier_id,
+        "branch_id": catalog["branch_id"],
+        "items": [{"product_id": product_id, "quantity": 5, "unit_cost": 5}]
+    }, headers=headers)
+    assert order.status_code == status.HTTP_201_CREATED
+    response = client.post(
+        f"/api/v1/orders/{order.json()['order_id']}/receipts",
+        json={"items": [{"product_id": product_id, "received_quantity": 5}]},
+        headers=headers
+    )
+    assert response.status_code == status.HTTP_200_OK
+    assert low_stock(client, auth_token) == []
+
+def test_product_changes_refresh_the_pairs(client, auth_token, catalog):
+    second = catalog["product_ids"][1]
+    branch_id = catalog["branch_id"]
+
+    update_product(client, auth_token, second, min_stock=11)
+    assert low_stock(client, auth_token) == [(branch_id, second, 10)]
+
+    update_product(client, auth_token, second, is_active=False)
+    assert low_stock(client, auth_token) == []
+
+    update_product(client, auth_token, second, is_active=True)
+    assert low_stock(client, auth_token) == [(branch_id, second, 10)]
+
+    update_product(client, auth_token, second, min_stock=2)
+    assert low_stock(client, auth_token) == []
+
+def test_rebuild_matches_inventory(client, db, auth_token, catalog):
+    first, second = catalog["product_ids"]
+    sell(client, auth_token, catalog, first, 9)
+
+    # Cambios que no pasan por refresh_low_stock (p. ej. una carga masiva)
+    db.query(Inventory).filter(Inventory.product_id == first).update({"quantity": 5})
+    db.query(Inventory).filter(Inventory.product_id == second).update({"quantity": 0})
+    db.commit()
+    assert low_stock(client, auth_token) == [(catalog["branch_id"], first, 1)]
+
+    assert rebuild_low_stock(db) == 1
+    db.commit()
+    assert low_stock(client, auth_token) == [(catalog["branch_id"], second, 0)]
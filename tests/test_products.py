@@ -1,5 +1,8 @@
 from fastapi import status
+from app.database import SessionLocal
+from app.models import Product
 from app.schemas.product import ProductCreate
+from app.utils.barcode_index import BarcodeIndex
 
 def test_create_product(client, db):
     product_data = {
@@ -16,4 +19,44 @@ def test_create_product(client, db):
     assert response.status_code == status.HTTP_201_CREATED
     data = response.json()
     assert data["name"] == product_data["name"]
-    assert "id" in data
\ No newline at end of file
+    assert "id" in data
+def test_barcode_index_sees_changes_from_other_workers(db, catalog):
+    index = BarcodeIndex(refresh_seconds=0)
+    first, second = catalog["product_ids"]
+    assert index.get(db, "7770000000001")["price"] == 10
+
+    # Otro worker cambia el precio de uno y desactiva el otro con su propia sesión
+    other = SessionLocal()
+    try:
+        other.query(Product).filter(Product.product_id == first).update({"price": 12, "name": "Producto 1 nuevo"})
+        other.query(Product).filter(Product.product_id == second).update({"is_active": False})
+        other.commit()
+    finally:
+        other.close()
+
+    db.expire_all()
+    product = index.get(db, "7770000000001")
+    assert product["price"] == 12
+    assert product["name"] == "Producto 1 nuevo"
+    assert index.get(db, "7770000000002") is None
+
+def test_catalog_total_is_opt_in(client, db, catalog):
+    for params in ({"limit": 1}, {"limit": 1, "search": "Producto"}):
+        page = client.get("/api/v1/products/", params=params).json()
+        assert page["total"] is None
+        assert len(page["items"]) == 1
+        assert page["next_cursor"]
+
+        last = client.get("/api/v1/products/", params=dict(params, cursor=page["next_cursor"],
+                                                             include_total=True)).json()
+        assert last["total"] == 2
+        assert last["next_cursor"] is None
+
+def test_import_rejects_files_not_in_utf8(client, auth_token):
+    response = client.post(
+        "/api/v1/products/import",
+        files={"file": ("productos.csv", "barcode,name\n7770000000009,Café\n".encode("latin-1"), "text/csv")},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert response.json()["detail"] == "El archivo debe estar en UTF-8"
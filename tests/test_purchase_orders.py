@@ -0,0 +1,114 @@
+from datetime import date, timedelta
+
+from fastapi import status
+from app.models import Inventory
+from app.models.sales_rollup import SalesDailyProduct
+from app.models.supplier import PurchaseOrderItem, Supplier, SupplierProduct
+from app.utils.reorder import get_reorder_suggestions
+
+def create_order(client, auth_token, catalog, quantity=10, order_status="APPROVED"):
+    response = client.post(
+        "/api/v1/orders/",
+        json={
+            "supplier_id": catalog["supplier_id"],
+            "branch_id": catalog["branch_id"],
+            "status": order_status,
+            "items": [{"product_id": catalog["product_ids"][0], "quantity": quantity, "unit_cost": 5}]
+        },
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    return response.json()["order_id"]
+
+def receive(client, auth_token, order_id, product_id, received_quantity):
+    return client.post(
+        f"/api/v1/orders/{order_id}/receipts",
+        json={"items": [{"product_id": product_id, "received_quantity": received_quantity}]},
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+
+def stock(db, catalog, product_id):
+    db.expire_all()
+    return db.query(Inventory.quantity).filter(
+        Inventory.branch_id == catalog["branch_id"],
+        Inventory.product_id == product_id
+    ).scalar()
+
+def with_supplier(db, catalog, lead_time_days=5):
+    supplier = Supplier(name="Distribuidora")
+    db.add(supplier)
+    db.flush()
+    db.add(SupplierProduct(supplier_id=supplier.supplier_id, product_id=catalog["product_ids"][0],
+                           cost_price=5, lead_time_days=lead_time_days))
+    db.commit()
+    return dict(catalog, supplier_id=supplier.supplier_id)
+
+def test_partial_receipts_add_only_the_difference(client, db, auth_token, catalog):
+    catalog = with_supplier(db, catalog)
+    product_id = catalog["product_ids"][0]
+    order_id = create_order(client, auth_token, catalog)
+    assert stock(db, catalog, product_id) == 10
+
+    response = receive(client, auth_token, order_id, product_id, 4)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "PARTIALLY_DELIVERED"
+    assert stock(db, catalog, product_id) == 14
+
+    response = receive(client, auth_token, order_id, product_id, 10)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["status"] == "DELIVERED"
+    assert response.json()["lines"][0]["delta"] == 6
+    assert stock(db, catalog, product_id) == 20
+
+def test_out_of_order_receipt_does_not_add_stock(client, db, auth_token, catalog):
+    catalog = with_supplier(db, catalog)
+    product_id = catalog["product_ids"][0]
+    order_id = create_order(client, auth_token, catalog)
+
+    assert receive(client, auth_token, order_id, product_id, 7).status_code == status.HTTP_200_OK
+    # Un reintento atrasado (total 3) llega después del total 7: no cambia nada
+    response = receive(client, auth_token, order_id, product_id, 3)
+    assert response.status_code == status.HTTP_200_OK
+    assert response.json()["lines"][0]["received_quantity"] == 7
+    assert response.json()["lines"][0]["delta"] == 0
+    assert stock(db, catalog, product_id) == 17
+
+    db.expire_all()
+    assert db.query(PurchaseOrderItem.received_quantity).filter(
+        PurchaseOrderItem.order_id == order_id
+    ).scalar() == 7
+
+def test_receipt_cannot_exceed_ordered_quantity(client, db, auth_token, catalog):
+    catalog = with_supplier(db, catalog)
+    product_id = catalog["product_ids"][0]
+    order_id = create_order(client, auth_token, catalog)
+
+    response = receive(client, auth_token, order_id, product_id, 11)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert stock(db, catalog, product_id) == 10
+
+def test_reorder_suggestions_discount_open_orders(client, db, auth_token, catalog):
+    catalog = with_supplier(db, catalog)
+    product_id = catalog["product_ids"][0]
+    as_of = date(2024, 3, 31)
+    db.add_all([
+        SalesDailyProduct(day=as_of - timedelta(days=offset), branch_id=catalog["branch_id"],
+                          product_id=product_id, quantity=3, total=30)
+        for offset in range(1, 31)
+    ])
+    db.commit()
+
+    suggested = get_reorder_suggestions(db, as_of=as_of)[0]["items"][0]
+    assert suggested["on_order"] == 0
+
+    # Una orden abierta de 6 con 4 recibidos: 14 en stock y 2 pedidos, se sugiere el resto
+    order_id = create_order(client, auth_token, catalog, quantity=6)
+    assert receive(client, auth_token, order_id, product_id, 4).status_code == status.HTTP_200_OK
+    pending = get_reorder_suggestions(db, as_of=as_of)[0]["items"][0]
+    assert pending["stock"] == 14
+    assert pending["on_order"] == 2
+    assert pending["quantity"] == suggested["quantity"] - 6
+
+    # Con lo que faltaba ya pedido, no se vuelve a sugerir
+    create_order(client, auth_token, catalog, quantity=pending["quantity"])
+    assert get_reorder_suggestions(db, as_of=as_of) == []
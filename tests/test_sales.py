@@ -1,5 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pytest
 from fastapi import status
-from app.schemas.sale import SaleCreate, SaleDetailCreate
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.models import Branch, IdempotencyKey, Inventory, InventoryMovement, Sale
+from app.crud.sale import create_sale, sync_sales
+from app.schemas.sale import SaleCreate, SaleDetailCreate, SaleSyncItem
+from app.utils.idempotency import IdempotencyStore, StoredResponse
+from app.utils import sales as sales_utils
+from app.utils.sales import InvoiceNumberAllocator
 
 def test_create_sale(client, auth_token):
     sale_data = {
@@ -21,4 +32,226 @@ def test_create_sale(client, auth_token):
     assert response.status_code == status.HTTP_201_CREATED
     data = response.json()
     assert data["total"] == 51.00
-    assert len(data["details"]) == 1
\ No newline at end of file
+    assert len(data["details"]) == 1
+
+def sale_payload(catalog, *lines):
+    return {
+        "client_id": catalog["client_id"],
+        "branch_id": catalog["branch_id"],
+        "payment_method_id": catalog["payment_method_id"],
+        "items": [
+            {"product_id": product_id, "quantity": quantity, "unit_price": 10}
+            for product_id, quantity in lines
+        ]
+    }
+
+def stock(db, catalog, product_id):
+    db.expire_all()
+    return db.query(Inventory.quantity).filter(
+        Inventory.branch_id == catalog["branch_id"],
+        Inventory.product_id == product_id
+    ).scalar()
+
+def test_create_sale_decrements_stock(client, db, auth_token, catalog):
+    first, second = catalog["product_ids"]
+    response = client.post(
+        "/api/v1/sales/",
+        json=sale_payload(catalog, (first, 3), (second, 1)),
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    assert stock(db, catalog, first) == 7
+    assert stock(db, catalog, second) == 9
+
+    movements = db.query(InventoryMovement).filter(InventoryMovement.movement_type == "SALE").all()
+    assert sorted(movement.quantity_delta for movement in movements) == [-3, -1]
+    assert {movement.reference_id for movement in movements} == {response.json()["sale_id"]}
+
+def test_create_sale_rejects_oversell(client, db, auth_token, catalog):
+    first, second = catalog["product_ids"]
+    response = client.post(
+        "/api/v1/sales/",
+        json=sale_payload(catalog, (first, 1), (second, 11)),
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "Stock insuficiente para Producto 2" in response.json()["detail"]
+    # Nada de la canasta se descuenta ni se registra
+    assert stock(db, catalog, first) == 10
+    assert stock(db, catalog, second) == 10
+    assert db.query(Sale).count() == 0
+    assert db.query(InventoryMovement).count() == 0
+
+def test_create_sale_adds_repeated_lines_before_checking_stock(client, db, auth_token, catalog):
+    first, _ = catalog["product_ids"]
+    response = client.post(
+        "/api/v1/sales/",
+        json=sale_payload(catalog, (first, 6), (first, 5)),
+        headers={"Authorization": f"Bearer {auth_token}"}
+    )
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert stock(db, catalog, first) == 10
+
+def test_sequential_sales_cannot_oversell(client, db, auth_token, catalog):
+    first, _ = catalog["product_ids"]
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    assert client.post("/api/v1/sales/", json=sale_payload(catalog, (first, 8)), headers=headers).status_code == 201
+    response = client.post("/api/v1/sales/", json=sale_payload(catalog, (first, 3)), headers=headers)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert stock(db, catalog, first) == 2
+    assert client.post("/api/v1/sales/", json=sale_payload(catalog, (first, 2)), headers=headers).status_code == 201
+    assert stock(db, catalog, first) == 0
+
+def test_create_sale_without_inventory_row(client, db, auth_token, catalog):
+    branch = Branch(name="Sin stock", address="Calle 2")
+    db.add(branch)
+    db.commit()
+    payload = sale_payload(catalog, (catalog["product_ids"][0], 1))
+    payload["branch_id"] = branch.branch_id
+    response = client.post("/api/v1/sales/", json=payload, headers={"Authorization": f"Bearer {auth_token}"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert db.query(Sale).count() == 0
+
+def test_invoice_numbers_are_unique_per_branch_and_day(client, auth_token, catalog):
+    first, _ = catalog["product_ids"]
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    numbers = []
+    for _ in range(5):
+        response = client.post("/api/v1/sales/", json=sale_payload(catalog, (first, 1)), headers=headers)
+        assert response.status_code == status.HTTP_201_CREATED
+        sale = response.json()
+        numbers.append(sale["invoice_number"])
+        # El día de la factura es el de sale_date (UTC)
+        day = datetime.fromisoformat(sale["sale_date"]).strftime("%Y%m%d")
+        assert sale["invoice_number"].startswith(f"{day}-{catalog['branch_id']}-")
+    assert len(set(numbers)) == len(numbers)
+    assert numbers == sorted(numbers)
+
+def test_invoice_allocators_never_share_numbers(db, catalog):
+    # Dos procesos con su propio asignador y varios hilos por proceso
+    bind = db.get_bind()
+    allocators = [InvoiceNumberAllocator(engine=bind, block_size=3) for _ in range(2)]
+    day = date(2026, 1, 31)
+
+    def generate(allocator):
+        return [allocator.next_number(catalog["branch_id"], day) for _ in range(20)]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        batches = list(executor.map(generate, allocators * 2))
+    numbers = [number for batch in batches for number in batch]
+    assert len(numbers) == 80
+    assert len(set(numbers)) == len(numbers)
+    assert all(number.startswith(f"20260131-{catalog['branch_id']}-") for number in numbers)
+
+def test_idempotent_sale_is_created_once(client, db, auth_token, catalog):
+    first, _ = catalog["product_ids"]
+    headers = {"Authorization": f"Bearer {auth_token}", "Idempotency-Key": "venta-1"}
+    payload = sale_payload(catalog, (first, 2))
+    created = client.post("/api/v1/sales/", json=payload, headers=headers)
+    assert created.status_code == status.HTTP_201_CREATED
+    assert "Idempotent-Replayed" not in created.headers
+
+    replayed = client.post("/api/v1/sales/", json=payload, headers=headers)
+    assert replayed.status_code == status.HTTP_201_CREATED
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json() == created.json()
+    assert db.query(Sale).count() == 1
+    assert stock(db, catalog, first) == 8
+
+def test_idempotency_key_reused_with_another_body(client, db, auth_token, catalog):
+    first, _ = catalog["product_ids"]
+    headers = {"Authorization": f"Bearer {auth_token}", "Idempotency-Key": "venta-1"}
+    assert client.post("/api/v1/sales/", json=sale_payload(catalog, (first, 2)),
+                       headers=headers).status_code == status.HTTP_201_CREATED
+    response = client.post("/api/v1/sales/", json=sale_payload(catalog, (first, 3)), headers=headers)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert db.query(Sale).count() == 1
+    assert stock(db, catalog, first) == 8
+
+# La entrada vencida se borra y se vuelve a insertar en la misma sesión
+@pytest.mark.filterwarnings("error::sqlalchemy.exc.SAWarning")
+def test_idempotent_error_expires_before_success(client, db, auth_token, catalog):
+    first, _ = catalog["product_ids"]
+    headers = {"Authorization": f"Bearer {auth_token}", "Idempotency-Key": "venta-1"}
+    payload = sale_payload(catalog, (first, 12))
+    assert client.post("/api/v1/sales/", json=payload, headers=headers).status_code == status.HTTP_400_BAD_REQUEST
+
+    # Llega mercadería: dentro del TTL de errores se repite el 400 guardado
+    db.query(Inventory).filter(Inventory.product_id == first).update({Inventory.quantity: 20})
+    db.commit()
+    replayed = client.post("/api/v1/sales/", json=payload, headers=headers)
+    assert replayed.status_code == status.HTTP_400_BAD_REQUEST
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    expires_at = db.query(IdempotencyKey.expires_at).scalar()
+    assert expires_at < datetime.utcnow() + timedelta(minutes=5)
+
+    # Vencido el 4xx, el mismo reintento se ejecuta
+    db.query(IdempotencyKey).update({IdempotencyKey.expires_at: datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert client.post("/api/v1/sales/", json=payload, headers=headers).status_code == status.HTTP_201_CREATED
+    assert stock(db, catalog, first) == 8
+
+def test_idempotency_keys_are_shared_between_workers(db):
+    # Dos workers con su propio store sobre la misma tabla
+    workers = [IdempotencyStore(ttl_seconds=60, error_ttl_seconds=5, lease_seconds=60) for _ in range(2)]
+    key = ("uid:1", "POST", "/api/v1/sales/", "venta-1")
+    state, row_id = workers[0].begin(key, "huella")
+    assert state == "run"
+    assert workers[1].begin(key, "huella") == ("wait", None)
+    assert workers[1].begin(key, "otra huella") == ("mismatch", None)
+
+    workers[0].finish(row_id, StoredResponse(201, ((b"content-type", b"application/json"),), b'{"sale_id": 1}'))
+    state, stored = workers[1].begin(key, "huella")
+    assert state == "replay"
+    assert stored.status_code == 201
+    assert stored.body == b'{"sale_id": 1}'
+
+def test_sync_batch_rejects_only_the_failing_sales(client, db, auth_token, catalog):
+    first, second = catalog["product_ids"]
+    headers = {"Authorization": f"Bearer {auth_token}"}
+    batch = [
+        dict(sale_payload(catalog, (first, 4)), client_uuid="00000000-0000-4000-8000-000000000001"),
+        # Después de la primera quedan 6: esta venta no alcanza
+        dict(sale_payload(catalog, (first, 7)), client_uuid="00000000-0000-4000-8000-000000000002"),
+        dict(sale_payload(catalog, (second, 2)), client_uuid="00000000-0000-4000-8000-000000000003"),
+        sale_payload(catalog, (second, 1)),  # Sin client_uuid
+    ]
+    response = client.post("/api/v1/sales/batch", json=batch, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert (data["created"], data["duplicates"], data["rejected"]) == (2, 0, 2)
+    assert [result["status"] for result in data["results"]] == ["CREATED", "REJECTED", "CREATED", "REJECTED"]
+    assert "Stock insuficiente para Producto 1" in data["results"][1]["error"]
+    assert data["results"][3]["error"].startswith("client_uuid")
+    assert stock(db, catalog, first) == 6
+    assert stock(db, catalog, second) == 8
+    assert db.query(Sale).count() == 2
+
+    # Reenviar el lote no duplica las ventas ya registradas
+    response = client.post("/api/v1/sales/batch", json=batch, headers=headers)
+    assert response.status_code == status.HTTP_200_OK
+    data = response.json()
+    assert [result["status"] for result in data["results"]] == ["DUPLICATE", "REJECTED", "DUPLICATE", "REJECTED"]
+    assert data["results"][0]["sale_id"] is not None
+    assert stock(db, catalog, first) == 6
+    assert stock(db, catalog, second) == 8
+    assert db.query(Sale).count() == 2
+
+def test_invoice_block_reservation_needs_no_second_connection(db, catalog, monkeypatch):
+    # Pool de una sola conexión: reservar un bloque mientras la sesión retiene el
+    # inventario bloqueado esperaría una segunda conexión hasta el timeout
+    single = create_engine(str(db.get_bind().url), pool_size=1, max_overflow=0, pool_timeout=1,
+                           connect_args={"check_same_thread": False})
+    monkeypatch.setattr(sales_utils, "invoice_numbers", InvoiceNumberAllocator(block_size=1))
+    first, second = catalog["product_ids"]
+    try:
+        with Session(single, expire_on_commit=False) as session:
+            sale = create_sale(session, SaleCreate(**sale_payload(catalog, (first, 1))), user_id=None)
+            assert sale.invoice_number.endswith("-000001")
+        with Session(single, expire_on_commit=False) as session:
+            batch = [SaleSyncItem(**sale_payload(catalog, (second, 1)),
+                                  client_uuid=f"00000000-0000-4000-8000-00000000000{i}") for i in (1, 2)]
+            results = sync_sales(session, batch, user_id=None)
+            assert [result["status"] for result in results] == ["CREATED", "CREATED"]
+    finally:
+        single.dispose()
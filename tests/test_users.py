@@ -1,5 +1,8 @@
 from fastapi import status
+from app.models import Role, User
 from app.schemas.user import UserCreate
+from app.utils.revocation import revocations
+from app.utils.security import create_user_token
 
 def test_create_user(client):
     user_data = {
@@ -21,4 +24,37 @@ def test_login_user(client, test_user):
     }
     response = client.post("/api/v1/auth/login", data=login_data)
     assert response.status_code == status.HTTP_200_OK
-    assert "access_token" in response.json()
\ No newline at end of file
+    assert "access_token" in response.json()
+
+def test_role_permission_change_applies_to_issued_tokens(client, db, catalog):
+    role = Role(name="Cajero", permissions={"sales": True})
+    db.add(role)
+    db.flush()
+    cashier = User(username="cajero", password_hash="x", role_id=role.role_id)
+    db.add(cashier)
+    db.commit()
+    revocations.refresh()
+    headers = {"Authorization": f"Bearer {create_user_token(cashier)}"}
+
+    assert client.get("/api/v1/sales/", headers=headers).status_code == status.HTTP_200_OK
+
+    # Quitar el permiso al rol invalida el acceso de los tokens ya emitidos
+    db.query(Role).filter(Role.role_id == role.role_id).update({"permissions": {"reports": True}})
+    db.commit()
+    revocations.refresh()
+    assert client.get("/api/v1/sales/", headers=headers).status_code == status.HTTP_403_FORBIDDEN
+
+def test_superuser_demotion_applies_to_issued_tokens(client, db):
+    admin = User(username="jefe", password_hash="x", is_superuser=True)
+    db.add(admin)
+    db.commit()
+    revocations.refresh()
+    headers = {"Authorization": f"Bearer {create_user_token(admin)}"}
+
+    assert client.get("/api/v1/sales/invoice-cache/stats", headers=headers).status_code == status.HTTP_200_OK
+
+    # Quitar is_superuser en la base deja sin privilegios de administrador al token ya emitido
+    db.query(User).filter(User.user_id == admin.user_id).update({"is_superuser": False})
+    db.commit()
+    revocations.refresh()
+    assert client.get("/api/v1/sales/invoice-cache/stats", headers=headers).status_code == status.HTTP_403_FORBIDDEN